@@ -0,0 +1,81 @@
+"""
+对比各embedding后端的吞吐量（chunks/sec）及与PyTorch后端的一致性
+
+用法:
+    python benchmarks/embed_throughput.py
+    python benchmarks/embed_throughput.py --file input.txt --threads 4 --backends torch onnx-int8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.rag.embed import EMBEDDING_BACKENDS, check_parity, get_embedding_model  # noqa: E402
+from mini_agent.rag.text_chunker import TextFileChunker  # noqa: E402
+
+WORDS = (
+    'agent tool workflow memory vector index query answer document search file network '
+    'cache latency throughput model prompt token round session user result error retry'
+).split()
+
+
+def synthetic_chunks(count: int, seed: int = 0):
+    """长度不一的合成文本，模拟真实分块的长度分布"""
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 120))) for _ in range(count)]
+
+
+def measure(model, chunks, batch_size: int, repeat: int) -> float:
+    """返回最好一次的 chunks/sec"""
+    model.encode(chunks[:batch_size], batch_size=batch_size, show_progress_bar=False)
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.encode(chunks, batch_size=batch_size, show_progress_bar=False)
+        best = max(best, len(chunks) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='embedding后端吞吐量基准')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--backends', nargs='+', default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument('--file', help='按行分块的文本文件，默认使用合成文本')
+    parser.add_argument('--chunks', type=int, default=2000, help='合成文本的分块数')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None, help='推理线程数')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-cosine', type=float, default=0.99, help='与torch后端的最低余弦相似度')
+    args = parser.parse_args()
+
+    if args.file:
+        chunks = [chunk for chunk in TextFileChunker(args.file).get_chunks() if chunk.strip()]
+    else:
+        chunks = synthetic_chunks(args.chunks)
+    parity_texts = chunks[:256]
+    reference = get_embedding_model(args.model, 'torch', args.threads)
+
+    print(f"{len(chunks)} chunks, batch_size={args.batch_size}, threads={args.threads or 'default'}")
+    print(f"{'backend':<12} {'load s':>8} {'chunks/sec':>12} {'min cos':>9} {'mean cos':>9}")
+    failed = False
+    for backend in args.backends:
+        start = time.perf_counter()
+        model = get_embedding_model(args.model, backend, args.threads)
+        load_seconds = time.perf_counter() - start
+        throughput = measure(model, chunks, args.batch_size, args.repeat)
+        try:
+            parity = check_parity(reference, model, parity_texts, args.min_cosine)
+        except ValueError as e:
+            print(f"  {backend}: {e}")
+            failed = True
+            parity = check_parity(reference, model, parity_texts, min_cosine=-1.0)
+        print(f"{backend:<12} {load_seconds:>8.1f} {throughput:>12.1f} "
+              f"{parity['min_cosine']:>9.4f} {parity['mean_cosine']:>9.4f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
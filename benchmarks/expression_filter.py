@@ -0,0 +1,58 @@
+"""
+过滤节点基准：改造前每个元素复制一次上下文并重新解析条件，改造后条件只编译一次、按作用域逐层查找
+
+用法:
+    python benchmarks/expression_filter.py
+    python benchmarks/expression_filter.py --items 100000 --context-size 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.workflow.nodes import TransformFilterNode  # noqa: E402
+
+CONDITION = 'item["amount"] > threshold and item["status"] == "paid"'
+
+
+def legacy_filter(condition, items, context):
+    """改造前的实现"""
+    filtered = []
+    for item in items:
+        eval_context = context.copy()
+        eval_context['item'] = item
+        if eval(condition, {"__builtins__": {}}, eval_context):
+            filtered.append(item)
+    return filtered
+
+
+def main():
+    parser = argparse.ArgumentParser(description='过滤节点基准')
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--context-size', type=int, default=1000, help='上下文中其他节点结果的个数')
+    args = parser.parse_args()
+
+    items = [{'amount': i % 500, 'status': 'paid' if i % 3 else 'open'} for i in range(args.items)]
+    context = {f"node{i}": {'value': i} for i in range(args.context_size)}
+    context['threshold'] = 250
+    node = {'id': 'filter', 'config': {'condition': CONDITION, 'input': items}}
+
+    start = time.perf_counter()
+    expected = legacy_filter(CONDITION, items, context)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = asyncio.run(TransformFilterNode.execute(node, context))
+    current = time.perf_counter() - start
+    assert result['filtered_data'] == expected
+
+    print(f"{args.items} items, context size {len(context)}, {len(expected)} kept")
+    print(f"legacy:   {legacy * 1000:10.1f} ms ({args.items / legacy:.0f} items/sec)")
+    print(f"compiled: {current * 1000:10.1f} ms ({args.items / current:.0f} items/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+HTTP节点基准：每次请求新建会话 vs 共享连接池 vs 共享连接池+条件请求缓存（本地服务器）
+
+用法:
+    python benchmarks/http_pool.py
+    python benchmarks/http_pool.py --requests 2000 --size 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.workflow.http_pool import HttpClientPool  # noqa: E402
+
+
+async def serve(size):
+    body = b'x' * size
+
+    async def handler(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(body=body, headers={'ETag': '"v1"'})
+
+    app = web.Application()
+    app.add_routes([web.get('/data', handler)])
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/data"
+
+
+async def legacy(url):
+    """改造前的实现：每次请求新建会话"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            return await resp.text()
+
+
+async def main_async(args):
+    runner, url = await serve(args.size)
+    pool = HttpClientPool()
+    try:
+        for label, call in [
+            ('new session', lambda: legacy(url)),
+            ('pooled', lambda: pool.request('GET', url)),
+            ('pooled + cache', lambda: pool.request('GET', url, use_cache=True)),
+        ]:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                await call()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<16}{args.requests / elapsed:10.0f} req/s")
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP连接池基准')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=50000, help='响应体字节数')
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+测量各入口模块的冷启动导入耗时，并检查是否提前导入了重量级依赖
+
+用法:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --budget-ms 300
+    python benchmarks/import_time.py --top 15 mini_agent.workflow.engine
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# 默认测量的入口模块
+DEFAULT_MODULES = [
+    'mini_agent.agent.agent',
+    'mini_agent.agent.pool',
+    'mini_agent.workflow.engine',
+    'mini_agent.workflow.nodes',
+    'mini_agent.workflow.parser',
+    'mini_agent.workflow.visualizer',
+    'mini_agent.tools.tool_manager',
+]
+
+# 只应在使用对应功能时才导入的依赖
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'faiss', 'graphviz', 'fastmcp', 'openai', 'aiohttp']
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def _run(args):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env)
+
+
+def import_profile(module: str):
+    """以 -X importtime 导入模块，返回 [(累计微秒, 模块名)]，按累计耗时降序"""
+    result = _run(['-X', 'importtime', '-c', f'import {module}'])
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)
+
+
+def loaded_heavy_modules(module: str):
+    """导入模块后，返回已被导入的重量级依赖"""
+    code = (
+        f"import sys, json, {module}\n"
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+    result = _run(['-c', code])
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mini_agent 导入耗时基准')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=3, help='每个模块测量次数，取最小值')
+    parser.add_argument('--top', type=int, default=0, help='显示耗时最多的N个子模块')
+    parser.add_argument('--budget-ms', type=float, default=None, help='导入耗时上限，超出时返回非零退出码')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<36} {'import ms':>10}  heavy modules loaded")
+    for module in args.modules:
+        profiles = [import_profile(module) for _ in range(max(1, args.repeat))]
+        best = min(profiles, key=lambda entries: entries[0][0])
+        total_ms = best[0][0] / 1000
+        heavy = loaded_heavy_modules(module)
+        print(f"{module:<36} {total_ms:>10.1f}  {', '.join(heavy) or '-'}")
+        for cumulative, name in best[1:args.top + 1]:
+            print(f"    {name:<48} {cumulative / 1000:>8.1f}")
+        if heavy or (args.budget_ms is not None and total_ms > args.budget_ms):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
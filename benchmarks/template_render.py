@@ -0,0 +1,76 @@
+"""
+模板渲染基准：逐次正则替换 vs 预解析模板，以及结构化数据的JSON往返 vs 直接渲染
+
+用法:
+    python benchmarks/template_render.py
+    python benchmarks/template_render.py --iterations 200000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.workflow.template import render_template, render_value  # noqa: E402
+
+CONTEXT = {
+    'order': {'id': 1024, 'customer': {'name': 'Alice', 'email': 'alice@example.com'}, 'total': 99.5},
+    'status': 'paid',
+}
+TEMPLATE = 'Order {{order.id}} for {{order.customer.name}} <{{order.customer.email}}>: {{order.total}} ({{status}})'
+BODY = {
+    'id': '{{order.id}}',
+    'customer': {'name': '{{order.customer.name}}', 'email': '{{order.customer.email}}'},
+    'lines': ['{{order.total}}', '{{status}}', 'fixed'],
+    'retries': 3,
+}
+
+
+def legacy_render(template, context):
+    """改造前的实现：每次调用都新建闭包并拆分路径"""
+    def replace_var(match):
+        value = context
+        try:
+            for key in match.group(1).strip().split('.'):
+                value = value[key]
+            return str(value)
+        except (KeyError, TypeError):
+            return match.group(0)
+    return re.sub(r'\{\{([^}]+)\}\}', replace_var, template)
+
+
+def legacy_render_value(value, context):
+    rendered = legacy_render(json.dumps(value), context)
+    try:
+        return json.loads(rendered)
+    except json.JSONDecodeError:
+        return rendered
+
+
+def timed(label, fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{iterations / elapsed:>12.0f} renders/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模板渲染基准')
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    assert legacy_render(TEMPLATE, CONTEXT) == render_template(TEMPLATE, CONTEXT)
+    assert legacy_render_value(BODY, CONTEXT) == render_value(BODY, CONTEXT)
+
+    timed('string, re.sub', lambda: legacy_render(TEMPLATE, CONTEXT), args.iterations)
+    timed('string, compiled', lambda: render_template(TEMPLATE, CONTEXT), args.iterations)
+    timed('dict, JSON round-trip', lambda: legacy_render_value(BODY, CONTEXT), args.iterations)
+    timed('dict, direct', lambda: render_value(BODY, CONTEXT), args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+长链路工作流的内存占用：每个节点输出较大的结果，对比默认配置与有界历史+溢出到磁盘
+
+用法:
+    python benchmarks/workflow_memory.py
+    python benchmarks/workflow_memory.py --nodes 500 --rows 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.workflow.engine import WorkflowEngine  # noqa: E402
+from mini_agent.workflow.nodes import NODE_REGISTRY  # noqa: E402
+
+
+class RowsNode:
+    rows = 1000
+
+    @staticmethod
+    async def execute(node, context):
+        return {'rows': [{'id': i, 'text': f"row {i} " * 8} for i in range(RowsNode.rows)]}
+
+
+REGISTRY = {**NODE_REGISTRY, 'bench/rows': RowsNode}
+
+
+def chain(count):
+    """数据节点与循环节点交替的长链"""
+    nodes, connections = [], []
+    for i in range(count):
+        if i % 2:
+            nodes.append({'id': f"n{i}", 'type': 'logic/loop', 'config': {'items': list(range(50))}})
+        else:
+            nodes.append({'id': f"n{i}", 'type': 'bench/rows'})
+        if i:
+            connections.append({'from': f"n{i - 1}", 'to': f"n{i}"})
+    return {'name': 'memory', 'nodes': nodes, 'connections': connections}
+
+
+def measure(workflow, **options):
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = WorkflowEngine(workflow, REGISTRY, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(engine.execute_workflow())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert result['success'], result.get('error')
+    engine.context.close()
+    return peak / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='工作流内存占用基准')
+    parser.add_argument('--nodes', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--spill-threshold', type=int, default=64 * 1024)
+    args = parser.parse_args()
+    logging.getLogger('mini_agent').setLevel(logging.WARNING)
+    RowsNode.rows = args.rows
+
+    workflow = chain(args.nodes)
+    for label, options in [
+        ('default', {}),
+        ('bounded', {'history_limit': 100, 'spill_threshold': args.spill_threshold}),
+    ]:
+        peak, elapsed = measure(workflow, **options)
+        print(f"{label:<8} {args.nodes} nodes: peak {peak:8.1f} MiB, {elapsed:6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+工作流运行时吞吐：每次触发新建引擎顺序执行 vs 运行时按不同worker数并发执行（instances/sec）
+
+用法:
+    python benchmarks/workflow_runtime.py
+    python benchmarks/workflow_runtime.py --instances 5000 --latency-ms 10 --workers 1 8 64 256
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mini_agent.workflow.engine import WorkflowEngine  # noqa: E402
+from mini_agent.workflow.runtime import WorkflowRuntime  # noqa: E402
+
+
+class IoNode:
+    """模拟一次外部调用"""
+    latency = 0.005
+
+    @staticmethod
+    async def execute(node, context):
+        await asyncio.sleep(IoNode.latency)
+        return {'value': context['input']['value']}
+
+
+REGISTRY = {'bench/io': IoNode}
+
+
+def workflow(length: int = 4):
+    nodes = [{'id': f"n{i}", 'type': 'bench/io'} for i in range(length)]
+    connections = [{'from': f"n{i}", 'to': f"n{i + 1}"} for i in range(length - 1)]
+    return {'name': 'runtime', 'nodes': nodes, 'connections': connections}
+
+
+async def sequential(definition, count):
+    """改造前的用法：每次触发新建引擎并等待执行完"""
+    for i in range(count):
+        await WorkflowEngine(definition, REGISTRY).execute_workflow({'input': {'value': i}})
+
+
+async def concurrent(definition, count, workers):
+    async with WorkflowRuntime(definition, REGISTRY, workers=workers, queue_size=workers * 2) as runtime:
+        results = await runtime.run_many({'input': {'value': i}} for i in range(count))
+        assert all(result['success'] for result in results)
+        return runtime.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='工作流运行时吞吐基准')
+    parser.add_argument('--instances', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 64, 256])
+    args = parser.parse_args()
+    logging.getLogger('mini_agent').setLevel(logging.WARNING)
+    IoNode.latency = args.latency_ms / 1000
+    definition = workflow()
+
+    count = min(args.instances, 200)
+    start = time.perf_counter()
+    asyncio.run(sequential(definition, count))
+    print(f"{'engine per trigger':<20}{count / (time.perf_counter() - start):10.0f} instances/sec")
+    for workers in args.workers:
+        stats = asyncio.run(concurrent(definition, args.instances, workers))
+        print(f"{f'runtime x{workers}':<20}{stats['instances_per_sec']:10.0f} instances/sec")
+
+
+if __name__ == '__main__':
+    main()
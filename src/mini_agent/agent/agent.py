@@ -1,36 +1,96 @@
+import asyncio
 import logging
-from typing import Any, Dict, List, Union
-from mini_agent.llm.llm import OpenAILLM
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from mini_agent.llm.llm import OpenAILLM, get_shared_llm
 from mini_agent.tools.tool_manager import ToolManager
-from mini_agent.llm.utils import Message
+from mini_agent.tools.executor import ToolExecutor
+from mini_agent.llm.utils import Message, ToolCall
 import json
 from mini_agent.config.agent_config import AgentConfig
-import sys
-from mini_agent.rag.text_chunker import TextFileChunker
-from mini_agent.rag.embed import VectorDB
-from mini_agent.rag.rag_engine import rag_answer
+from mini_agent.tracing import NULL_TRACER, Tracer, use_tracer
+from mini_agent.agent.checkpoint import CheckpointStore, SessionCheckpoint
+
+if TYPE_CHECKING:
+    from mini_agent.agent.memory import MemoryStore
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class RunState:
+    """单次运行的状态，每次run独立，保证同一Agent可被并发调用"""
+    round: int = 0
+    should_stop: bool = False
+    error_count: int = 0
+    # 本次运行检索到的长期记忆
+    memory: Optional[Message] = None
+
+
 class Agent:
     """LLM+工具+记忆+规划"""
 
-    def __init__(self, config: AgentConfig):
+    def __init__(
+        self,
+        config: AgentConfig,
+        llm: Optional[OpenAILLM] = None,
+        tool_manager: Optional[ToolManager] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        tracer: Optional[Tracer] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        memory: Optional["MemoryStore"] = None,
+    ):
+        """
+        :param config: Agent配置
+        :param llm: 共享的LLM实例，默认按配置获取进程内共享实例
+        :param tool_manager: 共享的工具管理器，默认新建
+        :param tool_executor: 共享的工具执行器，默认基于tool_manager新建
+        :param tracer: 耗时追踪器，默认在config.trace开启时新建
+        :param checkpoint_store: 会话检查点存储，默认在配置了checkpoint_dir时新建
+        :param memory: 长期记忆存储，默认在config.memory开启时新建
+        """
         self.config = config
         self.max_rounds = config.max_rounds
         self.max_errors = config.max_errors
-        self.should_stop = False
-        self.round = 0
-        self.error_count = 0
         self.document_path = config.document_path
         # 初始化LLM
-        self.llm = self._init_llm()
+        self.llm = llm or self._init_llm()
         # 初始化工具管理器
-        self.tool_manager = ToolManager()
+        self.tool_manager = tool_manager or ToolManager()
+        # 初始化工具执行器
+        self.tool_executor = tool_executor or ToolExecutor.from_config(self.tool_manager, config)
+        # 初始化耗时追踪
+        self.tracer = tracer or (Tracer() if config.trace else NULL_TRACER)
+        # 初始化检查点
+        if checkpoint_store is None and config.checkpoint_dir:
+            checkpoint_store = CheckpointStore(config.checkpoint_dir)
+        self.checkpoint_store = checkpoint_store
+        # 初始化长期记忆（依赖embedding模型，只在开启时导入）
+        if memory is None and config.memory:
+            from mini_agent.agent.memory import MemoryStore
+            memory = MemoryStore(config.memory_dir, top_k=config.memory_top_k,
+                                 token_budget=config.memory_token_budget,
+                                 backend=config.embedding_backend, num_threads=config.embedding_threads)
+        self.memory = memory
+        # 最近一次运行的状态，供round等只读属性使用
+        self._last_state = RunState()
         logger.info(f"Agent初始化完成，模型: {self.config.model}")
 
+    # 运行状态已移到每次运行独立的RunState中，以下只读属性保留旧接口，反映最近一次开始的运行
+    @property
+    def round(self) -> int:
+        return self._last_state.round
+
+    @property
+    def should_stop(self) -> bool:
+        return self._last_state.should_stop
+
+    @property
+    def error_count(self) -> int:
+        return self._last_state.error_count
+
     def _init_llm(self) -> OpenAILLM:
         """初始化LLM"""
         api_key = self.config.openai_api_key
@@ -38,10 +98,14 @@ class Agent:
             raise ValueError("OpenAI API key未配置")
         model = self.config.model
         base_url = self.config.base_url
-        return OpenAILLM(api_key, model, base_url)
+        return get_shared_llm(api_key, model, base_url)
 
-    def _prepare_messages(self, inputs: Union[str, List[Message]]) -> List[Message]:
-        """准备消息列表"""
+    def _prepare_messages(self, inputs: Union[str, List[Message]],
+                          history: Optional[List[Message]] = None) -> List[Message]:
+        """准备消息列表，有历史消息时将输入追加到历史之后"""
+        if history:
+            new_messages = [Message(role="user", content=inputs)] if isinstance(inputs, str) else list(inputs)
+            return history + new_messages
         if isinstance(inputs, str):
             system_prompt = self.config.system_prompt
             return [
@@ -50,27 +114,62 @@ class Agent:
             ]
         return inputs
 
-    async def _step(self, messages: List[Message]) -> List[Message]:
+    async def _generate_streaming(self, messages: List[Message], tools) -> Tuple[Message, List[asyncio.Task]]:
+        """流式生成，每个工具调用的参数完整后立即提交执行"""
+        started: Dict[int, asyncio.Task] = {}
+
+        def on_tool_call(index: int, tool_call: ToolCall):
+            started[index] = self.tool_executor.submit(tool_call)
+
+        try:
+            response = await self.llm.astream_generate(messages, tools, on_tool_call)
+        except BaseException:
+            for task in started.values():
+                task.cancel()
+            raise
+        if not response.tool_calls:
+            # 生成失败时取消已提交的工具调用
+            for task in started.values():
+                task.cancel()
+            return response, []
+        return response, [started[index] for index in sorted(started)]
+
+    @staticmethod
+    def _with_memory(messages: List[Message], state: RunState) -> List[Message]:
+        """将检索到的记忆放在开头的系统消息之后，只用于本次请求，不写入对话历史"""
+        if state.memory is None:
+            return messages
+        position = 0
+        while position < len(messages) and messages[position].role == "system":
+            position += 1
+        return messages[:position] + [state.memory] + messages[position:]
+
+    async def _step(self, messages: List[Message], state: RunState) -> List[Message]:
         """执行单步对话"""
         try:
             # 获取可用工具
-            tools = await self.tool_manager.list_tools()
+            with self.tracer.span('tools.list', 'tool') as span:
+                tools = await self.tool_manager.list_tools()
+                span.set(count=len(tools))
             # 生成LLM响应
-            response = self.llm.generate(messages, tools)
+            prompt = self._with_memory(messages, state)
+            with self.tracer.span('llm.generate', 'llm', model=self.config.model, stream=self.config.stream_tools) as span:
+                if self.config.stream_tools:
+                    response, tool_tasks = await self._generate_streaming(prompt, tools)
+                else:
+                    response, tool_tasks = await self.llm.agenerate(prompt, tools), None
+                if span.recording:
+                    span.set(usage=response.usage, tool_calls=len(response.tool_calls),
+                             response_chars=len(response.content or ''))
             messages.append(response)
             # 处理工具调用
             if getattr(response, 'tool_calls', None):
                 logger.info(f"检测到工具调用: {len(response.tool_calls)}个")
-                import asyncio
-                async def call_tool(tool_call):
-                    arguments = tool_call.arguments
-                    if isinstance(arguments, str):
-                        arguments = json.loads(arguments)
-                    return await self.tool_manager.call_tool(tool_call.tool_name, arguments)
-
-                tool_results = await asyncio.gather(*[
-                    call_tool(tool_call) for tool_call in response.tool_calls
-                ])
+                if tool_tasks is not None:
+                    # 流式生成期间已开始执行，按原顺序收集结果
+                    tool_results = await asyncio.gather(*tool_tasks)
+                else:
+                    tool_results = await self.tool_executor.execute(response.tool_calls)
 
                 for tool_call, result in zip(response.tool_calls, tool_results):
                     tool_message = Message(
@@ -82,57 +181,123 @@ class Agent:
                     messages.append(tool_message)
             else:
                 # 没有工具调用，停止对话
-                self.should_stop = True
+                state.should_stop = True
             return messages
         except Exception as e:
             logger.error(f"步骤执行失败: {e}")
-            self.error_count += 1
+            state.error_count += 1
             # 添加错误消息
             error_message = Message(
                 role="assistant", content=f"执行过程中遇到错误: {str(e)}"
             )
             messages.append(error_message)
             # 检查是否超过最大错误次数
-            if self.error_count >= self.max_errors:
-                self.should_stop = True
+            if state.error_count >= self.max_errors:
+                state.should_stop = True
+            return messages
+
+    async def run(self, inputs: Union[str, List[Message]], session_id: Optional[str] = None,
+                  user_id: Optional[str] = None) -> List[Message]:
+        """
+        运行Agent
+        :param session_id: 会话ID，启用检查点时每轮结束后保存对话；
+            该会话上次运行未结束时从最后完成的轮次继续（忽略inputs），否则在历史对话后追加inputs
+        :param user_id: 用户ID，启用长期记忆时按用户（未指定时按会话）检索和保存记忆
+        """
+        with use_tracer(self.tracer), self.tracer.span('agent.run') as span:
+            messages = await self._run(inputs, session_id, user_id)
+            span.set(messages=len(messages))
             return messages
 
-    async def run(self, inputs: Union[str, List[Message]]) -> List[Message]:
-        """运行Agent"""
+    def _restore(self, checkpoint: SessionCheckpoint, inputs: Union[str, List[Message]],
+                 state: RunState) -> List[Message]:
+        """从检查点恢复消息和运行状态"""
+        history = checkpoint.load()
+        if checkpoint.resumable:
+            state.round = checkpoint.commit.round
+            state.error_count = checkpoint.commit.error_count
+            logger.info(f"从检查点恢复会话 {checkpoint.session_id}，已完成轮次: {state.round}")
+            return history
+        messages = self._prepare_messages(inputs, history)
+        checkpoint.append(messages[len(history):], round=0)
+        return messages
+
+    async def _recall(self, namespace: str, messages: List[Message], state: RunState) -> int:
+        """按最近的用户消息检索长期记忆，返回该消息的位置"""
+        position = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].role == "user":
+                position = index
+                break
+        if position < len(messages):
+            with self.tracer.span('memory.recall', 'memory') as span:
+                # 向量检索是CPU密集操作，放到线程中执行
+                state.memory = await asyncio.to_thread(self.memory.recall, namespace, messages[position].content)
+                span.set(recalled=state.memory is not None)
+        return position
+
+    async def _remember(self, namespace: str, messages: List[Message], session_id: Optional[str]):
+        """将本次问答和工具结果写入长期记忆"""
+        with self.tracer.span('memory.add', 'memory', messages=len(messages)):
+            await asyncio.to_thread(self.memory.add_messages, namespace, messages, session_id)
+
+    async def _run(self, inputs: Union[str, List[Message]], session_id: Optional[str] = None,
+                   user_id: Optional[str] = None) -> List[Message]:
+        checkpoint = None
         try:
-            # 重置运行时状态
-            self.should_stop = False
-            self.round = 0
-            self.error_count = 0
+            # 每次运行使用独立的运行时状态
+            state = self._last_state = RunState()
             # 如果指定了文档路径，走RAG流程
             if self.document_path:
+                # RAG依赖torch/faiss，只在使用时导入
+                from mini_agent.rag.rag_engine import rag_answer
                 question = inputs if isinstance(inputs, str) else (inputs[-1].content if inputs else "")
-                response = rag_answer(self.document_path, question, self.config)
+                # 检索和向量化是CPU密集操作，放到线程中执行
+                response = await asyncio.to_thread(rag_answer, self.document_path, question, self.config)
                 return [Message(role="assistant", content=response)]
             # 否则走原有LLM流程
             # 准备消息
-            messages = self._prepare_messages(inputs)
+            if session_id is not None and self.checkpoint_store is not None:
+                checkpoint = self.checkpoint_store.open(session_id)
+                messages = self._restore(checkpoint, inputs, state)
+            else:
+                messages = self._prepare_messages(inputs)
+            # 检索长期记忆
+            memory_namespace = (user_id or session_id) if self.memory is not None else None
+            if memory_namespace is not None:
+                question_position = await self._recall(memory_namespace, messages, state)
             # 显示初始消息
             for msg in messages:
                 if msg.role != "system":
                     logger.info(f"[{msg.role}]: {msg.content}")
             # 主循环
-            while not self.should_stop and self.round < self.max_rounds:
-                messages = await self._step(messages)
-                self.round += 1
+            while not state.should_stop and state.round < self.max_rounds:
+                with self.tracer.span('agent.round', round=state.round):
+                    messages = await self._step(messages, state)
+                state.round += 1
+                if checkpoint is not None:
+                    checkpoint.append(messages[checkpoint.message_count:], state.round, state.error_count)
                 # 显示最新响应
                 if messages[-1].content:
                     logger.info(f"[assistant]: {messages[-1].content}")
             # 检查是否超时
-            if self.round >= self.max_rounds and not self.should_stop:
+            if state.round >= self.max_rounds and not state.should_stop:
                 timeout_message = Message(
                     role="assistant",
                     content=f"任务超时，已达到最大轮次 {self.max_rounds}",
                 )
                 messages.append(timeout_message)
-                logger.warning(f"任务超时，轮次: {self.round}")
-            logger.info(f"Agent运行完成，总轮次: {self.round}")
+                logger.warning(f"任务超时，轮次: {state.round}")
+            if checkpoint is not None:
+                checkpoint.append(messages[checkpoint.message_count:], state.round, state.error_count, done=True)
+            if memory_namespace is not None:
+                await self._remember(memory_namespace, messages[question_position:], session_id)
+            logger.info(f"Agent运行完成，总轮次: {state.round}")
             return messages
         except Exception as e:
             logger.error(f"Agent运行出错: {e}")
             raise
+        finally:
+            # 运行结束后关闭检查点文件，长期运行的AgentPool不会为每个会话保留一个文件句柄
+            if checkpoint is not None:
+                self.checkpoint_store.release(checkpoint)
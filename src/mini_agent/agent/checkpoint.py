@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from mini_agent.llm.utils import Message
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+# 日志行前缀：消息行和提交行，扫描日志时无需反序列化消息
+_MESSAGE_PREFIX = b'{"m":'
+_COMMIT_PREFIX = b'{"c":'
+_VALID_SESSION_ID = re.compile(r'^[A-Za-z0-9._-]+$')
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _compact_message(message: Message) -> Dict[str, Any]:
+    """去掉空字段，减小日志体积"""
+    return {key: value for key, value in message.to_dict().items() if value not in (None, '', [])}
+
+
+@dataclass
+class CommitInfo:
+    """最后一次提交的运行状态"""
+    # 当前运行已完成的轮次
+    round: int = 0
+    # 提交时的消息总数
+    message_count: int = 0
+    error_count: int = 0
+    # 当前运行是否已结束
+    done: bool = True
+
+
+class SessionCheckpoint:
+    """
+    单个会话的检查点：追加写入的JSONL日志 + 定期快照的偏移量索引
+    日志中每条消息一行，每轮结束追加一行提交记录；只有提交过的内容才会被恢复
+    """
+
+    def __init__(self, session_id: str, log_path: str, index_path: str, snapshot_interval: int = 10,
+                 fsync: bool = False):
+        """
+        :param session_id: 会话ID
+        :param log_path: 日志文件路径
+        :param index_path: 索引快照路径
+        :param snapshot_interval: 每提交多少次写一次索引快照
+        :param fsync: 每次提交后是否fsync，防止系统崩溃丢失数据
+        """
+        self.session_id = session_id
+        self.log_path = log_path
+        self.index_path = index_path
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.fsync = fsync
+        # 每条已提交消息在日志中的起始偏移量
+        self._offsets: List[int] = []
+        self._commit = CommitInfo()
+        # 日志有效长度（最后一条提交记录之后）
+        self._size = 0
+        self._commits_since_snapshot = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._open()
+
+    @property
+    def message_count(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def commit(self) -> CommitInfo:
+        return self._commit
+
+    @property
+    def resumable(self) -> bool:
+        """是否有未结束的运行可以继续"""
+        return not self._commit.done
+
+    def _open(self):
+        """加载索引快照，再扫描快照之后的日志补齐"""
+        self._load_index()
+        open(self.log_path, 'ab').close()
+        self._file = open(self.log_path, 'r+b')
+        self._file.seek(0, os.SEEK_END)
+        actual_size = self._file.tell()
+        if actual_size < self._size:
+            logger.warning(f"检查点日志比索引短，重建索引: {self.log_path}")
+            self._offsets, self._commit, self._size = [], CommitInfo(), 0
+        self._scan(self._size)
+        if actual_size > self._size:
+            # 丢弃未提交的消息和写了一半的行
+            logger.warning(f"丢弃检查点日志末尾未提交的 {actual_size - self._size} 字节: {self.log_path}")
+            self._file.truncate(self._size)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"检查点索引损坏，将重建: {e}")
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        self._offsets = list(data['offsets'])
+        self._commit = CommitInfo(**data['commit'])
+        self._size = data['size']
+
+    def _scan(self, start: int):
+        """从start开始扫描日志，只识别行类型，不反序列化消息"""
+        self._file.seek(start)
+        position = start
+        pending: List[int] = []
+        for line in self._file:
+            if not line.endswith(b'\n'):
+                break
+            if line.startswith(_MESSAGE_PREFIX):
+                pending.append(position)
+            elif line.startswith(_COMMIT_PREFIX):
+                try:
+                    commit = json.loads(line)['c']
+                except (ValueError, KeyError):
+                    break
+                self._offsets.extend(pending)
+                pending = []
+                self._commit = CommitInfo(**commit)
+                self._size = position + len(line)
+            else:
+                break
+            position += len(line)
+
+    def _snapshot(self):
+        """写入索引快照（先写临时文件再替换，保证原子性）"""
+        data = {
+            'version': INDEX_VERSION,
+            'session_id': self.session_id,
+            'size': self._size,
+            'commit': self._commit.__dict__,
+            'offsets': self._offsets,
+        }
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+        self._commits_since_snapshot = 0
+
+    def append(self, messages: List[Message], round: int, error_count: int = 0, done: bool = False):
+        """
+        追加新消息并提交，一次写入
+        :param messages: 上次提交后新增的消息
+        :param round: 当前运行已完成的轮次
+        :param done: 当前运行是否已结束
+        """
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError(f"检查点已关闭: {self.session_id}")
+            commit = CommitInfo(round, len(self._offsets) + len(messages), error_count, done)
+            chunks = []
+            offsets = []
+            position = self._size
+            for message in messages:
+                chunk = _dumps({'m': _compact_message(message)})
+                offsets.append(position)
+                position += len(chunk)
+                chunks.append(chunk)
+            chunks.append(_dumps({'c': commit.__dict__}))
+            data = b''.join(chunks)
+            self._file.seek(self._size)
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._offsets.extend(offsets)
+            self._size += len(data)
+            self._commit = commit
+            self._commits_since_snapshot += 1
+            if done or self._commits_since_snapshot >= self.snapshot_interval:
+                self._snapshot()
+
+    def read_messages(self, start: int = 0, stop: Optional[int] = None) -> List[Message]:
+        """按偏移量索引读取[start, stop)范围内的消息，只反序列化这部分"""
+        with self._lock:
+            offsets = self._offsets[start:stop]
+            if not offsets:
+                return []
+            with open(self.log_path, 'rb') as f:
+                f.seek(offsets[0])
+                messages = []
+                while len(messages) < len(offsets):
+                    line = f.readline()
+                    # 跳过夹在消息之间的提交记录
+                    if line.startswith(_MESSAGE_PREFIX):
+                        messages.append(Message.from_dict(json.loads(line)['m']))
+                return messages
+
+    def load(self) -> List[Message]:
+        """读取全部已提交的消息"""
+        return self.read_messages()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            if self._commits_since_snapshot:
+                self._snapshot()
+            self._file.close()
+            self._file = None
+
+
+class CheckpointStore:
+    """
+    检查点目录，每个会话一个日志文件和一个索引文件
+    打开的检查点持有文件句柄，使用者用完后调用release，最后一个使用者归还时关闭
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 10, fsync: bool = False):
+        """
+        :param directory: 检查点目录
+        :param snapshot_interval: 每提交多少次写一次索引快照
+        :param fsync: 每次提交后是否fsync
+        """
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self._sessions: Dict[str, SessionCheckpoint] = {}
+        # 会话ID -> 尚未release的使用者数
+        self._users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, session_id: str):
+        if not _VALID_SESSION_ID.match(session_id):
+            raise ValueError(f"会话ID只能包含字母、数字、'.'、'_'和'-': {session_id}")
+        base = os.path.join(self.directory, session_id)
+        return base + '.jsonl', base + '.idx.json'
+
+    def open(self, session_id: str) -> SessionCheckpoint:
+        """打开（或创建）会话检查点，只加载索引，消息按需读取；用完后调用release"""
+        with self._lock:
+            checkpoint = self._sessions.get(session_id)
+            if checkpoint is None:
+                log_path, index_path = self._paths(session_id)
+                checkpoint = SessionCheckpoint(session_id, log_path, index_path,
+                                               self.snapshot_interval, self.fsync)
+                self._sessions[session_id] = checkpoint
+            self._users[session_id] = self._users.get(session_id, 0) + 1
+            return checkpoint
+
+    def release(self, checkpoint: SessionCheckpoint):
+        """归还open得到的检查点，没有其他使用者时关闭文件句柄"""
+        session_id = checkpoint.session_id
+        with self._lock:
+            users = self._users.get(session_id, 0) - 1
+            if users > 0:
+                self._users[session_id] = users
+                return
+            self._users.pop(session_id, None)
+            if self._sessions.get(session_id) is checkpoint:
+                del self._sessions[session_id]
+        checkpoint.close()
+
+    @property
+    def open_count(self) -> int:
+        """当前打开的检查点数"""
+        with self._lock:
+            return len(self._sessions)
+
+    def exists(self, session_id: str) -> bool:
+        return os.path.exists(self._paths(session_id)[0])
+
+    def list_sessions(self) -> List[str]:
+        return sorted(name[:-len('.jsonl')] for name in os.listdir(self.directory) if name.endswith('.jsonl'))
+
+    def delete(self, session_id: str):
+        """删除会话检查点"""
+        with self._lock:
+            checkpoint = self._sessions.pop(session_id, None)
+            self._users.pop(session_id, None)
+        if checkpoint is not None:
+            checkpoint.close()
+        for path in self._paths(session_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._users.clear()
+        for checkpoint in sessions:
+            checkpoint.close()
@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from mini_agent.llm.utils import Message
+from mini_agent.rag.embed import VectorDB, get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+_VALID_NAMESPACE = re.compile(r'^[A-Za-z0-9._-]+$')
+_CJK = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计token数：中日韩字符按1个token，其余按4个字符1个token"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class MemoryItem:
+    """一条记忆"""
+    text: str
+    role: str
+    created_at: float
+    session_id: Optional[str] = None
+
+
+class _Namespace:
+    """一个用户/会话的记忆：向量索引 + 与索引下标一一对应的记忆条目"""
+
+    def __init__(self, db: VectorDB):
+        self.db = db
+        self.items: List[MemoryItem] = []
+        self.lock = threading.Lock()
+
+
+class MemoryStore:
+    """
+    长期记忆：把历史对话和工具结果向量化，按用户/会话分别建立增量索引，
+    每次提问时只取回最相关、且在token预算内的记忆
+    """
+
+    def __init__(self, directory: Optional[str] = None, model_name: str = 'all-MiniLM-L6-v2', model=None,
+                 top_k: int = 8, token_budget: int = 512, max_chars: int = 1000, max_distance: Optional[float] = None,
+                 backend: str = 'torch', num_threads: Optional[int] = None):
+        """
+        :param directory: 持久化目录，None表示只保存在内存中
+        :param model_name: embedding模型名，与RAG共用模型实例
+        :param model: 自定义embedding模型（需提供encode方法）
+        :param top_k: 每次最多检索的记忆数
+        :param token_budget: 注入提示词的记忆总token上限
+        :param max_chars: 单条记忆保存的最大字符数
+        :param max_distance: L2距离超过该值的记忆不注入
+        :param backend: embedding后端，torch、onnx 或 onnx-int8
+        :param num_threads: embedding推理线程数
+        """
+        self.directory = directory
+        self.model_name = model_name
+        self._model = model
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.max_chars = max_chars
+        self.max_distance = max_distance
+        self.backend = backend
+        self.num_threads = num_threads
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name, self.backend, self.num_threads)
+        return self._model
+
+    def _paths(self, namespace: str):
+        base = os.path.join(self.directory, namespace)
+        return base + '.jsonl', base + '.vec', base + '.meta.json'
+
+    def _namespace(self, namespace: str) -> _Namespace:
+        """获取命名空间，首次访问时从磁盘加载"""
+        if not _VALID_NAMESPACE.match(namespace):
+            raise ValueError(f"记忆命名空间只能包含字母、数字、'.'、'_'和'-': {namespace}")
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                entry = self._namespaces[namespace] = _Namespace(VectorDB(model=self.model))
+                if self.directory:
+                    self._load(namespace, entry)
+            return entry
+
+    def _load(self, namespace: str, entry: _Namespace):
+        """读取已保存的记忆和向量，不重新编码"""
+        items_path, vectors_path, meta_path = self._paths(namespace)
+        if not all(os.path.exists(path) for path in (items_path, vectors_path, meta_path)):
+            return
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            dim = json.load(f)['dim']
+        with open(items_path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.endswith('\n')]
+        vectors = np.fromfile(vectors_path, dtype='float32')
+        count = min(len(lines), len(vectors) // dim)
+        if count < len(lines) or count * dim * 4 != os.path.getsize(vectors_path):
+            # 写入中断时两个文件条数不一致，截断到共同的部分
+            logger.warning(f"记忆文件不完整，只保留前 {count} 条: {items_path}")
+            with open(items_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[:count])
+            with open(vectors_path, 'r+b') as f:
+                f.truncate(count * dim * 4)
+        if count:
+            entry.items = [MemoryItem(**json.loads(line)) for line in lines[:count]]
+            entry.db.add([item.text for item in entry.items], vectors[:count * dim].reshape(count, dim))
+
+    def _persist(self, namespace: str, items: List[MemoryItem], embeddings: np.ndarray):
+        """追加写入新记忆：向量以float32追加到二进制文件，元数据写JSONL"""
+        items_path, vectors_path, meta_path = self._paths(namespace)
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'dim': int(embeddings.shape[1]), 'model': self.model_name}, f)
+        with open(vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(embeddings, dtype='float32').tobytes())
+        with open(items_path, 'a', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(asdict(item), ensure_ascii=False) + '\n')
+
+    def add(self, namespace: str, items: List[MemoryItem]):
+        """编码并追加记忆，已有索引不重建"""
+        items = [
+            replace(item, text=item.text[:self.max_chars] + '...') if len(item.text) > self.max_chars else item
+            for item in items if item.text.strip()
+        ]
+        if not items:
+            return
+        entry = self._namespace(namespace)
+        embeddings = entry.db.embed([item.text for item in items])
+        with entry.lock:
+            entry.db.add([item.text for item in items], embeddings)
+            entry.items.extend(items)
+            if self.directory:
+                self._persist(namespace, items, embeddings)
+
+    def add_messages(self, namespace: str, messages: List[Message], session_id: Optional[str] = None):
+        """将对话消息（用户输入、助手回答、工具结果）写入记忆"""
+        now = time.time()
+        items = []
+        for message in messages:
+            if message.role == 'system' or not message.content:
+                continue
+            if message.role == 'tool':
+                text = f"工具 {message.name} 返回: {message.content}"
+            else:
+                text = f"{message.role}: {message.content}"
+            items.append(MemoryItem(text=text, role=message.role, created_at=now, session_id=session_id))
+        self.add(namespace, items)
+
+    def search(self, namespace: str, query: str, top_k: Optional[int] = None,
+               token_budget: Optional[int] = None) -> List[MemoryItem]:
+        """检索与query最相关的记忆，按相关度排序，总token数不超过预算"""
+        entry = self._namespace(namespace)
+        budget = self.token_budget if token_budget is None else token_budget
+        with entry.lock:
+            if not entry.items or not query:
+                return []
+            hits = entry.db.search(query, top_k or self.top_k)
+            items = entry.items
+        results = []
+        used = 0
+        for index, distance in hits:
+            if self.max_distance is not None and distance > self.max_distance:
+                break
+            cost = estimate_tokens(items[index].text)
+            if used + cost > budget:
+                continue
+            used += cost
+            results.append(items[index])
+        return results
+
+    def recall(self, namespace: str, query: str) -> Optional[Message]:
+        """检索记忆并组装成一条系统消息，没有相关记忆时返回None"""
+        items = self.search(namespace, query)
+        if not items:
+            return None
+        lines = '\n'.join(f"- {item.text}" for item in items)
+        return Message(role='system', content=f"以下是与当前对话相关的历史记忆，仅供参考：\n{lines}")
+
+    def count(self, namespace: str) -> int:
+        return len(self._namespace(namespace).items)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+from mini_agent.agent.agent import Agent
+from mini_agent.config.agent_config import AgentConfig
+from mini_agent.llm.llm import OpenAILLM
+from mini_agent.llm.utils import Message
+from mini_agent.tools.executor import ToolExecutor
+from mini_agent.tools.tool_manager import ToolManager
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPoolFullError(RuntimeError):
+    """AgentPool排队请求已满，拒绝新请求"""
+
+
+class AgentSession:
+    """一个会话：独立的对话历史，共享池中的LLM与工具"""
+
+    def __init__(self, pool: 'AgentPool', session_id: str, system_prompt: Optional[str] = None):
+        self.pool = pool
+        self.session_id = session_id
+        self.messages: List[Message] = [
+            Message(role="system", content=system_prompt or pool.config.system_prompt)
+        ]
+        self.last_active = time.monotonic()
+        # 同一会话内的请求按顺序执行
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def run(self, inputs: Union[str, List[Message]]) -> List[Message]:
+        """在会话中继续对话，返回本次新增的消息"""
+        async with self._lock:
+            self.last_active = time.monotonic()
+            new_messages = [Message(role="user", content=inputs)] if isinstance(inputs, str) else list(inputs)
+            history = self.messages + new_messages
+            result = await self.pool._run(history)
+            if result is history:
+                added = result[len(self.messages):]
+            else:
+                # RAG流程只返回回答消息
+                added = result
+                result = history + result
+            self.messages = result
+            self.last_active = time.monotonic()
+            return added
+
+
+class AgentPool:
+    """多会话Agent池：共享LLM客户端、工具注册表和执行器，会话状态相互隔离，并带准入控制"""
+
+    def __init__(
+        self,
+        config: AgentConfig,
+        max_concurrent_runs: int = 64,
+        max_pending: int = 1024,
+        max_sessions: int = 10000,
+        llm: Optional[OpenAILLM] = None,
+        tool_manager: Optional[ToolManager] = None,
+    ):
+        """
+        :param config: Agent配置，所有会话共用
+        :param max_concurrent_runs: 同时执行的run数上限
+        :param max_pending: 等待执行的run数上限，超出时抛出AgentPoolFullError
+        :param max_sessions: 保留的会话数上限，超出时淘汰最久未使用的空闲会话
+        :param llm: 共享的LLM实例
+        :param tool_manager: 共享的工具管理器
+        """
+        self.config = config
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self.max_pending = max(0, max_pending)
+        self.max_sessions = max(1, max_sessions)
+        self.tool_manager = tool_manager or ToolManager()
+        self.tool_executor = ToolExecutor.from_config(self.tool_manager, config)
+        # Agent本身不保存运行状态，所有会话共享同一个实例
+        self.agent = Agent(config, llm=llm, tool_manager=self.tool_manager, tool_executor=self.tool_executor)
+        self._sessions: "OrderedDict[str, AgentSession]" = OrderedDict()
+        self._run_semaphore = asyncio.Semaphore(self.max_concurrent_runs)
+        self._active = 0
+        self._waiting = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """池的运行状态"""
+        return {
+            'sessions': len(self._sessions),
+            'active_runs': self._active,
+            'pending_runs': self._waiting,
+        }
+
+    def session(self, session_id: Optional[str] = None, system_prompt: Optional[str] = None) -> AgentSession:
+        """获取或创建会话"""
+        if session_id is not None and session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+            return self._sessions[session_id]
+        session_id = session_id or str(uuid.uuid4())
+        self._evict_idle_sessions()
+        session = AgentSession(self, session_id, system_prompt)
+        self._sessions[session_id] = session
+        return session
+
+    def close_session(self, session_id: str):
+        """移除会话"""
+        self._sessions.pop(session_id, None)
+
+    def _evict_idle_sessions(self):
+        """会话数达到上限时，淘汰最久未使用的空闲会话"""
+        while len(self._sessions) >= self.max_sessions:
+            for session_id, session in self._sessions.items():
+                if not session.busy:
+                    del self._sessions[session_id]
+                    logger.info(f"淘汰空闲会话: {session_id}")
+                    break
+            else:
+                raise AgentPoolFullError(f"会话数已达上限 {self.max_sessions}")
+
+    async def _run(self, messages: List[Message]) -> List[Message]:
+        """在并发限制下执行一次Agent运行"""
+        if self._run_semaphore.locked() and self._waiting >= self.max_pending:
+            raise AgentPoolFullError(f"排队请求数已达上限 {self.max_pending}")
+        self._waiting += 1
+        try:
+            await self._run_semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        try:
+            return await self.agent.run(messages)
+        finally:
+            self._active -= 1
+            self._run_semaphore.release()
+
+    async def run(self, inputs: Union[str, List[Message]], session_id: Optional[str] = None) -> List[Message]:
+        """在指定会话（默认新会话）中运行，返回本次新增的消息"""
+        return await self.session(session_id).run(inputs)
+
+    async def close(self):
+        """释放共享资源"""
+        self._sessions.clear()
+        self.tool_executor.close()
+        await self.tool_manager.cleanup_all()
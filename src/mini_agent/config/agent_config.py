@@ -16,6 +16,27 @@ class AgentConfig:
     # 运行参数
     max_rounds: int = 10   
     max_errors: int = 3
+    # 工具执行参数
+    tool_timeout: Optional[float] = 60.0
+    max_tool_concurrency: int = 8
+    # 幂等工具结果缓存条目数，0表示不缓存
+    tool_cache_size: int = 256
+    # 流式生成，工具调用参数完整后立即执行
+    stream_tools: bool = False
+    # 是否记录每轮、LLM调用和工具调用的耗时
+    trace: bool = False
+    # 会话检查点目录，设置后每轮结束保存对话，可从中断处继续
+    checkpoint_dir: Optional[str] = None
+    # 长期记忆：按用户/会话检索相关历史注入提示词
+    memory: bool = False
+    # 记忆持久化目录，None表示只保存在内存中
+    memory_dir: Optional[str] = None
+    memory_top_k: int = 8
+    memory_token_budget: int = 512
+    # embedding后端：torch、onnx 或 onnx-int8（RAG和长期记忆共用）
+    embedding_backend: str = "torch"
+    # embedding推理线程数，None表示使用默认值
+    embedding_threads: Optional[int] = None
     # 文档路径（RAG）
     document_path: Optional[str] = None
     @classmethod
@@ -32,6 +53,18 @@ class AgentConfig:
             "system_prompt": self.system_prompt,
             "max_rounds": self.max_rounds,
             "max_errors": self.max_errors,
+            "tool_timeout": self.tool_timeout,
+            "max_tool_concurrency": self.max_tool_concurrency,
+            "tool_cache_size": self.tool_cache_size,
+            "stream_tools": self.stream_tools,
+            "trace": self.trace,
+            "checkpoint_dir": self.checkpoint_dir,
+            "memory": self.memory,
+            "memory_dir": self.memory_dir,
+            "memory_top_k": self.memory_top_k,
+            "memory_token_budget": self.memory_token_budget,
+            "embedding_backend": self.embedding_backend,
+            "embedding_threads": self.embedding_threads,
             "document_path": self.document_path,
         }
     
@@ -43,4 +76,18 @@ class AgentConfig:
             raise ValueError("max_rounds必须大于0")
         if self.max_errors <= 0:
             raise ValueError("max_errors必须大于0")
+        if self.tool_timeout is not None and self.tool_timeout <= 0:
+            raise ValueError("tool_timeout必须大于0")
+        if self.max_tool_concurrency <= 0:
+            raise ValueError("max_tool_concurrency必须大于0")
+        if self.tool_cache_size < 0:
+            raise ValueError("tool_cache_size不能小于0")
+        if self.memory_top_k <= 0:
+            raise ValueError("memory_top_k必须大于0")
+        if self.memory_token_budget < 0:
+            raise ValueError("memory_token_budget不能小于0")
+        if self.embedding_backend not in ("torch", "onnx", "onnx-int8"):
+            raise ValueError("embedding_backend必须是torch、onnx或onnx-int8")
+        if self.embedding_threads is not None and self.embedding_threads <= 0:
+            raise ValueError("embedding_threads必须大于0")
         # document_path 可选，不做强制校验 
\ No newline at end of file
@@ -1,69 +1,249 @@
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import threading
+import weakref
 
-from pydantic.type_adapter import P
 from mini_agent.llm.utils import Message, Tool
-from openai import OpenAI
 import logging
 from mini_agent.llm.utils import ToolCall
+from mini_agent.tracing import current_tracer
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
 class OpenAILLM:
     """OpenAI LLM实现"""
-    
+
     def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", base_url: Optional[str] = None):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.api_key = api_key
+        self.base_url = base_url
         self.model = model
-    
+        self._client: Optional["OpenAI"] = None
+        # 异步客户端按事件循环区分，避免跨循环复用连接
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> "OpenAI":
+        """同步客户端，首次使用时创建（openai包导入较慢）"""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    def _get_async_client(self) -> "AsyncOpenAI":
+        """获取当前事件循环的异步客户端"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._async_clients[loop] = client
+        return client
+
+    def _build_params(self, messages: List[Message], tools: Optional[List[Tool]] = None) -> Dict[str, Any]:
+        """构建API请求参数"""
+        with current_tracer().span('llm.serialize', 'llm') as span:
+            params = self._build_params_untraced(messages, tools)
+            if span.recording:
+                span.set(messages=len(messages), tools=len(tools or []),
+                         request_bytes=len(json.dumps(params, ensure_ascii=False, default=str)))
+            return params
+
+    def _build_params_untraced(self, messages: List[Message], tools: Optional[List[Tool]] = None) -> Dict[str, Any]:
+        # 准备消息
+        api_messages = [msg.to_dict() for msg in messages]
+
+        # 准备工具
+        api_tools = tools if tools else None
+
+        # 构建参数
+        params = {
+            "model": self.model,
+            "messages": api_messages,
+        }
+        if api_tools:
+            params["tools"] = api_tools
+            params["tool_choice"] = "auto"
+        return params
+
+    def _parse_response(self, response) -> Message:
+        """解析API响应"""
+        message = response.choices[0].message
+
+        # 构建返回消息
+        result = Message(
+            role=message.role,
+            content=message.content or ''
+        )
+        result.usage = self._parse_usage(getattr(response, 'usage', None))
+
+        # 处理工具调用
+        if hasattr(message, 'tool_calls') and message.tool_calls:
+            result.tool_calls = []
+            for tool_call in message.tool_calls:
+                # 转换成 ToolCall 对象
+                tool_data = ToolCall(
+                    id=getattr(tool_call, 'id', None),
+                    type=getattr(tool_call, 'type', None),
+                    tool_name=getattr(tool_call.function, 'name', None) if hasattr(tool_call, 'function') else None,
+                    arguments=getattr(tool_call.function, 'arguments', None) if hasattr(tool_call, 'function') else None,
+                )
+                logger.debug(f"tool_data: {tool_data.to_dict()}")
+                result.tool_calls.append(tool_data)
+
+        return result
+
+    @staticmethod
+    def _parse_usage(usage) -> Optional[Dict[str, int]]:
+        """提取token用量"""
+        if usage is None:
+            return None
+        return {
+            'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+            'completion_tokens': getattr(usage, 'completion_tokens', None),
+            'total_tokens': getattr(usage, 'total_tokens', None),
+        }
+
     def generate(self, messages: List[Message], tools: Optional[List[Tool]] = None) -> Message:
         """调用OpenAI API"""
         try:
-            # 准备消息
-            api_messages = [msg.to_dict() for msg in messages]
-            
-            # 准备工具
-            api_tools = tools if tools else None
-            
-            # 构建参数
-            params = {
-                "model": self.model,
-                "messages": api_messages,
-            }
-            if api_tools:
-                params["tools"] = api_tools
-                params["tool_choice"] = "auto"
-            
+            params = self._build_params(messages, tools)
             # 调用API
             response = self.client.chat.completions.create(**params)
-            
-            # 解析响应
-            message = response.choices[0].message
-            
-            # 构建返回消息
-            result = Message(
-                role=message.role,
-                content=message.content or ''
+            return self._parse_response(response)
+
+        except Exception as e:
+            logger.error(f"OpenAI API调用失败: {e}")
+            return Message(
+                role='assistant',
+                content=f"抱歉，我遇到了一个错误: {str(e)}"
             )
-            
-            # 处理工具调用
-            if hasattr(message, 'tool_calls') and message.tool_calls:
-                result.tool_calls = []
-                for tool_call in message.tool_calls:
-                    # 转换成 ToolCall 对象
-                    tool_data = ToolCall(
-                        id=getattr(tool_call, 'id', None),
-                        type=getattr(tool_call, 'type', None),
-                        tool_name=getattr(tool_call.function, 'name', None) if hasattr(tool_call, 'function') else None,
-                        arguments=getattr(tool_call.function, 'arguments', None) if hasattr(tool_call, 'function') else None,
-                    )
-                    print("tool_data", tool_data)
-                    result.tool_calls.append(tool_data)
-            
+
+    async def agenerate(self, messages: List[Message], tools: Optional[List[Tool]] = None) -> Message:
+        """异步调用OpenAI API，不阻塞事件循环"""
+        try:
+            params = self._build_params(messages, tools)
+            response = await self._get_async_client().chat.completions.create(**params)
+            return self._parse_response(response)
+
+        except Exception as e:
+            logger.error(f"OpenAI API调用失败: {e}")
+            return Message(
+                role='assistant',
+                content=f"抱歉，我遇到了一个错误: {str(e)}"
+            )
+
+    async def astream_generate(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Tool]] = None,
+        on_tool_call: Optional[Callable[[int, ToolCall], None]] = None,
+    ) -> Message:
+        """
+        以流式方式调用OpenAI API
+        每个工具调用的参数JSON一旦完整就回调 on_tool_call(序号, 工具调用)，
+        调用方可以在模型继续生成时提前执行工具
+        """
+        # 按序号累积的工具调用片段
+        pending: Dict[int, Dict[str, Any]] = {}
+        dispatched = set()
+
+        def dispatch(index: int):
+            if index in dispatched:
+                return
+            dispatched.add(index)
+            if on_tool_call is not None:
+                on_tool_call(index, self._build_tool_call(pending[index]))
+
+        try:
+            params = self._build_params(messages, tools)
+            params["stream"] = True
+            # 流式模式下只有请求了才会在最后一个片段中返回token用量
+            params["stream_options"] = {"include_usage": True}
+            stream = await self._get_async_client().chat.completions.create(**params)
+            role = 'assistant'
+            content_parts = []
+            usage = None
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = self._parse_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if getattr(delta, 'role', None):
+                    role = delta.role
+                if getattr(delta, 'content', None):
+                    content_parts.append(delta.content)
+                for tool_delta in getattr(delta, 'tool_calls', None) or []:
+                    index = tool_delta.index
+                    # 出现新的工具调用时，之前的调用都已生成完毕
+                    for previous in list(pending):
+                        if previous < index:
+                            dispatch(previous)
+                    entry = pending.setdefault(index, {'id': None, 'type': None, 'name': '', 'arguments': ''})
+                    if tool_delta.id:
+                        entry['id'] = tool_delta.id
+                    if tool_delta.type:
+                        entry['type'] = tool_delta.type
+                    function = getattr(tool_delta, 'function', None)
+                    if function is not None:
+                        if function.name:
+                            entry['name'] += function.name
+                        if function.arguments:
+                            entry['arguments'] += function.arguments
+                            if index not in dispatched and self._is_complete_json(entry['arguments']):
+                                dispatch(index)
+            for index in sorted(pending):
+                dispatch(index)
+
+            result = Message(role=role, content=''.join(content_parts))
+            result.usage = usage
+            result.tool_calls = [self._build_tool_call(pending[index]) for index in sorted(pending)]
             return result
-            
+
         except Exception as e:
             logger.error(f"OpenAI API调用失败: {e}")
             return Message(
                 role='assistant',
                 content=f"抱歉，我遇到了一个错误: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    def _build_tool_call(entry: Dict[str, Any]) -> ToolCall:
+        return ToolCall(
+            id=entry['id'],
+            type=entry['type'] or 'function',
+            tool_name=entry['name'],
+            arguments=entry['arguments'],
+        )
+
+    @staticmethod
+    def _is_complete_json(arguments: str) -> bool:
+        """判断参数JSON是否已经完整（对象只能以 } 结尾，避免每个片段都尝试解析）"""
+        if not arguments.rstrip().endswith('}'):
+            return False
+        try:
+            json.loads(arguments)
+            return True
+        except ValueError:
+            return False
+
+
+# 进程内共享的LLM客户端，按 (api_key, model, base_url) 复用连接池
+_shared_llms: Dict[Tuple[str, str, Optional[str]], OpenAILLM] = {}
+_shared_llms_lock = threading.Lock()
+
+
+def get_shared_llm(api_key: str, model: str = "gpt-3.5-turbo", base_url: Optional[str] = None) -> OpenAILLM:
+    """获取共享的LLM实例"""
+    key = (api_key, model, base_url)
+    llm = _shared_llms.get(key)
+    if llm is None:
+        with _shared_llms_lock:
+            llm = _shared_llms.get(key)
+            if llm is None:
+                llm = _shared_llms[key] = OpenAILLM(api_key, model, base_url)
+    return llm
@@ -19,6 +19,11 @@ class ToolCall:
             "function": {"name": self.tool_name, "arguments": self.arguments},
         }
 
+    @classmethod
+    def from_dict(cls, d):
+        function = d.get("function") or {}
+        return cls(d.get("id"), d.get("type", "function"), function.get("name"), function.get("arguments"))
+
 
 class Tool(TypedDict, total=False):
     tool_name: Required[str]
@@ -38,9 +43,23 @@ class Message:
 
     name: Optional[str] = None
 
+    # LLM返回的token用量，不发送给API
+    usage: Optional[Dict[str, int]] = field(default=None, repr=False, compare=False)
+
 
     def to_dict(self):
         d = asdict(self)
         # 修复tool_calls的序列化
         d["tool_calls"] = [tc.to_dict() for tc in self.tool_calls]
+        d.pop("usage", None)
         return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Message":
+        return cls(
+            role=d["role"],
+            content=d.get("content") or "",
+            tool_calls=[ToolCall.from_dict(tc) for tc in d.get("tool_calls") or []],
+            tool_call_id=d.get("tool_call_id"),
+            name=d.get("name"),
+        )
@@ -1,31 +1,162 @@
-from sentence_transformers import SentenceTransformer
-import faiss
+import os
+import platform
 import numpy as np
+import threading
 from .text_chunker import TextFileChunker
 
+# 支持的embedding后端：PyTorch、ONNX Runtime、ONNX Runtime + int8动态量化
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+# 量化模型的导出目录
+ONNX_CACHE_DIR = os.environ.get(
+    'MINI_AGENT_ONNX_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'mini_agent', 'onnx')
+)
+
+# 进程内共享的embedding模型，避免每个VectorDB重复加载
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name='all-MiniLM-L6-v2', backend='torch', num_threads=None):
+    """
+    获取共享的SentenceTransformer模型
+    :param backend: torch、onnx 或 onnx-int8
+    :param num_threads: 推理线程数，None表示使用默认值
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"不支持的embedding后端: {backend}，可选: {', '.join(EMBEDDING_BACKENDS)}")
+    key = (model_name, backend, num_threads)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = _load_model(model_name, backend, num_threads)
+    return model
+
+
+def _load_model(model_name, backend, num_threads):
+    # sentence_transformers会导入torch，较慢，首次使用时才导入
+    from sentence_transformers import SentenceTransformer
+    if backend == 'torch':
+        if num_threads:
+            import torch
+            # 进程级设置，影响所有torch模型
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(model_name)
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError("ONNX后端需要安装 sentence-transformers[onnx]") from e
+    session_options = ort.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+    model_kwargs = {'provider': 'CPUExecutionProvider', 'session_options': session_options}
+    if backend == 'onnx':
+        return SentenceTransformer(model_name, backend='onnx', model_kwargs=model_kwargs)
+    return _load_quantized_model(model_name, model_kwargs)
+
+
+def _load_quantized_model(model_name, model_kwargs):
+    """首次使用时导出int8动态量化的ONNX模型到本地缓存，之后直接加载"""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    quantization_config = _quantization_config()
+    file_name = f"onnx/model_qint8_{quantization_config}.onnx"
+    local_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '__'))
+    if not os.path.exists(os.path.join(local_dir, file_name)):
+        model = SentenceTransformer(model_name, backend='onnx', model_kwargs=model_kwargs)
+        model.save_pretrained(local_dir)
+        export_dynamic_quantized_onnx_model(model, quantization_config=quantization_config,
+                                            model_name_or_path=local_dir)
+    return SentenceTransformer(local_dir, backend='onnx', model_kwargs={**model_kwargs, 'file_name': file_name})
+
+
+def _quantization_config():
+    """根据CPU指令集选择量化配置"""
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'arm64'
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            flags = f.read()
+    except OSError:
+        flags = ''
+    if 'avx512_vnni' in flags:
+        return 'avx512_vnni'
+    if 'avx512' in flags:
+        return 'avx512'
+    return 'avx2'
+
+
+def check_parity(reference, candidate, texts, min_cosine=0.99):
+    """
+    对比两个模型对同一批文本的embedding（逐条余弦相似度）
+    :param reference: 基准模型，通常是PyTorch后端
+    :param candidate: 待检查的模型
+    :param min_cosine: 最低余弦相似度，低于该值时抛出ValueError
+    :return: {'min_cosine': ..., 'mean_cosine': ...}
+    """
+    expected = np.asarray(reference.encode(texts, show_progress_bar=False), dtype='float32')
+    actual = np.asarray(candidate.encode(texts, show_progress_bar=False), dtype='float32')
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosine = np.sum(expected * actual, axis=1) / np.maximum(norms, 1e-12)
+    result = {'min_cosine': float(cosine.min()), 'mean_cosine': float(cosine.mean())}
+    if result['min_cosine'] < min_cosine:
+        raise ValueError(f"embedding与基准不一致: 最低余弦相似度 {result['min_cosine']:.4f} < {min_cosine}")
+    return result
+
+
 class VectorDB:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        """初始化向量数据库"""
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name='all-MiniLM-L6-v2', model=None, backend='torch', num_threads=None,
+                 batch_size=32):
+        """
+        初始化向量数据库
+        :param model: 自定义embedding模型（需提供encode方法），默认使用共享的SentenceTransformer
+        :param backend: embedding后端，torch、onnx 或 onnx-int8
+        :param num_threads: 推理线程数
+        :param batch_size: 编码批大小（encode内部按文本长度排序分批，减少padding）
+        """
+        self.model = model if model is not None else get_embedding_model(model_name, backend, num_threads)
+        self.batch_size = batch_size
         self.index = None
         self.documents = []
     
     def embed(self, texts):
         """将文本转换为向量"""
-        return self.model.encode(texts, show_progress_bar=False)
+        return np.asarray(
+            self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False), dtype='float32'
+        )
     
     def create_db(self, texts):
         """构建向量数据库"""
-        self.documents = texts
-        embeddings = self.embed(texts)
-        dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dim)
-        self.index.add(np.array(embeddings))
-    
-    def query(self, question, top_k=3):
-        """查询最相关文档"""
+        self.index = None
+        self.documents = []
+        self.add(texts)
+
+    def add(self, texts, embeddings=None):
+        """
+        增量添加文档，不重建索引
+        :param embeddings: 已计算好的向量，默认对texts重新编码
+        """
+        if not texts:
+            return
+        if embeddings is None:
+            embeddings = self.embed(texts)
+        embeddings = np.asarray(embeddings, dtype='float32')
+        if self.index is None:
+            import faiss
+            self.index = faiss.IndexFlatL2(embeddings.shape[1])
+        self.index.add(embeddings)
+        self.documents.extend(texts)
+
+    def search(self, question, top_k=3):
+        """查询最相关文档，返回 [(文档下标, L2距离)]，按距离升序"""
         if self.index is None:
             raise ValueError("数据库尚未创建，请先调用create_db()方法")
         q_embedding = self.embed([question])
-        D, I = self.index.search(np.array(q_embedding), top_k)
-        return [self.documents[i] for i in I[0]] 
\ No newline at end of file
+        D, I = self.index.search(q_embedding, min(top_k, len(self.documents)))
+        # 文档数不足top_k时faiss以-1补位
+        return [(int(i), float(d)) for d, i in zip(D[0], I[0]) if i >= 0]
+    
+    def query(self, question, top_k=3):
+        """查询最相关文档"""
+        return [self.documents[i] for i, _ in self.search(question, top_k)]
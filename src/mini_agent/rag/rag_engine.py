@@ -1,6 +1,6 @@
 from .text_chunker import TextFileChunker
 from .embed import VectorDB
-from mini_agent.llm.llm import OpenAILLM
+from mini_agent.llm.llm import get_shared_llm
 from mini_agent.llm.utils import Message
 from mini_agent.config.agent_config import AgentConfig
 from typing import Optional
@@ -16,7 +16,10 @@ def rag_answer(document_path: str, question: str, config: Optional[AgentConfig]
     chunker = TextFileChunker(file_path=document_path)
     chunks = chunker.get_chunks()
     # 2. 建立向量数据库
-    db = VectorDB()
+    if config is not None:
+        db = VectorDB(backend=config.embedding_backend, num_threads=config.embedding_threads)
+    else:
+        db = VectorDB()
     db.create_db(chunks)
     # 3. 检索相关内容
     results = db.query(question, top_k=3)
@@ -29,7 +32,7 @@ def rag_answer(document_path: str, question: str, config: Optional[AgentConfig]
         prompt += "-------------\n"
     # 5. 用 LLM 生成回答
     if config is not None:
-        llm = OpenAILLM(config.openai_api_key, config.model, config.base_url)
+        llm = get_shared_llm(config.openai_api_key, config.model, config.base_url)
         response = llm.generate([
             Message(role="system", content="你是一个有用的助手。"),
             Message(role="user", content=prompt)
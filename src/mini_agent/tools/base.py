@@ -1,9 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import Dict, FrozenSet, List, Any, Optional
 from mini_agent.llm.utils import Tool
+from mini_agent.tools.cache import CacheHint
 
 class ToolBase(ABC):
     """工具基类"""
+
+    # 是否为阻塞型（同步IO）工具，为True时执行器会在线程池中调用 call_tool_sync
+    blocking: bool = False
+    # 幂等工具名集合，这些工具的结果可以被缓存
+    idempotent_tools: FrozenSet[str] = frozenset()
     
     @abstractmethod
     async def cleanup(self):
@@ -18,4 +24,14 @@ class ToolBase(ABC):
     @abstractmethod
     async def call_tool(self, tool_name: str, tool_args: dict) -> str:
         """调用工具"""
-        pass
\ No newline at end of file
+        pass
+
+    def call_tool_sync(self, tool_name: str, tool_args: dict) -> str:
+        """同步调用工具，阻塞型工具需要实现"""
+        raise NotImplementedError(f"{type(self).__name__} 不支持同步调用")
+
+    def cache_hint(self, tool_name: str, tool_args: dict) -> Optional[CacheHint]:
+        """返回工具结果的缓存提示，None表示不可缓存"""
+        if tool_name in self.idempotent_tools:
+            return CacheHint()
+        return None
@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import logging
+
+from mini_agent.config.agent_config import AgentConfig
+from mini_agent.llm.utils import ToolCall
+from mini_agent.tools.base import ToolBase
+from mini_agent.tools.cache import ToolResultCache
+from mini_agent.tools.tool_manager import ToolManager
+from mini_agent.tracing import current_span, current_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class ToolExecutor:
+    """工具执行器：限制并发、超时控制，并将阻塞型工具放到线程池执行"""
+
+    def __init__(
+        self,
+        tool_manager: ToolManager,
+        max_concurrency: int = 8,
+        per_tool_concurrency: Optional[Dict[str, int]] = None,
+        default_per_tool_concurrency: Optional[int] = None,
+        timeout: Optional[float] = 60.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        """
+        :param tool_manager: 工具管理器
+        :param max_concurrency: 全局最大并发工具调用数
+        :param per_tool_concurrency: 单个工具的并发上限，工具名 -> 上限
+        :param default_per_tool_concurrency: 未单独配置的工具的并发上限，None表示不限制
+        :param timeout: 单次工具调用的超时秒数（含排队时间），None表示不限制
+        :param tool_timeouts: 单个工具的超时秒数，工具名 -> 秒数
+        :param max_workers: 阻塞型工具线程池大小
+        :param cache: 幂等工具的结果缓存，None表示不缓存
+        """
+        self.tool_manager = tool_manager
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_tool_concurrency = per_tool_concurrency or {}
+        self.default_per_tool_concurrency = default_per_tool_concurrency
+        self.timeout = timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.max_workers = max_workers
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self.cache = cache
+
+    @classmethod
+    def from_config(cls, tool_manager: ToolManager, config: AgentConfig) -> 'ToolExecutor':
+        """根据Agent配置创建执行器"""
+        cache = ToolResultCache(max_entries=config.tool_cache_size) if config.tool_cache_size else None
+        return cls(
+            tool_manager,
+            max_concurrency=config.max_tool_concurrency,
+            timeout=config.tool_timeout,
+            cache=cache,
+        )
+
+    def _tool_semaphore(self, tool_name: str) -> Optional[asyncio.Semaphore]:
+        """获取单个工具的并发信号量"""
+        limit = self.per_tool_concurrency.get(tool_name, self.default_per_tool_concurrency)
+        if not limit:
+            return None
+        semaphore = self._tool_semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = self._tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='mini-agent-tool'
+            )
+        return self._thread_pool
+
+    async def _invoke(self, tool_impl: ToolBase, tool_name: str, tool_args: dict) -> str:
+        """调用工具，阻塞型工具在线程池中执行"""
+        if tool_impl.blocking:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_thread_pool(),
+                functools.partial(tool_impl.call_tool_sync, tool_name, tool_args),
+            )
+        return await tool_impl.call_tool(tool_name=tool_name, tool_args=tool_args)
+
+    async def _cache_hint(self, tool_impl: ToolBase, tool_name: str, tool_args: dict):
+        """获取缓存提示，阻塞型工具的新鲜度检查（如stat文件）同样在线程池中执行"""
+        if tool_impl.blocking:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_thread_pool(),
+                functools.partial(tool_impl.cache_hint, tool_name, tool_args),
+            )
+        return tool_impl.cache_hint(tool_name, tool_args)
+
+    async def _call_limited(self, tool_impl: ToolBase, original_name: str, tool_name: str, tool_args: dict) -> str:
+        """在全局和单工具并发限制下调用已解析的工具"""
+        tool_semaphore = self._tool_semaphore(tool_name)
+        async with self.tool_manager.lease(tool_impl), self._global_semaphore:
+            if tool_semaphore is None:
+                return await self._invoke(tool_impl, original_name, tool_args)
+            async with tool_semaphore:
+                return await self._invoke(tool_impl, original_name, tool_args)
+
+    async def _call_cached(self, tool_name: str, tool_args: dict) -> str:
+        """幂等工具先查缓存，未命中再调用；工具只解析一次，热更新时查缓存和调用使用同一个实现"""
+        tool_impl, original_name = await self.tool_manager.resolve_tool(tool_name)
+        if self.cache is None:
+            return await self._call_limited(tool_impl, original_name, tool_name, tool_args)
+        hint = await self._cache_hint(tool_impl, original_name, tool_args)
+        if hint is None:
+            return await self._call_limited(tool_impl, original_name, tool_name, tool_args)
+        try:
+            key = (id(tool_impl), original_name,
+                   json.dumps(tool_args, sort_keys=True, ensure_ascii=False), hint.freshness)
+            hash(key)
+        except TypeError:
+            return await self._call_limited(tool_impl, original_name, tool_name, tool_args)
+        cached = self.cache.get(key)
+        if cached is not None:
+            current_span().set(cache_hit=True)
+            return cached
+        result = await self._call_limited(tool_impl, original_name, tool_name, tool_args)
+        result = result if isinstance(result, str) else str(result)
+        self.cache.put(key, result, hint.ttl)
+        return result
+
+    async def call(self, tool_name: str, tool_args: dict) -> str:
+        """调用单个工具，超时或失败时抛出异常"""
+        timeout = self.tool_timeouts.get(tool_name, self.timeout)
+        async with asyncio.timeout(timeout):
+            return await self._call_cached(tool_name, tool_args)
+
+    async def run_tool_call(self, tool_call: ToolCall) -> str:
+        """执行一个工具调用，失败时返回错误信息而不是抛出异常"""
+        with current_tracer().span('tool.call', 'tool', tool=tool_call.tool_name) as span:
+            result = await self._run_tool_call(tool_call)
+            if span.recording:
+                span.set(args_bytes=len(tool_call.arguments or '') if isinstance(tool_call.arguments, str) else None,
+                         result_bytes=len(result))
+            return result
+
+    async def _run_tool_call(self, tool_call: ToolCall) -> str:
+        tool_name = tool_call.tool_name
+        try:
+            arguments = tool_call.arguments
+            if isinstance(arguments, str):
+                arguments = json.loads(arguments) if arguments.strip() else {}
+            result = await self.call(tool_name, arguments or {})
+            return result if isinstance(result, str) else str(result)
+        except TimeoutError:
+            timeout = self.tool_timeouts.get(tool_name, self.timeout)
+            logger.warning(f"工具调用超时: {tool_name} ({timeout}秒)")
+            return f"工具 {tool_name} 执行超时（{timeout}秒）"
+        except Exception as e:
+            logger.warning(f"工具调用失败: {tool_name}, 错误: {e}")
+            return f"工具 {tool_name} 执行失败: {str(e)}"
+
+    async def execute(self, tool_calls: List[ToolCall]) -> List[str]:
+        """并发执行一组工具调用，结果按原顺序返回"""
+        return await asyncio.gather(*[
+            self.run_tool_call(tool_call) for tool_call in tool_calls
+        ])
+
+    def submit(self, tool_call: ToolCall) -> "asyncio.Task[str]":
+        """立即开始执行一个工具调用，返回任务"""
+        return asyncio.ensure_future(self.run_tool_call(tool_call))
+
+    def close(self):
+        """关闭线程池"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
@@ -1,12 +1,41 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+import codecs
+import fnmatch
+import json
+import mmap
+import os
+import re
 from .base import ToolBase
+from .cache import CacheHint
+from .search_index import TrigramIndex, is_binary, iter_files, BINARY_CHECK_SIZE
 from mini_agent.llm.utils import Tool
 
+# 超过该大小的文件使用mmap读取，避免整体载入内存
+MMAP_THRESHOLD = 1024 * 1024
+# 统计行数时每次读取的块大小
+COUNT_CHUNK_SIZE = 1024 * 1024
+# search_content 结果中单行的最大长度
+MAX_MATCH_LINE_LENGTH = 300
+
 class FileSystemTool(ToolBase):
     """文件系统工具类"""
-    
-    def __init__(self):
-        pass
+
+    blocking = True
+    idempotent_tools = frozenset({'read_file', 'list_files', 'file_info'})
+
+    def __init__(self, max_output_bytes: int = 256 * 1024, root: Optional[str] = None,
+                 use_index: bool = False, index_path: Optional[str] = None, max_results: int = 200):
+        """
+        :param max_output_bytes: read_file单次返回内容的字节上限，超出部分截断
+        :param root: 工作区根目录，搜索工具默认在此目录下查找
+        :param use_index: 是否为工作区建立持久化三元组索引，加速search_content
+        :param index_path: 索引文件路径
+        :param max_results: find_files/search_content 默认的最大结果数
+        """
+        self.max_output_bytes = max_output_bytes
+        self.root = root or '.'
+        self.max_results = max_results
+        self.index = TrigramIndex(self.root, index_path) if use_index else None
 
     async def cleanup(self) -> None:
         pass
@@ -16,7 +45,37 @@ class FileSystemTool(ToolBase):
         return [
             Tool(
                 tool_name='read_file',
-                description='Read the content of a file',
+                description=(
+                    'Read the content of a file. Large files are truncated; '
+                    'use offset/limit to page through them and file_info to get their size first'
+                ),
+                parameters={
+                    'type': 'object',
+                    'properties': {
+                        'path': {
+                            'type': 'string',
+                            'description': 'The relative path of the file',
+                        },
+                        'offset': {
+                            'type': 'integer',
+                            'description': 'Number of lines (or bytes) to skip from the start of the file',
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Maximum number of lines (or bytes) to return',
+                        },
+                        'unit': {
+                            'type': 'string',
+                            'enum': ['line', 'byte'],
+                            'description': 'Unit of offset and limit, defaults to line',
+                        },
+                    },
+                    'required': ['path'],
+                    'additionalProperties': False
+                }),
+            Tool(
+                tool_name='file_info',
+                description='Get the size in bytes and the number of lines of a file',
                 parameters={
                     'type': 'object',
                     'properties': {
@@ -28,6 +87,62 @@ class FileSystemTool(ToolBase):
                     'required': ['path'],
                     'additionalProperties': False
                 }),
+            Tool(
+                tool_name='find_files',
+                description='Recursively find files whose name (or relative path, if the pattern contains /) matches a glob pattern',
+                parameters={
+                    'type': 'object',
+                    'properties': {
+                        'pattern': {
+                            'type': 'string',
+                            'description': 'Glob pattern, e.g. *.py or src/*/test_*.py',
+                        },
+                        'directory': {
+                            'type': 'string',
+                            'description': 'The directory to search in, defaults to the workspace root',
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Maximum number of results',
+                        },
+                    },
+                    'required': ['pattern'],
+                    'additionalProperties': False
+                }),
+            Tool(
+                tool_name='search_content',
+                description='Recursively search file contents and return matching lines as path:line_number: line',
+                parameters={
+                    'type': 'object',
+                    'properties': {
+                        'pattern': {
+                            'type': 'string',
+                            'description': 'Text or regular expression to search for',
+                        },
+                        'directory': {
+                            'type': 'string',
+                            'description': 'The directory to search in, defaults to the workspace root',
+                        },
+                        'regex': {
+                            'type': 'boolean',
+                            'description': 'Treat pattern as a regular expression, defaults to false',
+                        },
+                        'ignore_case': {
+                            'type': 'boolean',
+                            'description': 'Case insensitive search, defaults to false',
+                        },
+                        'file_pattern': {
+                            'type': 'string',
+                            'description': 'Only search files whose name matches this glob, e.g. *.py',
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Maximum number of matching lines',
+                        },
+                    },
+                    'required': ['pattern'],
+                    'additionalProperties': False
+                }),
             Tool(
                 tool_name='list_files',
                 description='List all files in a directory',
@@ -43,21 +158,198 @@ class FileSystemTool(ToolBase):
                     'additionalProperties': False
                 })
         ]
-    
+
     async def call_tool(self, tool_name: str, tool_args: dict) -> str:
+        return self.call_tool_sync(tool_name, tool_args)
+
+    def call_tool_sync(self, tool_name: str, tool_args: dict) -> str:
         if tool_name == 'read_file':
-            return self.read_file(tool_args['path'])
+            return self.read_file(
+                tool_args['path'],
+                offset=tool_args.get('offset') or 0,
+                limit=tool_args.get('limit'),
+                unit=tool_args.get('unit') or 'line',
+            )
+        elif tool_name == 'file_info':
+            return self.file_info(tool_args['path'])
         elif tool_name == 'list_files':
             return self.list_files(tool_args['directory'])
+        elif tool_name == 'find_files':
+            return self.find_files(
+                tool_args['pattern'],
+                directory=tool_args.get('directory'),
+                limit=tool_args.get('limit'),
+            )
+        elif tool_name == 'search_content':
+            return self.search_content(
+                tool_args['pattern'],
+                directory=tool_args.get('directory'),
+                regex=bool(tool_args.get('regex')),
+                ignore_case=bool(tool_args.get('ignore_case')),
+                file_pattern=tool_args.get('file_pattern'),
+                limit=tool_args.get('limit'),
+            )
         else:
             raise ValueError(f"Unknown tool: {tool_name}")
 
+    def cache_hint(self, tool_name: str, tool_args: dict) -> Optional[CacheHint]:
+        """以文件/目录的mtime、大小和inode作为新鲜度标识"""
+        if tool_name not in self.idempotent_tools:
+            return None
+        path = tool_args.get('directory') if tool_name == 'list_files' else tool_args.get('path')
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return CacheHint(freshness=(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
     def list_files(self, directory: str) -> str:
         """列出指定目录下的所有文件，每行一个文件名"""
-        import os
         return '\n'.join(os.listdir(directory))
 
-    def read_file(self, file_path: str) -> str:
-        """读取指定文件的内容"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
\ No newline at end of file
+    def read_file(self, file_path: str, offset: int = 0, limit: Optional[int] = None, unit: str = 'line') -> str:
+        """
+        读取指定文件的内容，支持按行或按字节分页
+        :param offset: 跳过的行数（或字节数）
+        :param limit: 最多返回的行数（或字节数），None表示读到文件末尾
+        :param unit: offset/limit 的单位，line 或 byte
+        """
+        if unit not in ('line', 'byte'):
+            raise ValueError(f"unit必须是line或byte: {unit}")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset和limit不能为负数")
+        with open(file_path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return ''
+            if size > MMAP_THRESHOLD:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self._read_range(data, size, offset, limit, unit)
+            return self._read_range(file.read(), size, offset, limit, unit)
+
+    def _read_range(self, data, size: int, offset: int, limit: Optional[int], unit: str) -> str:
+        """从bytes或mmap中截取指定范围并解码"""
+        if unit == 'byte':
+            start = min(offset, size)
+            end = size if limit is None else min(size, start + limit)
+        else:
+            start = self._skip_lines(data, 0, offset, size)
+            end = size if limit is None else self._skip_lines(data, start, limit, size)
+        # 只解码上限以内的内容
+        capped_end = min(end, start + self.max_output_bytes)
+        # 增量解码器会丢弃截断处不完整的多字节字符
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        content = decoder.decode(data[start:capped_end], final=capped_end == end)
+        if capped_end < end:
+            content += (
+                f"\n...[内容已截断: 返回了第 {start}-{capped_end} 字节，"
+                f"该范围共 {end - start} 字节，文件共 {size} 字节，请使用 offset/limit 分页读取]"
+            )
+        return content
+
+    @staticmethod
+    def _skip_lines(data, start: int, count: int, size: int) -> int:
+        """从start开始跳过count行，返回下一行的起始位置"""
+        position = start
+        for _ in range(count):
+            newline = data.find(b'\n', position)
+            if newline == -1:
+                return size
+            position = newline + 1
+        return position
+
+    def file_info(self, file_path: str) -> str:
+        """返回文件大小、行数和修改时间（JSON）"""
+        stat = os.stat(file_path)
+        lines = 0
+        last_byte = b'\n'
+        with open(file_path, 'rb') as file:
+            while True:
+                chunk = file.read(COUNT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines += chunk.count(b'\n')
+                last_byte = chunk[-1:]
+        if last_byte != b'\n':
+            # 最后一行没有换行符
+            lines += 1
+        return json.dumps({
+            'path': file_path,
+            'size': stat.st_size,
+            'lines': lines,
+            'mtime': stat.st_mtime,
+        }, ensure_ascii=False)
+
+    def find_files(self, pattern: str, directory: Optional[str] = None, limit: Optional[int] = None) -> str:
+        """递归查找匹配glob的文件，每行一个相对路径"""
+        directory = directory or self.root
+        limit = limit or self.max_results
+        match_path = '/' in pattern
+        results = []
+        truncated = False
+        for entry in iter_files(directory):
+            relative = os.path.relpath(entry.path, directory).replace(os.sep, '/')
+            if fnmatch.fnmatch(relative if match_path else entry.name, pattern):
+                if len(results) >= limit:
+                    truncated = True
+                    break
+                results.append(relative)
+        if truncated:
+            results.append(f"...[结果已截断，仅显示前 {limit} 个]")
+        return '\n'.join(results)
+
+    def search_content(self, pattern: str, directory: Optional[str] = None, regex: bool = False,
+                       ignore_case: bool = False, file_pattern: Optional[str] = None,
+                       limit: Optional[int] = None) -> str:
+        """递归搜索文件内容，逐行流式匹配，返回 路径:行号: 内容"""
+        directory = directory or self.root
+        limit = limit or self.max_results
+        flags = re.IGNORECASE if ignore_case else 0
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+        candidates = self._index_candidates(pattern, directory, regex, ignore_case)
+        if candidates is None:
+            paths = (entry.path for entry in iter_files(directory))
+        else:
+            # 只扫描索引筛选出的、位于目标目录下的文件
+            prefix = os.path.join(os.path.abspath(directory), '')
+            paths = sorted(path for path in candidates if path.startswith(prefix))
+        results = []
+        for path in paths:
+            if file_pattern and not fnmatch.fnmatch(os.path.basename(path), file_pattern):
+                continue
+            relative = os.path.relpath(path, directory).replace(os.sep, '/')
+            for line_no, line in self._search_file(path, matcher):
+                if len(results) >= limit:
+                    results.append(f"...[结果已截断，仅显示前 {limit} 条]")
+                    return '\n'.join(results)
+                results.append(f"{relative}:{line_no}: {line}")
+        return '\n'.join(results)
+
+    def _index_candidates(self, pattern: str, directory: str, regex: bool, ignore_case: bool = False) -> Optional[set]:
+        """使用索引筛选候选文件，无法使用索引时返回None"""
+        if self.index is None or (regex and re.escape(pattern) != pattern):
+            return None
+        # 索引只对ASCII字节做大小写折叠，非ASCII内容忽略大小写时不能用索引筛选
+        if ignore_case and not pattern.isascii():
+            return None
+        directory = os.path.abspath(directory)
+        if os.path.commonpath([directory, self.index.root]) != self.index.root:
+            return None
+        return self.index.candidates(pattern)
+
+    @staticmethod
+    def _search_file(path: str, matcher):
+        """逐行匹配单个文件，跳过二进制文件"""
+        try:
+            with open(path, 'rb') as file:
+                if is_binary(file.read(BINARY_CHECK_SIZE)):
+                    return
+                file.seek(0)
+                for line_no, raw in enumerate(file, start=1):
+                    line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+                    if matcher.search(line):
+                        if len(line) > MAX_MATCH_LINE_LENGTH:
+                            line = line[:MAX_MATCH_LINE_LENGTH] + '...'
+                        yield line_no, line
+        except OSError:
+            return
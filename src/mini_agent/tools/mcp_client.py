@@ -1,24 +1,197 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
 from .base import ToolBase
+from .cache import CacheHint
 from mini_agent.llm.utils import Tool
-from fastmcp import Client
 
-class McpClient(ToolBase):
-    """MCP客户端工具类"""
+logger = logging.getLogger(__name__)
+
+
+class _McpSession:
+    """一个长连接的MCP会话"""
 
     def __init__(self, config: dict):
-        self.client = None
+        # fastmcp导入较慢，创建会话时才导入
+        from fastmcp import Client
         self.client = Client(config)
+        self.inflight = 0
+        self.last_used = 0.0
+        self._connect_lock = asyncio.Lock()
+
+    def is_connected(self) -> bool:
+        return self.client.is_connected()
+
+    async def connect(self):
+        """建立连接（已连接则直接返回）"""
+        async with self._connect_lock:
+            if not self.client.is_connected():
+                await self.client.__aenter__()
+                self.last_used = time.monotonic()
+
+    async def close(self):
+        """关闭连接"""
+        async with self._connect_lock:
+            if self.client.is_connected():
+                try:
+                    await self.client.__aexit__(None, None, None)
+                except Exception as e:
+                    logger.warning(f"关闭MCP会话失败: {e}")
+
+    async def reconnect(self):
+        """断开并重新建立连接"""
+        await self.close()
+        await self.connect()
+
+
+class McpClient(ToolBase):
+    """
+    MCP客户端工具类，为配置的服务器维护长连接会话池。
+    会话和锁绑定创建它们的事件循环，因此每个事件循环一个会话池；asyncio.run结束时该循环的会话随之关闭
+    """
+
+    def __init__(self, config: dict, pool_size: int = 2, max_inflight_per_session: int = 8,
+                 health_check_interval: float = 30.0, idempotent_tools: Optional[Iterable[str]] = None,
+                 cache_ttl: Optional[float] = 60.0):
+        """
+        :param config: MCP配置
+        :param pool_size: 会话池最大会话数
+        :param max_inflight_per_session: 单个会话上并发请求数达到该值时才扩容新会话
+        :param health_check_interval: 会话空闲超过该秒数后，使用前先ping检查
+        :param idempotent_tools: 结果可缓存的工具名
+        :param cache_ttl: 可缓存工具结果的有效期（秒）
+        """
+        self.config = config
+        self.pool_size = max(1, pool_size)
+        self.max_inflight_per_session = max(1, max_inflight_per_session)
+        self.health_check_interval = health_check_interval
+        # id(loop) -> (loop, 会话列表, 会话池锁, 守护任务)
+        self._pools: Dict[int, Tuple[asyncio.AbstractEventLoop, List[_McpSession], asyncio.Lock, asyncio.Task]] = {}
+        self.idempotent_tools = frozenset(idempotent_tools or ())
+        self.cache_ttl = cache_ttl
+
+    @property
+    def _sessions(self) -> List[_McpSession]:
+        """当前事件循环的会话"""
+        entry = self._pools.get(id(asyncio.get_running_loop()))
+        return entry[1] if entry is not None else []
+
+    def _pool(self) -> Tuple[List[_McpSession], asyncio.Lock]:
+        """当前事件循环的会话池，事件循环已关闭的会话池直接丢弃"""
+        loop = asyncio.get_running_loop()
+        for key, entry in list(self._pools.items()):
+            if entry[0].is_closed():
+                del self._pools[key]
+        entry = self._pools.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            sessions: List[_McpSession] = []
+            guard = loop.create_task(self._close_on_shutdown(loop, sessions))
+            entry = (loop, sessions, asyncio.Lock(), guard)
+            self._pools[id(loop)] = entry
+        return entry[1], entry[2]
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop, sessions: List[_McpSession]):
+        """一直挂起，事件循环关闭前取消剩余任务时关闭该循环的会话"""
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            entry = self._pools.get(id(loop))
+            if entry is not None and entry[1] is sessions:
+                del self._pools[id(loop)]
+            await self._close_sessions(sessions)
+            raise
+
+    @staticmethod
+    async def _close_sessions(sessions: List[_McpSession]):
+        closing, sessions[:] = list(sessions), []
+        for session in closing:
+            await session.close()
 
     async def cleanup(self) -> None:
-        pass
+        # 关闭当前事件循环的所有会话（stdio服务器会随之退出）
+        entry = self._pools.pop(id(asyncio.get_running_loop()), None)
+        if entry is not None:
+            _, sessions, _, guard = entry
+            guard.cancel()
+            await self._close_sessions(sessions)
+
+    def cache_hint(self, tool_name: str, tool_args: dict) -> Optional[CacheHint]:
+        """远程工具无法感知数据变化，使用TTL控制缓存有效期"""
+        if tool_name not in self.idempotent_tools:
+            return None
+        return CacheHint(ttl=self.cache_ttl)
+
+    def _select_session(self) -> Optional[_McpSession]:
+        """选择负载最低的会话，所有会话都繁忙且未达上限时返回None以扩容"""
+        sessions = self._sessions
+        session = min(sessions, key=lambda s: s.inflight, default=None)
+        if session is None:
+            return None
+        if session.inflight >= self.max_inflight_per_session and len(sessions) < self.pool_size:
+            return None
+        return session
+
+    async def _acquire(self) -> _McpSession:
+        """获取一个可用会话"""
+        sessions, pool_lock = self._pool()
+        async with pool_lock:
+            session = self._select_session()
+            if session is None:
+                session = _McpSession(self.config)
+                sessions.append(session)
+                logger.info(f"新建MCP会话，当前会话数: {len(sessions)}")
+            session.inflight += 1
+        try:
+            await self._ensure_healthy(session)
+        except Exception:
+            session.inflight -= 1
+            raise
+        return session
+
+    def _release(self, session: _McpSession):
+        session.inflight -= 1
+        session.last_used = time.monotonic()
+
+    async def _ensure_healthy(self, session: _McpSession):
+        """确保会话可用：未连接则连接，空闲过久则ping，失败时自动重连"""
+        if not session.is_connected():
+            await session.connect()
+            return
+        if time.monotonic() - session.last_used < self.health_check_interval:
+            return
+        try:
+            await session.client.ping()
+        except Exception as e:
+            logger.warning(f"MCP会话健康检查失败，重新连接: {e}")
+            await session.reconnect()
+
+    async def _request(self, method: str, *args, retry: bool = False):
+        """
+        在会话池上执行请求，连接断开时重连
+        :param retry: 重连后是否重发请求；服务器可能已经执行了请求只是响应丢失，只有幂等请求可以重发
+        """
+        session = await self._acquire()
+        try:
+            try:
+                return await getattr(session.client, method)(*args)
+            except Exception:
+                if session.is_connected():
+                    # 连接正常，属于请求本身的错误
+                    raise
+                if not retry:
+                    logger.warning("MCP会话已断开，重新连接，请求不重发")
+                    await session.reconnect()
+                    raise
+                logger.warning("MCP会话已断开，重新连接后重试")
+                await session.reconnect()
+                return await getattr(session.client, method)(*args)
+        finally:
+            self._release(session)
 
     async def get_tools(self) -> List[Tool]:
         # 获取mcp工具列表并转换为OpenAI Tool格式
-        mcp_tools = []
-        if self.client:
-            async with self.client:
-                mcp_tools = await self.client.list_tools()
+        mcp_tools = await self._request('list_tools', retry=True)
         tools = []
         for tool in mcp_tools:
             tools.append({
@@ -30,9 +203,6 @@ class McpClient(ToolBase):
 
     async def call_tool(self, tool_name: str, tool_args: dict) -> str:
         # 调用指定工具
-        if not self.client:
-            raise RuntimeError('MCP client not connected')
-        async with self.client:
-            result = await self.client.call_tool(tool_name, tool_args)
-            return str(result)
-        
\ No newline at end of file
+        result = await self._request('call_tool', tool_name, tool_args,
+                                     retry=tool_name in self.idempotent_tools)
+        return str(result)
@@ -0,0 +1,191 @@
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from mini_agent.tools.mcp_client import McpClient
+
+logger = logging.getLogger(__name__)
+
+# 默认的MCP配置文件路径，可通过环境变量 MINI_AGENT_MCP_CONFIG 覆盖
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'mcp_config.json')
+
+
+class ToolRegistry:
+    """
+    进程内共享的MCP工具注册表
+    每个MCP服务器对应一个McpClient，所有ToolManager共用；
+    配置文件变化时按服务器增量更新，无需重启
+    """
+
+    def __init__(self, config_path: Optional[str] = None, poll_interval: Optional[float] = 2.0):
+        """
+        :param config_path: MCP配置文件路径
+        :param poll_interval: 检查配置文件变化的最小间隔（秒），None表示只在首次使用时加载
+        """
+        self.config_path = config_path or os.environ.get('MINI_AGENT_MCP_CONFIG') or DEFAULT_CONFIG_PATH
+        self.poll_interval = poll_interval
+        # 服务器名 -> (服务器配置, 客户端)
+        self._servers: Dict[str, Tuple[Dict[str, Any], McpClient]] = {}
+        # 配置变化后被替换或移除、尚未关闭的客户端
+        self._retired: List[McpClient] = []
+        # 所有被移除或替换过的客户端（它们上面的调用结束后需要关闭）
+        self._ever_retired: "weakref.WeakSet[McpClient]" = weakref.WeakSet()
+        # 客户端 -> 正在进行的调用数
+        self._in_use: Dict[Any, int] = {}
+        # 配置文件的 (mtime_ns, size)，None表示文件不存在
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._last_check: Optional[float] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 每次服务器集合变化时递增，ToolManager据此判断索引是否失效
+        self.version = 0
+
+    def servers(self) -> List[Tuple[str, McpClient]]:
+        """当前注册的 (服务器名, 客户端)，按配置顺序"""
+        self.check()
+        with self._lock:
+            return [(name, client) for name, (_, client) in self._servers.items()]
+
+    def check(self) -> bool:
+        """距上次检查超过poll_interval时检查配置文件，返回服务器集合是否有变化"""
+        now = time.monotonic()
+        if self._last_check is not None and (
+            self.poll_interval is None or now - self._last_check < self.poll_interval
+        ):
+            return False
+        return self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """配置文件有变化（或force）时重新加载，返回服务器集合是否有变化"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.config_path)
+                file_state = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                file_state = None
+            if self._loaded and not force and file_state == self._file_state:
+                return False
+            if file_state is None and not self._loaded:
+                logger.warning(f"mcp_config.json 文件不存在: {self.config_path}")
+            self._loaded = True
+            self._file_state = file_state
+            servers = {}
+            if file_state is not None:
+                try:
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        servers = (json.load(f) or {}).get('mcpServers', {})
+                except (OSError, ValueError) as e:
+                    # 配置写到一半或格式错误时保留当前服务器
+                    logger.error(f"读取MCP配置失败，保留当前配置: {e}")
+                    return False
+            changed = self._apply(servers)
+            if changed:
+                self.version += 1
+            return changed
+
+    def _apply(self, servers: Dict[str, Dict[str, Any]]) -> bool:
+        """对比新旧配置，只新建、替换或移除有变化的服务器"""
+        changed = False
+        updated: Dict[str, Tuple[Dict[str, Any], McpClient]] = {}
+        for name, server_config in servers.items():
+            current = self._servers.get(name)
+            if current is not None and current[0] == server_config:
+                updated[name] = current
+                continue
+            if current is not None:
+                self._retire(current[1])
+                logger.info(f"MCP服务器配置已变更: {name}")
+            else:
+                logger.info(f"注册MCP服务器: {name}")
+            updated[name] = (server_config, self._create_client(name, server_config))
+            changed = True
+        for name, (_, client) in self._servers.items():
+            if name not in updated:
+                self._retire(client)
+                logger.info(f"移除MCP服务器: {name}")
+                changed = True
+        if list(updated) != list(self._servers):
+            changed = True
+        self._servers = updated
+        return changed
+
+    def _retire(self, client: McpClient):
+        self._retired.append(client)
+        self._ever_retired.add(client)
+
+    @staticmethod
+    def _create_client(name: str, server_config: Dict[str, Any]) -> McpClient:
+        server_config = dict(server_config)
+        # 缓存相关配置由McpClient处理，不传给MCP客户端
+        idempotent_tools = server_config.pop('idempotentTools', None)
+        cache_ttl = server_config.pop('cacheTtl', 60.0)
+        return McpClient(
+            {'mcpServers': {name: server_config}},
+            idempotent_tools=idempotent_tools,
+            cache_ttl=cache_ttl,
+        )
+
+    @asynccontextmanager
+    async def lease(self, tool_impl):
+        """
+        标记一次正在进行的调用：被替换的客户端在所有调用结束后才关闭，
+        调用结束时如果客户端已被替换且没有其他调用，立即关闭（调用期间可能重新建立了连接）
+        """
+        with self._lock:
+            self._in_use[tool_impl] = self._in_use.get(tool_impl, 0) + 1
+        try:
+            yield tool_impl
+        finally:
+            with self._lock:
+                count = self._in_use[tool_impl] - 1
+                if count:
+                    self._in_use[tool_impl] = count
+                else:
+                    del self._in_use[tool_impl]
+                close = not count and tool_impl in self._ever_retired
+                if close and tool_impl in self._retired:
+                    self._retired.remove(tool_impl)
+            if close:
+                await self._close(tool_impl)
+
+    async def close_retired(self):
+        """关闭已被移除或替换、且没有正在进行的调用的客户端"""
+        with self._lock:
+            retired = [client for client in self._retired if client not in self._in_use]
+            self._retired = [client for client in self._retired if client in self._in_use]
+        for client in retired:
+            await self._close(client)
+
+    @staticmethod
+    async def _close(client: McpClient):
+        try:
+            await client.cleanup()
+        except Exception as e:
+            logger.warning(f"关闭MCP客户端失败: {e}")
+
+    async def cleanup(self):
+        """关闭所有客户端"""
+        with self._lock:
+            clients = [client for _, client in self._servers.values()]
+        await asyncio.gather(self.close_retired(), *(client.cleanup() for client in clients))
+
+
+_registry: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ToolRegistry:
+    """获取进程内共享的工具注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ToolRegistry()
+    return _registry
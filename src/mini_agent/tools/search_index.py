@@ -0,0 +1,296 @@
+from typing import Dict, Iterator, Optional, Set, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 遍历时跳过的目录
+IGNORED_DIRS = frozenset({'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', '.mini_agent'})
+# 判断二进制文件时检查的字节数
+BINARY_CHECK_SIZE = 8192
+INDEX_VERSION = 1
+# 文件系统时间戳精度有限，mtime距扫描时间在该范围内的目录视为可能已变化
+_RACY_NS = 2 * 1000 * 1000 * 1000
+
+
+def iter_files(directory: str, ignored_dirs=IGNORED_DIRS) -> Iterator[os.DirEntry]:
+    """基于os.scandir递归遍历目录下的文件"""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                subdirs = []
+                files = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in ignored_dirs:
+                                subdirs.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"无法读取目录 {current}: {e}")
+            continue
+        yield from sorted(files, key=lambda e: e.name)
+        # 逆序入栈，保证按目录名顺序遍历
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+def is_binary(data: bytes) -> bool:
+    """包含空字节的内容视为二进制"""
+    return b'\0' in data[:BINARY_CHECK_SIZE]
+
+
+def trigrams(data: bytes) -> Set[bytes]:
+    """提取内容（小写）的所有三元组"""
+    data = data.lower()
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+class TrigramIndex:
+    """
+    工作区的持久化三元组索引，用于快速筛选可能包含某个字符串的文件。
+    完整遍历按refresh_interval限频；两次遍历之间每次查询只stat目录（新建或删除文件会改变所在目录的mtime），
+    重新扫描有变化的目录，并按mtime校验候选文件。原地修改且不在候选中的文件在下一次完整遍历时更新。
+    阻塞型工具在线程池中并发执行：索引数据由_lock保护，扫描由_sync_lock串行，读文件和匹配都在锁外进行
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None, max_file_size: int = 1024 * 1024,
+                 refresh_interval: float = 30.0):
+        """
+        :param root: 工作区根目录
+        :param index_path: 索引文件路径，默认 <root>/.mini_agent/trigram_index.json
+        :param max_file_size: 超过该大小的文件不建立索引（查询时总是作为候选）
+        :param refresh_interval: 两次完整遍历之间的最小间隔（秒）
+        """
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or os.path.join(self.root, '.mini_agent', 'trigram_index.json')
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        # 相对路径 -> (mtime_ns, size, 三元组集合；None表示未建索引)
+        self._files: Dict[str, Tuple[int, int, Optional[Set[bytes]]]] = {}
+        # 三元组 -> 相对路径集合
+        self._postings: Dict[bytes, Set[str]] = {}
+        # 目录相对路径（根目录为''） -> (mtime_ns, 扫描时间)
+        self._dirs: Dict[str, Tuple[int, int]] = {}
+        self._last_refresh: Optional[float] = None
+        # 内存中的索引有未写入磁盘的变化
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """从磁盘加载索引"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"索引文件损坏，将重建: {e}")
+            return
+        if data.get('version') != INDEX_VERSION or data.get('root') != self.root:
+            return
+        for path, (mtime_ns, size, encoded) in data.get('files', {}).items():
+            grams = None
+            if encoded is not None:
+                raw = bytes.fromhex(encoded)
+                grams = {raw[i:i + 3] for i in range(0, len(raw), 3)}
+            self._add(path, mtime_ns, size, grams)
+
+    def save(self):
+        """将索引写入磁盘"""
+        with self._lock:
+            files = {
+                path: [mtime_ns, size, b''.join(sorted(grams)).hex() if grams is not None else None]
+                for path, (mtime_ns, size, grams) in self._files.items()
+            }
+            self._dirty = False
+        with self._save_lock:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'root': self.root, 'files': files}, f)
+            os.replace(tmp_path, self.index_path)
+
+    def _add(self, path: str, mtime_ns: int, size: int, grams: Optional[Set[bytes]]):
+        if path in self._files:
+            self._remove(path)
+        self._files[path] = (mtime_ns, size, grams)
+        for gram in grams or ():
+            self._postings.setdefault(gram, set()).add(path)
+
+    def _remove(self, path: str):
+        _, _, grams = self._files.pop(path)
+        for gram in grams or ():
+            paths = self._postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._postings[gram]
+
+    def refresh(self) -> bool:
+        """遍历整个工作区，根据mtime和大小增量更新索引，返回索引是否有变化"""
+        with self._sync_lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        changed = self._rescan([''], recurse_all=True)
+        self._last_refresh = time.monotonic()
+        if self._dirty:
+            self.save()
+        return changed
+
+    def _sync(self):
+        """查询前同步：到期时完整遍历，否则只重新扫描mtime有变化的目录"""
+        with self._sync_lock:
+            if self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval:
+                self._refresh()
+                return
+            with self._lock:
+                dirs = list(self._dirs.items())
+            stale = []
+            for rel, (mtime_ns, scanned_ns) in dirs:
+                try:
+                    current = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+                except OSError:
+                    current = None
+                # 目录在扫描前后的同一时钟刻度内被修改时mtime可能不变，扫描后不久的目录总是重新扫描
+                if current is None or current != mtime_ns or current + _RACY_NS >= scanned_ns:
+                    stale.append(rel)
+            if stale:
+                self._rescan(stale)
+
+    def _rescan(self, dirs, recurse_all: bool = False) -> bool:
+        """
+        重新扫描目录下的文件，未记录过的子目录递归扫描，返回索引是否有变化
+        :param recurse_all: 递归扫描所有子目录（完整遍历）
+        """
+        with self._lock:
+            known_dirs = set(self._dirs)
+        scanned: Dict[str, Tuple[int, int]] = {}
+        found: Dict[str, Tuple[int, int]] = {}
+        subdirs: Set[str] = set()
+        stack = list(dirs)
+        while stack:
+            rel = stack.pop()
+            directory = os.path.join(self.root, rel)
+            scanned_ns = time.time_ns()
+            try:
+                # 先stat再列目录，列出之后的修改会改变mtime
+                mtime_ns = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    entries = list(entries)
+            except OSError as e:
+                logger.debug(f"无法读取目录 {directory}: {e}")
+                continue
+            scanned[rel] = (mtime_ns, scanned_ns)
+            for entry in entries:
+                child = os.path.join(rel, entry.name) if rel else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORED_DIRS:
+                            subdirs.add(child)
+                            if recurse_all or child not in known_dirs:
+                                stack.append(child)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        found[child] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        with self._lock:
+            # 被扫描目录下消失的文件和子目录（连同其下的全部内容）从索引中删除
+            removed_dirs = {d for d in self._dirs if d and os.path.dirname(d) in scanned and d not in subdirs
+                            and d not in scanned}
+            removed = [p for p in self._files
+                       if (os.path.dirname(p) in scanned and p not in found)
+                       or any(p.startswith(d + os.sep) for d in removed_dirs)]
+            changed = [p for p, (mtime_ns, size) in found.items()
+                       if self._files.get(p, (None, None))[:2] != (mtime_ns, size)]
+            for rel in [d for d in self._dirs if any(d == r or d.startswith(r + os.sep) for r in removed_dirs)]:
+                del self._dirs[rel]
+            for path in removed:
+                self._remove(path)
+            self._dirs.update(scanned)
+        self._update({path: found[path] for path in changed})
+        if removed:
+            self._dirty = True
+        return bool(removed or changed)
+
+    def _update(self, files: Dict[str, Tuple[int, int]]):
+        """在锁外读取变化的文件，再写入索引"""
+        indexed = [(path, mtime_ns, size, self._index_file(os.path.join(self.root, path), size))
+                   for path, (mtime_ns, size) in files.items()]
+        if not indexed:
+            return
+        with self._lock:
+            for path, mtime_ns, size, grams in indexed:
+                self._add(path, mtime_ns, size, grams)
+            self._dirty = True
+
+    def _index_file(self, path: str, size: int) -> Optional[Set[bytes]]:
+        """读取文件并计算三元组，超大文件返回None"""
+        if size > self.max_file_size:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if is_binary(data):
+            return set()
+        return trigrams(data)
+
+    def candidates(self, literal: str) -> Optional[Set[str]]:
+        """
+        返回可能包含literal的文件（绝对路径），候选文件按mtime校验，新建的文件在下一次查询时即可找到
+        literal过短无法筛选时返回None，表示需要全部扫描
+        """
+        needle = literal.encode('utf-8').lower()
+        if len(needle) < 3:
+            return None
+        needle_grams = trigrams(needle)
+        self._sync()
+        with self._lock:
+            result = {path: (mtime_ns, size) for path, (mtime_ns, size, grams) in self._files.items()
+                      if grams is None}
+            matched = None
+            # 从最稀有的三元组开始求交集
+            for paths in sorted((self._postings.get(gram, set()) for gram in needle_grams), key=len):
+                matched = set(paths) if matched is None else matched & paths
+                if not matched:
+                    break
+            for path in matched or ():
+                result[path] = self._files[path][:2]
+        # 只stat候选文件：删除的去掉，修改过的重新建索引后再判断
+        verified = set()
+        changed = {}
+        for path, known in result.items():
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                with self._lock:
+                    if path in self._files:
+                        self._remove(path)
+                        self._dirty = True
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == known:
+                verified.add(path)
+            else:
+                changed[path] = (stat.st_mtime_ns, stat.st_size)
+        if changed:
+            self._update(changed)
+            with self._lock:
+                for path in changed:
+                    grams = self._files[path][2] if path in self._files else set()
+                    if grams is None or needle_grams <= grams:
+                        verified.add(path)
+        return {os.path.join(self.root, path) for path in verified}
@@ -1,60 +1,156 @@
-from typing import List, Dict, Any, Type
+import contextlib
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
 from mini_agent.tools.base import ToolBase
-from mini_agent.tools.mcp_client import McpClient
-import os
-import json
+from mini_agent.tools.registry import ToolRegistry, get_registry
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 命名空间分隔符：<命名空间>__<工具名>
+NAMESPACE_SEPARATOR = '__'
+
 class ToolManager:
     """管理所有工具实现类，并提供统一的工具访问接口"""
 
-    def __init__(self):
-        self._tool_implementations: List[ToolBase] = []
-        self.register_mcp()
+    def __init__(self, namespace_tools: bool = False, registry: Optional[ToolRegistry] = None,
+                 use_registry: bool = True, miss_refresh_interval: float = 30.0):
+        """
+        :param namespace_tools: 是否为工具名加上命名空间前缀（用于区分不同MCP服务器的同名工具）
+        :param registry: MCP工具注册表，默认使用进程内共享的注册表
+        :param use_registry: 是否加载MCP工具
+        :param miss_refresh_interval: 查找不到工具时重建索引的最小间隔（秒），避免不存在的工具名反复拉取工具列表
+        """
+        # 本地注册的 (工具实现, 命名空间)
+        self._tool_implementations: List[Tuple[ToolBase, Optional[str]]] = []
+        self.namespace_tools = namespace_tools
+        # MCP服务器由共享注册表管理，构造时不读取配置、不创建客户端
+        self.registry = registry if registry is not None else (get_registry() if use_registry else None)
+        # 工具名 -> (工具实现, 原始工具名)
+        self._tool_index: Dict[str, Tuple[ToolBase, str]] = {}
+        # OpenAI格式的工具定义缓存
+        self._openai_tools: List[Dict[str, Any]] = []
+        self._index_dirty = True
+        # 构建索引时注册表的版本
+        self._registry_version: Optional[int] = None
+        self.miss_refresh_interval = miss_refresh_interval
+        # 上次因查找不到工具而重建索引的时间
+        self._last_miss_refresh: Optional[float] = None
+
+    def register_tool(self, tool_impl: ToolBase, namespace: Optional[str] = None):
+        """
+        注册一个工具实现类
+        :param tool_impl: 工具实现
+        :param namespace: 命名空间，namespace_tools开启时作为工具名前缀
+        """
+        if tool_impl.blocking and type(tool_impl).call_tool_sync is ToolBase.call_tool_sync:
+            raise ValueError(f"阻塞型工具 {type(tool_impl).__name__} 必须实现 call_tool_sync")
+        self._tool_implementations.append((tool_impl, namespace))
+        self._index_dirty = True
 
     def register_mcp(self):
-        """注册mcp工具"""
-        # 读取根目录下的 mcp_config.json
-        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'mcp_config.json')
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                print(config)
-                if config:
-                    mcp_client = McpClient(config)
-                    self.register_tool(mcp_client)
-            logger.info(f"注册mcp: {config}")
-        else:
-            logger.warning(f"mcp_config.json 文件不存在: {config_path}")
-
-    def register_tool(self, tool_impl: ToolBase):
-        """注册一个工具实现类"""
-        self._tool_implementations.append(tool_impl)
+        """兼容旧接口：使用进程内共享的注册表加载MCP工具，并重新读取配置"""
+        if self.registry is None:
+            self.registry = get_registry()
+        self.registry.reload()
+        self._index_dirty = True
+
+    def lease(self, tool_impl: ToolBase):
+        """调用期间持有工具实现，避免配置变更时关闭正在使用的MCP客户端"""
+        if self.registry is None:
+            return contextlib.nullcontext(tool_impl)
+        return self.registry.lease(tool_impl)
 
     async def cleanup_all(self):
-        """清理所有注册的工具"""
-        for tool in self._tool_implementations:
+        """清理本地注册的工具，共享的MCP客户端由注册表管理"""
+        for tool, _ in self._tool_implementations:
             await tool.cleanup()
 
-    async def list_tools(self):
-        """获取所有工具的定义，转换为OpenAI格式"""
+    def _public_name(self, tool_name: str, namespace: Optional[str]) -> str:
+        """获取对外暴露的工具名"""
+        if self.namespace_tools and namespace:
+            return f"{namespace}{NAMESPACE_SEPARATOR}{tool_name}"
+        return tool_name
+
+    async def refresh_tools(self):
+        """重新获取所有工具定义，重建工具名到实现的分发索引"""
+        tool_index: Dict[str, Tuple[ToolBase, str]] = {}
         openai_tools = []
-        for tool_impl in self._tool_implementations:
+        implementations = list(self._tool_implementations)
+        if self.registry is not None:
+            servers = self.registry.servers()
+            registry_version = self.registry.version
+            # MCP服务器排在本地工具之前
+            implementations = [(client, name) for name, client in servers] + implementations
+            await self.registry.close_retired()
+        for tool_impl, namespace in implementations:
             tools = await tool_impl.get_tools()
             for tool in tools:
+                name = self._public_name(tool['tool_name'], namespace)
+                if name in tool_index:
+                    # 同名工具只保留先注册的实现
+                    logger.warning(
+                        f"工具名冲突: {name} 已由 {type(tool_index[name][0]).__name__} 注册，"
+                        f"忽略来自 {namespace or type(tool_impl).__name__} 的同名工具"
+                    )
+                    continue
+                tool_index[name] = (tool_impl, tool['tool_name'])
                 openai_tools.append({
                     "type": "function",
                     "function": {
-                        "name": tool['tool_name'],
+                        "name": name,
                         "description": tool['description'],
                         "parameters": tool.get('parameters', {})
                     }
                 })
-        return openai_tools
+        self._tool_index = tool_index
+        self._openai_tools = openai_tools
+        self._index_dirty = False
+        if self.registry is not None:
+            self._registry_version = registry_version
+
+    def _is_stale(self) -> bool:
+        """本地注册了新工具，或MCP配置发生变化"""
+        if self._index_dirty:
+            return True
+        if self.registry is None:
+            return False
+        self.registry.check()
+        return self.registry.version != self._registry_version
+
+    async def _ensure_index(self):
+        """索引失效时重建"""
+        if self._is_stale():
+            await self.refresh_tools()
+
+    async def list_tools(self):
+        """获取所有工具的定义，转换为OpenAI格式"""
+        await self._ensure_index()
+        return list(self._openai_tools)
+
+    async def resolve_tool(self, tool_name: str) -> Tuple[ToolBase, str]:
+        """
+        根据工具名查找工具实现
+        :return: (工具实现, 原始工具名)
+        """
+        refreshed = self._is_stale()
+        await self._ensure_index()
+        entry = self._tool_index.get(tool_name)
+        if entry is None and not refreshed and self._miss_refresh_allowed():
+            # 工具列表可能在服务端发生变化，重建一次索引后再查找（限频，不存在的工具名不会每次都触发）
+            self._last_miss_refresh = time.monotonic()
+            await self.refresh_tools()
+            entry = self._tool_index.get(tool_name)
+        if entry is None:
+            raise ValueError(f"Tool {tool_name} not found")
+        return entry
+
+    def _miss_refresh_allowed(self) -> bool:
+        if self._last_miss_refresh is None:
+            return True
+        return time.monotonic() - self._last_miss_refresh >= self.miss_refresh_interval
 
     async def call_tool(self, tool_name: str, tool_args: dict) -> str:
         """
@@ -62,9 +158,6 @@ class ToolManager:
         :param tool_name: 工具名
         :param tool_args: 工具参数
         """
-        for tool_impl in self._tool_implementations:
-            tools = await tool_impl.get_tools()
-            for tool in tools:
-                if tool['tool_name'] == tool_name:
-                    return await tool_impl.call_tool(tool_name=tool_name, tool_args=tool_args)
-        raise ValueError(f"Tool {tool_name} not found")
\ No newline at end of file
+        tool_impl, original_name = await self.resolve_tool(tool_name)
+        async with self.lease(tool_impl):
+            return await tool_impl.call_tool(tool_name=original_name, tool_args=tool_args)
@@ -0,0 +1,244 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# perf_counter 与 Unix 时间的对应关系，用于导出绝对时间
+_ORIGIN_PERF_NS = time.perf_counter_ns()
+_ORIGIN_EPOCH_NS = time.time_ns()
+
+
+def to_epoch_ns(perf_ns: int) -> int:
+    """将perf_counter时间换算为Unix时间（纳秒）"""
+    return _ORIGIN_EPOCH_NS + (perf_ns - _ORIGIN_PERF_NS)
+
+
+class Span:
+    """一次计时区间"""
+
+    __slots__ = ('name', 'category', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attrs', 'lane')
+
+    # 空操作追踪器返回的Span不记录任何内容
+    recording = True
+
+    def __init__(self, name: str, category: str, span_id: int, parent_id: Optional[int], lane: int,
+                 attrs: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.lane = lane
+        self.attrs = attrs
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    def set(self, **attrs):
+        """补充属性（如结果大小、token用量）"""
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'category': self.category,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': self.duration_ms,
+            'attrs': self.attrs,
+        }
+
+
+class _NullSpan:
+    """不记录的Span"""
+
+    __slots__ = ()
+    recording = False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _NullSpanContext:
+    """复用的空上下文管理器，关闭追踪时不产生任何对象分配"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return _NULL_SPAN
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN_CONTEXT = _NullSpanContext()
+
+
+class NullTracer:
+    """关闭追踪时使用，所有操作都是空操作"""
+
+    enabled = False
+
+    def span(self, name: str, category: str = 'agent', **attrs) -> _NullSpanContext:
+        return _NULL_SPAN_CONTEXT
+
+
+NULL_TRACER = NullTracer()
+
+# 当前追踪器和当前Span，随asyncio任务上下文传递
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar('mini_agent_tracer', default=NULL_TRACER)
+_current_span: contextvars.ContextVar = contextvars.ContextVar('mini_agent_span', default=None)
+
+
+def current_tracer():
+    """获取当前上下文的追踪器，未启用时返回NULL_TRACER"""
+    return _current_tracer.get()
+
+
+def current_span():
+    """获取当前正在记录的Span，未启用追踪时返回空Span"""
+    return _current_span.get() or _NULL_SPAN
+
+
+@contextmanager
+def use_tracer(tracer):
+    """在上下文中启用追踪器"""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+class Tracer:
+    """
+    耗时追踪器：记录Agent每轮、LLM调用、工具调用等环节的耗时
+    收集的Span可导出为JSON或Chrome Trace格式，也可通过钩子转发到OpenTelemetry等系统
+    """
+
+    enabled = True
+
+    def __init__(self, hooks: Optional[List[Callable[[Span], None]]] = None, max_spans: int = 100000):
+        """
+        :param hooks: Span结束时的回调
+        :param max_spans: 保留的Span数上限，超出后丢弃最早的
+        """
+        self.hooks = list(hooks or [])
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        # 按任务/线程对象弱引用，结束的任务随之移除，id()被复用时也不会把不同任务合并到一条时间线
+        self._lanes: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._lane_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+
+    def add_hook(self, hook: Callable[[Span], None]):
+        self.hooks.append(hook)
+
+    def _lane(self) -> int:
+        """每个asyncio任务/线程一条时间线，避免并发Span在Chrome Trace中错误嵌套"""
+        try:
+            key = asyncio.current_task()
+        except RuntimeError:
+            key = None
+        if key is None:
+            key = threading.current_thread()
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = next(self._lane_ids)
+            return lane
+
+    @contextmanager
+    def span(self, name: str, category: str = 'agent', **attrs) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name, category, next(self._ids), parent.span_id if parent else None, self._lane(), attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs['error'] = repr(e)
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            if len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+        for hook in self.hooks:
+            hook(span)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """按名称汇总次数和总耗时"""
+        result: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            item = result.setdefault(span.name, {'count': 0, 'total_ms': 0.0})
+            item['count'] += 1
+            item['total_ms'] += span.duration_ms
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps([span.to_dict() for span in self.spans], ensure_ascii=False, default=str)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """导出为Chrome Trace格式（chrome://tracing、Perfetto可直接打开）"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start_ns - self._origin_ns) / 1000,
+                'dur': ((span.end_ns or span.start_ns) - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': span.lane,
+                'args': span.attrs,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self._lanes.clear()
+
+
+def otel_hook(otel_tracer) -> Callable[[Span], None]:
+    """
+    生成将Span转发到OpenTelemetry的钩子
+    :param otel_tracer: opentelemetry.trace.Tracer 实例
+    """
+    def hook(span: Span):
+        attributes = {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+                      for key, value in span.attrs.items()}
+        attributes['mini_agent.category'] = span.category
+        attributes['mini_agent.span_id'] = span.span_id
+        if span.parent_id is not None:
+            attributes['mini_agent.parent_id'] = span.parent_id
+        otel_span = otel_tracer.start_span(span.name, start_time=to_epoch_ns(span.start_ns), attributes=attributes)
+        otel_span.end(end_time=to_epoch_ns(span.end_ns))
+    return hook
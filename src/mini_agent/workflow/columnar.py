@@ -0,0 +1,295 @@
+import ast
+import logging
+import operator
+from collections import ChainMap
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from mini_agent.workflow.expressions import CONSTANTS, compile_expression, evaluate
+from mini_agent.workflow.template import compile_template
+
+logger = logging.getLogger(__name__)
+
+# 列式执行中代表当前记录的变量名
+ITEM = 'item'
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+_BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+_SCALAR_TYPES = (bool, int, float, str, type(None))
+
+
+# 按列渲染时字符串转为定长数组，宽度取最长的值；超过该长度（字符）时逐条处理，避免一个长值放大整列内存
+MAX_STRING_WIDTH = 1024
+
+
+class Unsupported(Exception):
+    """表达式或数据无法按列执行，需要逐条处理"""
+
+
+def _column(values: List[Any]) -> np.ndarray:
+    """
+    将一列值转换为数组：同为bool/int/float时使用对应的数值类型，
+    其他情况（含int与float混合）使用object数组，保持与逐条计算一致的比较语义
+    """
+    types = set(map(type, values))
+    if types == {bool}:
+        return np.array(values, dtype=bool)
+    if types == {float}:
+        return np.array(values, dtype=np.float64)
+    if types == {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    column = np.empty(len(values), dtype=object)
+    # 逐个赋值：整体赋值时等长的列表值会被当成二维数据而报错
+    for index, value in enumerate(values):
+        column[index] = value
+    return column
+
+
+class ColumnTable:
+    """记录列表的列式视图，字段在首次使用时才转换为数组"""
+
+    def __init__(self, records: Sequence[Mapping[str, Any]]):
+        self.records = records
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_records(cls, records: Any) -> Optional['ColumnTable']:
+        """只有字典记录组成的列表才能按列执行，否则返回None"""
+        if not isinstance(records, list) or not all(type(record) is dict for record in records):
+            return None
+        return cls(records)
+
+    def column(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            try:
+                column = _column([record[name] for record in self.records])
+            except KeyError:
+                # 逐条处理时缺少字段会报错或保留模板原文，交给逐条处理
+                raise Unsupported(f"部分记录缺少字段: {name}")
+            self._columns[name] = column
+        return column
+
+    def take(self, mask: np.ndarray) -> List[Any]:
+        """按掩码取出原始记录对象"""
+        records = self.records
+        return [records[index] for index in np.flatnonzero(mask)]
+
+
+def _references_item(node: ast.AST) -> bool:
+    return any(isinstance(child, ast.Name) and child.id == ITEM for child in ast.walk(node))
+
+
+def _field_name(node: ast.AST) -> Optional[str]:
+    """item["字段"] 形式的下标返回字段名"""
+    if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == ITEM
+            and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str)):
+        return node.slice.value
+    return None
+
+
+def _truth(value: Any, length: int) -> np.ndarray:
+    if isinstance(value, np.ndarray):
+        return value if value.dtype == bool else value.astype(bool)
+    return np.full(length, bool(value))
+
+
+def _exact(value: Any) -> Any:
+    """整数和布尔列在算术运算前转为object，按Python整数语义计算，避免int64溢出"""
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biu':
+        return value.astype(object)
+    return value
+
+
+def _has_sequences(value: Any) -> bool:
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in 'US':
+            return True
+        return value.dtype == object and any(isinstance(item, (str, bytes, list, tuple)) for item in value)
+    return isinstance(value, (str, bytes, list, tuple))
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    """数值乘法；涉及字符串、列表等序列时交给逐条处理，由逐条求值检查重复后的长度"""
+    if _has_sequences(left) or _has_sequences(right):
+        raise Unsupported('序列重复不按列执行')
+    return _exact(left) * _exact(right)
+
+
+class _Compiler:
+    """把表达式语法树转换为在列上执行的函数"""
+
+    def compile(self, node: ast.AST) -> Callable[[ColumnTable, Mapping[str, Any]], Any]:
+        if not _references_item(node):
+            # 与记录无关的子表达式只计算一次
+            code = compile_expression(ast.unparse(node))
+
+            def constant(table, scope):
+                value = evaluate(code, scope)
+                if not isinstance(value, _SCALAR_TYPES):
+                    raise Unsupported(f"不支持按列使用非标量值: {type(value).__name__}")
+                return value
+            return constant
+
+        field = _field_name(node)
+        if field is not None:
+            return lambda table, scope: table.column(field)
+        if isinstance(node, ast.BoolOp):
+            operands = [self.compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def bool_op(table, scope):
+                result = _truth(operands[0](table, scope), len(table))
+                for operand in operands[1:]:
+                    result = combine(result, _truth(operand(table, scope), len(table)))
+                return result
+            return bool_op
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+            operand = self.compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda table, scope: ~_truth(operand(table, scope), len(table))
+            return lambda table, scope: -_exact(operand(table, scope))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            op = _BINARY_OPS[type(node.op)]
+            left, right = self.compile(node.left), self.compile(node.right)
+            if isinstance(node.op, ast.Mult):
+                return lambda table, scope: _multiply(left(table, scope), right(table, scope))
+            return lambda table, scope: op(_exact(left(table, scope)), _exact(right(table, scope)))
+        if isinstance(node, ast.Compare):
+            return self._compare(node)
+        raise Unsupported(f"不支持按列执行的语法: {type(node).__name__}")
+
+    def _compare(self, node: ast.Compare):
+        operands = [self.compile(node.left)]
+        ops = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if _references_item(comparator):
+                    raise Unsupported('in 右侧必须与记录无关')
+                code = compile_expression(ast.unparse(comparator))
+                operands.append(lambda table, scope, code=code: evaluate(code, scope))
+                ops.append(op)
+            elif type(op) in _COMPARE_OPS:
+                operands.append(self.compile(comparator))
+                ops.append(op)
+            else:
+                raise Unsupported(f"不支持按列执行的比较: {type(op).__name__}")
+
+        def compare(table, scope):
+            values = [operand(table, scope) for operand in operands]
+            result = None
+            for index, op in enumerate(ops):
+                left, right = values[index], values[index + 1]
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if not isinstance(right, (list, tuple, set, frozenset)):
+                        raise Unsupported('in 右侧必须是列表、元组或集合')
+                    part = np.zeros(len(table), dtype=bool)
+                    for candidate in right:
+                        if not isinstance(candidate, _SCALAR_TYPES) or candidate != candidate:
+                            # 非标量和NaN的in语义与逐元素==不同
+                            raise Unsupported('in 右侧只支持标量')
+                        part |= _truth(left == candidate, len(table))
+                    if isinstance(op, ast.NotIn):
+                        part = ~part
+                else:
+                    part = _truth(_COMPARE_OPS[type(op)](left, right), len(table))
+                # 链式比较 a < b < c 等价于 a < b and b < c
+                result = part if result is None else result & part
+            return result
+        return compare
+
+
+@lru_cache(maxsize=1024)
+def compile_mask(expression: str) -> Optional[Callable[[ColumnTable, Mapping[str, Any]], Any]]:
+    """
+    将过滤条件编译为向量化掩码函数，表达式先经过compile_expression的安全校验
+    包含无法按列执行的语法时返回None（同样会被缓存）
+    """
+    compile_expression(expression)
+    tree = ast.parse(expression.strip(), mode='eval')
+    try:
+        return _Compiler().compile(tree.body)
+    except Unsupported as e:
+        logger.debug(f"过滤条件无法按列执行: {expression}, 原因: {e}")
+        return None
+
+
+def filter_records(expression: str, records: Any, context: Mapping[str, Any]) -> Optional[List[Any]]:
+    """
+    按列过滤记录，结果与逐条求值一致
+    无法按列执行（语法不支持、数据不是字典列表、计算出错等）时返回None，由调用方逐条处理
+    """
+    table = ColumnTable.from_records(records)
+    if table is None:
+        return None
+    try:
+        mask_fn = compile_mask(expression)
+        if mask_fn is None:
+            return None
+        # 逐条求值时除零等错误会直接报错，这里同样转为异常后交给逐条处理
+        with np.errstate(divide='raise', invalid='raise', over='raise'):
+            mask = _truth(mask_fn(table, ChainMap(context, CONSTANTS)), len(table))
+    except (Unsupported, ArithmeticError, TypeError, ValueError) as e:
+        logger.debug(f"过滤条件无法按列执行，改为逐条处理: {expression}, 原因: {e}")
+        return None
+    if mask.shape != (len(table),):
+        return None
+    return table.take(mask)
+
+
+def _string_column(column: np.ndarray) -> np.ndarray:
+    """转换为定长字符串数组，存在过长的值时抛出Unsupported"""
+    if column.dtype == object:
+        strings = [str(value) for value in column]
+        if strings and max(map(len, strings)) > MAX_STRING_WIDTH:
+            raise Unsupported(f"字段值超过 {MAX_STRING_WIDTH} 个字符")
+        return np.array(strings, dtype=str)
+    return column.astype(str)
+
+
+def map_records(mappings: Mapping[str, str], records: Any, context: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    按列渲染映射模板：与记录无关的变量只解析一次，{{item.字段}} 整列转换为字符串后拼接
+    无法按列执行时返回None，由调用方逐条处理
+    """
+    table = ColumnTable.from_records(records)
+    if table is None:
+        return None
+    length = len(table)
+    outputs = {}
+    try:
+        for output_key, source in mappings.items():
+            if not isinstance(source, str):
+                outputs[output_key] = [source] * length
+                continue
+            rendered = ''
+            for text, path in compile_template(source).segments:
+                if path is not None and path[0] == ITEM:
+                    if len(path) != 2:
+                        raise Unsupported(f"不支持按列渲染嵌套字段: {text}")
+                    part = _string_column(table.column(path[1]))
+                else:
+                    part = text if path is None else compile_template(text).render(context)
+                rendered = np.char.add(rendered, part) if isinstance(rendered, np.ndarray) or \
+                    isinstance(part, np.ndarray) else rendered + part
+            outputs[output_key] = rendered.tolist() if isinstance(rendered, np.ndarray) else [rendered] * length
+    except (Unsupported, ValueError, TypeError) as e:
+        logger.debug(f"映射无法按列执行，改为逐条处理: {e}")
+        return None
+    keys = list(outputs)
+    return [dict(zip(keys, row)) for row in zip(*(outputs[key] for key in keys))]
@@ -0,0 +1,245 @@
+import itertools
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import traceback
+import uuid
+import weakref
+from collections import ChainMap, OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any, limit: Optional[int] = None) -> int:
+    """
+    粗略估计对象占用的字节数（字符串按长度、容器逐层累加）
+    :param limit: 累计超过该值时提前返回，避免遍历整个大对象
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (str, bytes, bytearray)):
+            total += len(item) + 48
+        elif isinstance(item, dict):
+            total += 64 + 16 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            total += 56 + 8 * len(item)
+            stack.extend(item)
+        else:
+            # numpy数组等带nbytes的对象按实际数据大小计算
+            total += getattr(item, 'nbytes', 24)
+        if limit is not None and total > limit:
+            break
+    return total
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """溢出到磁盘的节点输出的句柄"""
+    handle: str
+    size: int
+
+    def __str__(self) -> str:
+        return f"<blob {self.handle} ~{self.size} bytes>"
+
+
+class BlobStore:
+    """把较大的节点输出序列化到临时目录，按句柄读取，最近读取的少量对象保留在内存中"""
+
+    def __init__(self, directory: Optional[str] = None, cache_size: int = 2):
+        """
+        :param directory: 存放目录，None表示首次写入时创建临时目录，关闭时删除
+        :param cache_size: 内存中保留最近读取的对象个数
+        """
+        self._directory = directory
+        self._owns_directory = directory is None
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._finalizer = None
+
+    @property
+    def directory(self) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='mini_agent_blobs_')
+            # 未显式关闭时在对象回收后删除临时目录
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        return self._directory
+
+    def put(self, value: Any, size: int = 0) -> BlobRef:
+        """
+        :raises pickle.PicklingError: 对象无法序列化
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            handle = f"{next(self._ids)}-{uuid.uuid4().hex[:8]}"
+            path = os.path.join(self.directory, handle + '.pkl')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return BlobRef(handle, size or len(data))
+
+    def get(self, ref: BlobRef) -> Any:
+        with self._lock:
+            if ref.handle in self._cache:
+                self._cache.move_to_end(ref.handle)
+                return self._cache[ref.handle]
+        with open(os.path.join(self.directory, ref.handle + '.pkl'), 'rb') as f:
+            value = pickle.load(f)
+        with self._lock:
+            self._cache[ref.handle] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """BlobRef加载为原始值，其他值原样返回"""
+        return self.get(value) if isinstance(value, BlobRef) else value
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+        elif self._directory and self._owns_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class ContextData(ChainMap):
+    """
+    分层的上下文数据：写入只发生在最上层，下层（如共享的初始数据）不复制；
+    溢出到磁盘的值在读取时按句柄加载
+    """
+
+    def __init__(self, *maps, blobs: Optional[BlobStore] = None):
+        super().__init__(*maps)
+        self.blobs = blobs
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, BlobRef) and self.blobs is not None:
+            return self.blobs.get(value)
+        return value
+
+    def raw(self, key, default=None):
+        """读取值但不加载溢出的数据，返回BlobRef"""
+        for mapping in self.maps:
+            if key in mapping:
+                return mapping[key]
+        return default
+
+    def new_child(self, m=None, **kwargs) -> 'ContextData':
+        """叠加一层作用域（如循环变量），只新建最上层"""
+        if m is None:
+            m = kwargs
+        elif kwargs:
+            m.update(kwargs)
+        return self.__class__(m, *self.maps, blobs=self.blobs)
+
+    @property
+    def parents(self) -> 'ContextData':
+        return self.__class__(*self.maps[1:], blobs=self.blobs)
+
+    def copy(self) -> 'ContextData':
+        return self.__class__(self.maps[0].copy(), *self.maps[1:], blobs=self.blobs)
+
+    __copy__ = copy
+
+    def to_dict(self) -> Dict[str, Any]:
+        """合并各层为普通字典，溢出的值保留为BlobRef"""
+        result = {}
+        for mapping in reversed(self.maps):
+            result.update(mapping)
+        return result
+
+
+class WorkflowContext:
+    """工作流上下文管理器"""
+
+    def __init__(self, initial_data: Optional[Dict[str, Any]] = None, history_limit: Optional[int] = None,
+                 spill_threshold: Optional[int] = None, blob_store: Optional[BlobStore] = None,
+                 instance_id: Optional[str] = None):
+        """
+        :param initial_data: 初始数据，作为只读的底层共享，不复制
+        :param history_limit: 最多保留的更新记录数，None表示不限制
+        :param spill_threshold: 估计大小超过该字节数的节点输出写入临时文件，None表示不溢出
+        :param blob_store: 溢出数据的存储，默认使用临时目录
+        :param instance_id: 实例ID，默认随机生成；继续执行中断的实例时传入原ID
+        """
+        self.blobs = blob_store or (BlobStore() if spill_threshold else None)
+        self.data = ContextData({}, initial_data, blobs=self.blobs) if initial_data is not None \
+            else ContextData({}, blobs=self.blobs)
+        self.history_limit = history_limit
+        self.execution_history = deque(maxlen=history_limit) if history_limit is not None else []
+        self.update_count = 0
+        self.spill_threshold = spill_threshold
+        self.errors = []
+        # 命中结果缓存、未实际执行的节点
+        self.cached_nodes = []
+        self.start_time = datetime.now()
+        self.instance_id = instance_id or str(uuid.uuid4())  # 新增实例ID
+
+    def _spill(self, value: Any) -> Any:
+        if not self.spill_threshold or isinstance(value, BlobRef):
+            return value
+        size = estimate_size(value, self.spill_threshold)
+        if size <= self.spill_threshold:
+            return value
+        try:
+            return self.blobs.put(value)
+        except Exception as e:
+            logger.debug(f"节点输出无法序列化，保留在内存中: {e}")
+            return value
+
+    def update(self, new_data: Dict[str, Any]):
+        """更新上下文数据"""
+        if new_data:
+            new_data = {key: self._spill(value) for key, value in new_data.items()}
+            self.data.update(new_data)
+            self.update_count += 1
+            if self.history_limit != 0:
+                self.execution_history.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'data_update': new_data
+                })
+
+    def get(self, key: str, default=None):
+        """获取上下文数据"""
+        return self.data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """设置上下文数据"""
+        self.data[key] = self._spill(value)
+
+    def add_error(self, error: Exception, node_id: str):
+        """添加错误信息"""
+        self.errors.append({
+            'node_id': node_id,
+            'error': str(error),
+            'timestamp': datetime.now().isoformat(),
+            'traceback': traceback.format_exc()
+        })
+
+    def get_execution_summary(self) -> Dict[str, Any]:
+        """获取执行摘要"""
+        return {
+            'start_time': self.start_time.isoformat(),
+            'end_time': datetime.now().isoformat(),
+            'total_updates': self.update_count,
+            'total_errors': len(self.errors),
+            'context': self.data.to_dict()
+        }
+
+    def close(self):
+        """删除溢出的临时文件"""
+        if self.blobs is not None:
+            self.blobs.close()
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 实例状态
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+# 节点状态：done 执行成功；failed 以continue策略失败；skipped 被跳过
+NODE_STATUSES = ('done', 'failed', 'skipped')
+
+# 这些类型的节点有副作用或代价高，完成后立即落盘，其余节点批量写入
+DEFAULT_FLUSH_PREFIXES = ('action/',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    workflow TEXT,
+    fingerprint TEXT,
+    status TEXT NOT NULL,
+    initial_context BLOB,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node_results (
+    instance_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    output BLOB,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (instance_id, node_id)
+);
+"""
+
+
+@dataclass
+class NodeRecord:
+    """一个已完成节点的持久化记录"""
+    node_id: str
+    status: str
+    output: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class InstanceRecord:
+    """一个工作流实例的持久化状态"""
+    instance_id: str
+    workflow: Optional[str]
+    fingerprint: Optional[str]
+    status: str
+    initial_context: Optional[Dict[str, Any]] = None
+    # 按完成顺序排列
+    nodes: List[NodeRecord] = field(default_factory=list)
+
+
+def _dumps(value: Any) -> Optional[bytes]:
+    """序列化节点输出，无法序列化时返回None（恢复时该节点会重新执行）"""
+    try:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.warning(f"节点输出无法序列化，恢复时将重新执行: {e}")
+        return None
+
+
+class WorkflowStore:
+    """
+    工作流检查点存储（SQLite，WAL模式）：按实例ID记录每个节点的完成状态和输出，
+    进程中断后可从已完成节点的前沿继续执行。节点记录先缓存在内存中，
+    达到批量大小、超过刷新间隔或遇到有副作用的节点时一次事务写入
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.5,
+                 flush_prefixes: Sequence[str] = DEFAULT_FLUSH_PREFIXES, synchronous: str = 'NORMAL'):
+        """
+        :param path: 数据库文件路径
+        :param batch_size: 缓存的节点记录达到该数量时写入
+        :param flush_interval: 节点记录最长缓存时间（秒）
+        :param flush_prefixes: 完成后立即写入的节点类型前缀
+        :param synchronous: SQLite同步级别，FULL在系统崩溃时也不丢数据，NORMAL只保证进程崩溃不丢数据
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.flush_prefixes = tuple(flush_prefixes)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(_SCHEMA)
+        self._pending: List[Tuple] = []
+        self._seq = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = threading.Lock()
+        row = self._conn.execute('SELECT MAX(seq) FROM node_results').fetchone()
+        self._seq = row[0] or 0
+
+    def begin(self, instance_id: str, workflow: Optional[str], fingerprint: Optional[str],
+              initial_context: Optional[Dict[str, Any]]):
+        """登记新实例，已存在时只更新状态为运行中"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO instances (instance_id, workflow, fingerprint, status, initial_context, created_at, '
+                'updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(instance_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at',
+                (instance_id, workflow, fingerprint, RUNNING, _dumps(initial_context), now, now),
+            )
+
+    def record(self, instance_id: str, node_id: str, status: str, output: Optional[Dict[str, Any]] = None,
+               node_type: Optional[str] = None):
+        """记录节点完成，有副作用的节点立即写入，其余批量写入"""
+        if status not in NODE_STATUSES:
+            raise ValueError(f"无效的节点状态: {status}")
+        data = _dumps(output) if output is not None else None
+        if output is not None and data is None:
+            return
+        with self._lock:
+            self._seq += 1
+            self._pending.append((instance_id, node_id, self._seq, status, data, time.time()))
+            urgent = len(self._pending) >= self.batch_size or (
+                node_type is not None and node_type.startswith(self.flush_prefixes))
+        if urgent:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """在事件循环中定时写入，保证缓存的记录最多延迟flush_interval"""
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """把缓存的节点记录在一个事务中写入"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO node_results (instance_id, node_id, seq, status, output, finished_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', pending)
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                self._pending = pending + self._pending
+                raise
+
+    def finish(self, instance_id: str, status: str):
+        """实例结束：写入缓存的记录并更新实例状态"""
+        self.flush()
+        with self._lock:
+            self._conn.execute('UPDATE instances SET status = ?, updated_at = ? WHERE instance_id = ?',
+                               (status, time.time(), instance_id))
+
+    def load(self, instance_id: str) -> Optional[InstanceRecord]:
+        """读取实例及其已完成的节点，不存在时返回None"""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT workflow, fingerprint, status, initial_context FROM instances WHERE instance_id = ?',
+                (instance_id,)).fetchone()
+            if row is None:
+                return None
+            nodes = self._conn.execute(
+                'SELECT node_id, status, output FROM node_results WHERE instance_id = ? ORDER BY seq',
+                (instance_id,)).fetchall()
+        workflow, fingerprint, status, initial_context = row
+        return InstanceRecord(
+            instance_id=instance_id,
+            workflow=workflow,
+            fingerprint=fingerprint,
+            status=status,
+            initial_context=pickle.loads(initial_context) if initial_context is not None else None,
+            nodes=[NodeRecord(node_id, node_status, pickle.loads(output) if output is not None else None)
+                   for node_id, node_status, output in nodes],
+        )
+
+    def list_instances(self, status: Optional[str] = None) -> List[str]:
+        """按创建时间列出实例ID，可按状态过滤（如找出未完成的实例）"""
+        self.flush()
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute('SELECT instance_id FROM instances ORDER BY created_at').fetchall()
+            else:
+                rows = self._conn.execute('SELECT instance_id FROM instances WHERE status = ? ORDER BY created_at',
+                                          (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, instance_id: str):
+        self.flush()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM node_results WHERE instance_id = ?', (instance_id,))
+            self._conn.execute('DELETE FROM instances WHERE instance_id = ?', (instance_id,))
+            self._conn.execute('COMMIT')
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM instances GROUP BY status').fetchall()
+        return {'instances': dict(rows), 'pending_records': len(self._pending), 'path': self.path}
+
+    def __repr__(self) -> str:
+        return f"WorkflowStore({json.dumps(self.path)})"
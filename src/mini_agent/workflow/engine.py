@@ -1,104 +1,83 @@
 import logging
 import traceback
 import json
-import re
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from collections import defaultdict
 import asyncio
-import uuid
+
+from mini_agent.workflow.context import WorkflowContext
+from mini_agent.workflow.durable import COMPLETED, FAILED, NodeRecord, WorkflowStore
+from mini_agent.workflow.expressions import evaluate
+from mini_agent.workflow.memo import NodeMemo
+from mini_agent.workflow.plan import CompiledEdge, CompiledNode, WorkflowPlan, get_plan
+from mini_agent.workflow.template import render_template
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class WorkflowContext:
-    """工作流上下文管理器"""
-    
-    def __init__(self, initial_data: Optional[Dict[str, Any]] = None):
-        self.data = initial_data or {}
-        self.execution_history = []
-        self.errors = []
-        self.start_time = datetime.now()
-        self.instance_id = str(uuid.uuid4())  # 新增实例ID
-    
-    def update(self, new_data: Dict[str, Any]):
-        """更新上下文数据"""
-        if new_data:
-            self.data.update(new_data)
-            self.execution_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'data_update': new_data
-            })
-    
-    def get(self, key: str, default=None):
-        """获取上下文数据"""
-        return self.data.get(key, default)
-    
-    def set(self, key: str, value: Any):
-        """设置上下文数据"""
-        self.data[key] = value
-    
-    def add_error(self, error: Exception, node_id: str):
-        """添加错误信息"""
-        self.errors.append({
-            'node_id': node_id,
-            'error': str(error),
-            'timestamp': datetime.now().isoformat(),
-            'traceback': traceback.format_exc()
-        })
-    
-    def get_execution_summary(self) -> Dict[str, Any]:
-        """获取执行摘要"""
-        return {
-            'start_time': self.start_time.isoformat(),
-            'end_time': datetime.now().isoformat(),
-            'total_updates': len(self.execution_history),
-            'total_errors': len(self.errors),
-            'context': self.data
-        }
-
 class WorkflowEngine:
-    def __init__(self, workflow_def: Dict[str, Any], node_registry: Dict[str, Any]):
-        self.workflow = workflow_def
+    def __init__(self, workflow_def: Union[Dict[str, Any], WorkflowPlan], node_registry: Dict[str, Any],
+                 max_parallelism: int = 16, node_type_limits: Optional[Dict[str, int]] = None,
+                 history_limit: Optional[int] = None, spill_threshold: Optional[int] = None,
+                 store: Optional[WorkflowStore] = None, memo: Optional[NodeMemo] = None):
+        """
+        :param workflow_def: 工作流定义或已编译的执行计划；相同定义只编译一次
+        :param node_registry: 节点类型 -> 节点执行器
+        :param max_parallelism: 同时执行的节点数上限
+        :param node_type_limits: 按节点类型限制同时执行的节点数，如 {'action/ai_agent': 2}
+        :param history_limit: 上下文最多保留的更新记录数，None表示不限制
+        :param spill_threshold: 估计大小超过该字节数的节点输出写入临时文件，None表示不溢出
+        :param store: 检查点存储，设置后记录每个节点的完成状态和输出，中断的实例可按实例ID继续执行
+        :param memo: 节点结果缓存，只对定义中设置了 memoize 的节点生效
+        """
         self.node_registry = node_registry
-        self.context = WorkflowContext()
-        self.nodes = {node['id']: node for node in workflow_def.get('nodes', [])}
-        self.connections = workflow_def.get('connections', [])
+        if isinstance(workflow_def, WorkflowPlan):
+            self.plan = workflow_def
+            self.workflow = {
+                'name': workflow_def.name,
+                'nodes': list(workflow_def.definitions.values()),
+                'connections': list(workflow_def.connections),
+            }
+        else:
+            self.plan = get_plan(workflow_def, node_registry)
+            self.workflow = workflow_def
+        self.history_limit = history_limit
+        self.spill_threshold = spill_threshold
+        self.store = store
+        self.memo = memo
+        # 最近一次执行的上下文；每次执行都使用新的上下文，实例之间互不影响
+        self.context = self.new_context()
+        # 节点ID -> 节点定义（只读）
+        self.nodes = self.plan.definitions
+        self.connections = self.workflow.get('connections', [])
         self.max_retries = 3
         self.retry_delay = 1  # 秒
+        self.max_parallelism = max(1, max_parallelism)
+        self.node_type_limits = dict(node_type_limits or {})
+        # 最近一次执行中被跳过的节点
+        self.skipped_nodes: List[str] = []
         
         # 验证工作流定义
         self._validate_workflow()
+
+    def new_context(self, instance_id: Optional[str] = None) -> WorkflowContext:
+        """创建一次执行使用的上下文"""
+        return WorkflowContext(history_limit=self.history_limit, spill_threshold=self.spill_threshold,
+                               instance_id=instance_id)
     
     def _validate_workflow(self):
-        """验证工作流定义"""
-        if not self.nodes:
-            raise ValueError("工作流必须包含至少一个节点")
-        
-        # 检查节点类型是否已注册
-        for node_id, node in self.nodes.items():
-            node_type = node.get('type')
-            if node_type not in self.node_registry:
-                raise ValueError(f"未注册的节点类型: {node_type} (节点: {node_id})")
-        
-        # 检查连接的有效性
-        node_ids = set(self.nodes.keys())
-        for conn in self.connections:
-            if conn.get('from') not in node_ids:
-                raise ValueError(f"连接中的源节点不存在: {conn.get('from')}")
-            if conn.get('to') not in node_ids:
-                raise ValueError(f"连接中的目标节点不存在: {conn.get('to')}")
+        """验证工作流定义（结构、连接和环在编译时已检查，这里检查节点类型是否已注册）"""
+        for node_id, node in self.plan.nodes.items():
+            if node.type not in self.node_registry:
+                raise ValueError(f"未注册的节点类型: {node.type} (节点: {node_id})")
 
     def find_start_nodes(self) -> List[Dict[str, Any]]:
         """查找所有起始节点（没有前驱的节点）"""
-        node_ids = set(self.nodes.keys())
-        to_ids = set(conn['to'] for conn in self.connections)
-        start_ids = node_ids - to_ids
-        
-        if not start_ids:
+        if not self.plan.start_ids:
             raise Exception('未找到起始节点')
         
-        return [self.nodes[node_id] for node_id in start_ids]
+        return [self.nodes[node_id] for node_id in self.plan.start_ids]
 
     def get_node_executor(self, node_type: str):
         """获取节点执行器"""
@@ -121,69 +100,68 @@ class WorkflowEngine:
 
     def _process_template(self, template: str, context: Dict[str, Any]) -> str:
         """处理模板变量替换"""
-        if not isinstance(template, str):
-            return template
-        
-        def replace_var(match):
-            var_path = match.group(1).strip()
-            keys = var_path.split('.')
-            value = context
-            try:
-                for key in keys:
-                    value = value[key]
-                return str(value)
-            except (KeyError, TypeError):
-                return match.group(0)
-        
-        return re.sub(r'\{\{([^}]+)\}\}', replace_var, template)
+        return render_template(template, context)
 
     def find_next_nodes(self, current_node: Dict[str, Any], result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """查找下一个要执行的节点，支持条件分支"""
         next_nodes = []
         
-        for conn in self.connections:
-            if conn['from'] == current_node['id']:
-                condition = conn.get('condition')
-                
-                # 如果没有条件或条件为真，则添加到下一个节点列表
-                if not condition or self.eval_condition(condition, result):
-                    next_node = self.nodes[conn['to']]
-                    next_nodes.append(next_node)
+        for edge in self.plan.outgoing[current_node['id']]:
+            # 如果没有条件或条件为真，则添加到下一个节点列表
+            if self._edge_active(edge, result):
+                next_nodes.append(self.nodes[edge.target])
         
         return next_nodes
 
+    def _edge_active(self, edge: CompiledEdge, result: Dict[str, Any]) -> bool:
+        """连接没有条件或条件为真时有效"""
+        if edge.condition is None:
+            return True
+        if edge.code is not None:
+            # 不含模板变量的条件使用编译时生成的代码对象
+            try:
+                return bool(evaluate(edge.code, result))
+            except Exception as e:
+                logger.warning(f"条件评估失败: {edge.condition}, 错误: {str(e)}")
+                return False
+        return self.eval_condition(edge.condition, result)
+
     def eval_condition(self, condition: str, context: Dict[str, Any]) -> bool:
         """评估条件表达式"""
         try:
-            # 处理模板变量
+            # 处理模板变量，替换后的表达式同样按文本缓存编译结果
             processed_condition = self._process_template(condition, context)
-            
-            # 安全地执行表达式，添加布尔值到上下文
-            eval_context = context.copy()
-            eval_context.update({"True": True, "False": False})
-            return eval(processed_condition, {"__builtins__": {}}, eval_context)
+            return bool(evaluate(processed_condition, context))
         except Exception as e:
             logger.warning(f"条件评估失败: {condition}, 错误: {str(e)}")
             return False
 
-    def _log_node_input(self, node_id: str, node_type: str, input_data: Dict[str, Any]):
+    def _log_node_input(self, instance_id: str, node_id: str, node_type: str, input_data: Dict[str, Any]):
         """记录节点输入"""
-        logger.info(f"[实例ID: {self.context.instance_id}] 节点执行开始 - ID: {node_id}, 类型: {node_type}")
-        logger.debug(f"[实例ID: {self.context.instance_id}] 节点输入数据: {json.dumps(input_data, ensure_ascii=False)}")
+        logger.info(f"[实例ID: {instance_id}] 节点执行开始 - ID: {node_id}, 类型: {node_type}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[实例ID: {instance_id}] 节点输入数据: {json.dumps(dict(input_data), ensure_ascii=False, default=str)}")
 
-    def _log_node_output(self, node_id: str, output_data: Dict[str, Any]):
+    def _log_node_output(self, instance_id: str, node_id: str, output_data: Dict[str, Any]):
         """记录节点输出"""
-        logger.info(f"[实例ID: {self.context.instance_id}] 节点执行成功 - ID: {node_id}")
-        logger.debug(f"[实例ID: {self.context.instance_id}] 节点输出数据: {json.dumps(output_data, ensure_ascii=False)}")
+        logger.info(f"[实例ID: {instance_id}] 节点执行成功 - ID: {node_id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[实例ID: {instance_id}] 节点输出数据: {json.dumps(output_data, ensure_ascii=False, default=str)}")
 
-    def _log_node_error(self, node_id: str, node_type: str, error: Exception):
+    def _log_node_error(self, instance_id: str, node_id: str, node_type: str, error: Exception):
         """记录节点错误"""
-        logger.error(f"[实例ID: {self.context.instance_id}] 节点执行失败 - ID: {node_id}, 类型: {node_type}")
-        logger.error(f"[实例ID: {self.context.instance_id}] 错误信息: {str(error)}")
-        logger.debug(f"[实例ID: {self.context.instance_id}] 错误堆栈: {traceback.format_exc()}")
+        logger.error(f"[实例ID: {instance_id}] 节点执行失败 - ID: {node_id}, 类型: {node_type}")
+        logger.error(f"[实例ID: {instance_id}] 错误信息: {str(error)}")
+        logger.debug(f"[实例ID: {instance_id}] 错误堆栈: {traceback.format_exc()}")
 
-    async def execute_node_with_retry(self, node: Dict[str, Any]) -> Dict[str, Any]:
-        """带重试机制的节点执行"""
+    async def execute_node_with_retry(self, node: Dict[str, Any], context: Optional[WorkflowContext] = None,
+                                      data: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        带重试机制的节点执行
+        :param data: 传给节点的上下文数据，默认为context.data
+        """
+        context = context or self.context
+        data = context.data if data is None else data
         node_id = node['id']
         node_type = node['type']
         last_exception = None
@@ -194,7 +172,7 @@ class WorkflowEngine:
                 if not node_executor:
                     raise Exception(f'未注册节点类型: {node_type}')
                 # 执行节点
-                result = await node_executor.execute(node, self.context.data)
+                result = await node_executor.execute(node, data)
                 return result
             except Exception as e:
                 last_exception = e
@@ -209,12 +187,39 @@ class WorkflowEngine:
         # 理论上不会到这里，兜底返回空dict
         return {}
 
-    async def execute_workflow(self, initial_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """执行完整的工作流"""
+    async def execute_workflow(self, initial_context: Optional[Dict[str, Any]] = None,
+                               context: Optional[WorkflowContext] = None,
+                               instance_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        执行完整的工作流，每次执行使用独立的上下文，同一个引擎可以并发执行多个实例
+        :param initial_context: 初始数据
+        :param context: 指定本次执行的上下文，默认新建
+        :param instance_id: 实例ID；设置了检查点存储且该实例已有记录时，恢复已完成节点的输出，
+                            只执行尚未完成的节点（初始数据默认使用记录中的值）
+        """
+        restored = self._load_checkpoint(instance_id)
+        if restored is not None and initial_context is None:
+            initial_context = restored.initial_context
+        if context is None:
+            context = self.new_context(instance_id)
+        elif instance_id is not None:
+            context.instance_id = instance_id
+        self.context = context
+        skipped_nodes: List[str] = []
+        self.skipped_nodes = skipped_nodes
+        restored_nodes = restored.nodes if restored is not None else []
         try:
             # 初始化上下文
             if initial_context:
-                self.context.update(initial_context)
+                context.update(initial_context)
+            if self.store is not None:
+                self.store.begin(context.instance_id, self.workflow.get('name'), self.plan.fingerprint,
+                                 initial_context)
+            for record in restored_nodes:
+                if record.status == 'done':
+                    context.update({record.node_id: record.output})
+                elif record.status == 'skipped':
+                    skipped_nodes.append(record.node_id)
             
             logger.info(f"工作流开始执行: {self.workflow.get('name', '未命名工作流')}")
             
@@ -223,45 +228,187 @@ class WorkflowEngine:
             if not start_nodes:
                 raise Exception("未找到起始节点")
             
-            # 执行起始节点
-            for start_node in start_nodes:
-                await self._execute_node_and_continue(start_node)
+            # 并发调度执行所有节点
+            await self._schedule(start_nodes, context, skipped_nodes, restored_nodes)
+            if self.store is not None:
+                self.store.finish(context.instance_id, COMPLETED)
             
             # 生成执行摘要
-            summary = self.context.get_execution_summary()
+            summary = context.get_execution_summary()
             logger.info(f"工作流执行完成: {self.workflow.get('name', '未命名工作流')}")
-            logger.info(f"执行摘要: {summary}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"执行摘要: {summary}")
             
             return {
                 'success': True,
-                'context': self.context.data,
+                'context': summary['context'],
                 'summary': summary,
-                'errors': self.context.errors
+                'errors': context.errors,
+                'skipped_nodes': skipped_nodes,
+                'restored_nodes': [record.node_id for record in restored_nodes],
+                'cached_nodes': context.cached_nodes,
+                'instance_id': context.instance_id,
+                # context中溢出的值为BlobRef，用blobs.resolve读取；结果持有存储，临时文件在blobs.close()或结果被回收后删除
+                'blobs': context.blobs
             }
             
         except Exception as e:
             logger.error(f"工作流执行过程中发生错误: {str(e)}")
-            self.context.add_error(e, 'workflow_engine')
+            context.add_error(e, 'workflow_engine')
+            if self.store is not None:
+                self.store.finish(context.instance_id, FAILED)
             
             return {
                 'success': False,
                 'error': str(e),
-                'context': self.context.data,
-                'summary': self.context.get_execution_summary(),
-                'errors': self.context.errors
+                'context': context.data.to_dict(),
+                'summary': context.get_execution_summary(),
+                'errors': context.errors,
+                'instance_id': context.instance_id,
+                'blobs': context.blobs
             }
 
-    async def _execute_node_and_continue(self, node: Dict[str, Any]):
-        """执行单个节点并继续后续节点"""
+    def _load_checkpoint(self, instance_id: Optional[str]):
+        """读取实例的检查点，没有存储或没有记录时返回None"""
+        if self.store is None or instance_id is None:
+            return None
+        record = self.store.load(instance_id)
+        if record is None:
+            return None
+        if record.fingerprint and self.plan.fingerprint and record.fingerprint != self.plan.fingerprint:
+            raise ValueError(f"实例 {instance_id} 的工作流定义已变更，无法继续执行")
+        record.nodes = [node for node in record.nodes if node.node_id in self.plan.nodes]
+        logger.info(f"[实例ID: {instance_id}] 从检查点恢复 {len(record.nodes)} 个已完成节点")
+        return record
+
+    def _checkpoint(self, context: WorkflowContext, node_id: str, status: str,
+                    output: Optional[Dict[str, Any]] = None, node_type: Optional[str] = None):
+        """记录节点完成状态，检查点写入失败不影响执行"""
+        if self.store is None:
+            return
+        try:
+            self.store.record(context.instance_id, node_id, status, output, node_type)
+        except Exception as e:
+            logger.warning(f"[实例ID: {context.instance_id}] 节点 {node_id} 检查点写入失败: {e}")
+
+    async def _schedule(self, start_nodes: List[Dict[str, Any]], context: WorkflowContext,
+                        skipped_nodes: List[str], restored: Optional[List[NodeRecord]] = None):
+        """
+        就绪队列调度：节点按汇合策略在前驱完成后执行且只执行一次，互不依赖的分支并发执行
+        条件为假、节点失败或被跳过的连接视为失效，所有入边都失效的节点被跳过，并继续向下游传播
+        任一节点以stop策略失败时取消其余节点并抛出异常
+        :param restored: 检查点中已完成的节点，不再执行，只按其输出向下游传播（从前沿继续）
+        """
+        parallelism = asyncio.Semaphore(self.max_parallelism)
+        type_limits = {node_type: asyncio.Semaphore(max(1, limit))
+                       for node_type, limit in self.node_type_limits.items()}
+        running: Dict[asyncio.Task, str] = {}
+        # 每个节点已到达的入边数，以及其中有效的入边数
+        arrived: Dict[str, int] = defaultdict(int)
+        activated: Dict[str, int] = defaultdict(int)
+        # 已开始执行或已跳过的节点
+        settled: Set[str] = set()
+
+        def start(node: Dict[str, Any]):
+            settled.add(node['id'])
+            task = asyncio.create_task(self._run_node(node, context, parallelism, type_limits.get(node['type'])))
+            running[task] = node['id']
+
+        def propagate(edges: List[Tuple[str, bool]]):
+            """处理到达的入边，启动满足汇合条件的节点，跳过不可能满足条件的节点"""
+            while edges:
+                target_id, active = edges.pop()
+                if target_id in settled:
+                    continue
+                arrived[target_id] += 1
+                if active:
+                    activated[target_id] += 1
+                node = self.plan.nodes[target_id]
+                decision = self._join_decision(node, activated[target_id], arrived[target_id])
+                if decision is None:
+                    continue
+                if decision:
+                    start(node.definition)
+                else:
+                    settled.add(target_id)
+                    skipped_nodes.append(target_id)
+                    self._checkpoint(context, target_id, 'skipped')
+                    logger.info(f"[实例ID: {context.instance_id}] 节点 {target_id} 的前驱分支均未激活，跳过")
+                    edges.extend((edge.target, False) for edge in self.plan.outgoing[target_id])
+
+        restored = restored or []
+        settled.update(record.node_id for record in restored)
+        for record in restored:
+            result = record.output if record.status == 'done' else None
+            propagate([(edge.target, result is not None and self._edge_active(edge, result))
+                       for edge in self.plan.outgoing[record.node_id]])
+        for node in start_nodes:
+            if node['id'] not in settled:
+                start(node)
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    result = task.result()
+                    propagate([(edge.target, result is not None and self._edge_active(edge, result))
+                               for edge in self.plan.outgoing[node_id]])
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+    @staticmethod
+    def _join_decision(node: CompiledNode, activated: int, arrived: int) -> Optional[bool]:
+        """
+        根据汇合策略判断节点状态
+        :return: True 执行，False 跳过，None 继续等待
+        """
+        if node.join == 'all':
+            # 所有入边都到达后，只要有一条有效就执行
+            if arrived < node.in_degree:
+                return None
+            return activated > 0
+        required = 1 if node.join == 'any' else node.quorum
+        if activated >= required:
+            return True
+        if activated + node.in_degree - arrived < required:
+            return False
+        return None
+
+    async def _run_node(self, node: Dict[str, Any], context: WorkflowContext, parallelism: asyncio.Semaphore,
+                        type_limit: Optional[asyncio.Semaphore]) -> Optional[Dict[str, Any]]:
+        """在并发限制下执行节点，返回节点输出"""
+        # 先获取类型配额，避免等待类型配额时占用全局配额
+        if type_limit is not None:
+            async with type_limit, parallelism:
+                return await self._execute_node(node, context)
+        async with parallelism:
+            return await self._execute_node(node, context)
+
+    async def _execute_node(self, node: Dict[str, Any], context: WorkflowContext) -> Optional[Dict[str, Any]]:
+        """执行单个节点，返回节点输出；以continue策略失败时返回None"""
         node_id = node['id']
         node_type = node['type']
         
         # 记录节点输入
-        self._log_node_input(node_id, node_type, self.context.data)
+        self._log_node_input(context.instance_id, node_id, node_type, context.data)
         
         try:
-            # 执行节点（带重试）
-            result = await self.execute_node_with_retry(node)
+            memoize = self.memo is not None and node.get('memoize')
+            result = self.memo.get(node, context.data) if memoize else None
+            if result is not None:
+                context.cached_nodes.append(node_id)
+                logger.info(f"[实例ID: {context.instance_id}] 节点 {node_id} 命中缓存，跳过执行")
+            elif memoize:
+                # 记录节点读取的上下文键，作为缓存键的一部分
+                data = self.memo.track(context.data)
+                result = await self.execute_node_with_retry(node, context, data)
+                self.memo.put(node, data, result)
+            else:
+                # 执行节点（带重试）
+                result = await self.execute_node_with_retry(node, context)
             
             # 处理数据映射
             data_mapping = node.get('dataMapping', {})
@@ -270,29 +417,29 @@ class WorkflowEngine:
                 result.update(mapped_result)
             
             # 记录节点输出
-            self._log_node_output(node_id, result)
+            self._log_node_output(context.instance_id, node_id, result)
             
             # 更新上下文，所有节点输出都加命名空间
-            self.context.update({node_id: result})
+            context.update({node_id: result})
+            self._checkpoint(context, node_id, 'done', result, node_type)
             
-            # 查找并执行下一个节点
-            next_nodes = self.find_next_nodes(node, result)
-            for next_node in next_nodes:
-                await self._execute_node_and_continue(next_node)
+            return result
                 
         except Exception as e:
             # 记录错误
-            self._log_node_error(node_id, node_type, e)
-            self.context.add_error(e, node_id)
+            self._log_node_error(context.instance_id, node_id, node_type, e)
+            context.add_error(e, node_id)
             
             # 根据配置决定是否继续执行
             error_handling = node.get('errorHandling', 'stop')
             if error_handling == 'stop':
-                logger.info(f"[实例ID: {self.context.instance_id}] 节点 {node_id} 执行失败，工作流终止")
+                logger.info(f"[实例ID: {context.instance_id}] 节点 {node_id} 执行失败，工作流终止")
                 raise e
             elif error_handling == 'continue':
-                logger.warning(f"[实例ID: {self.context.instance_id}] 节点 {node_id} 执行失败，但继续执行后续节点")
+                logger.warning(f"[实例ID: {context.instance_id}] 节点 {node_id} 执行失败，但继续执行后续节点")
+                self._checkpoint(context, node_id, 'failed', None, node_type)
             # 可以添加更多错误处理策略
+            return None
 
     async def execute(self, initial_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """兼容旧接口的执行方法"""
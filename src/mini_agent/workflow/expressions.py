@@ -0,0 +1,89 @@
+import ast
+from collections import ChainMap
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Mapping, Union
+
+# 表达式中可直接使用的常量，兼容JSON风格的写法
+CONSTANTS = {'true': True, 'false': False, 'null': None, 'True': True, 'False': False, 'None': None}
+
+# 允许出现的语法节点：字面量、变量、下标/属性访问、运算、比较和条件表达式，不允许函数调用
+# 幂运算和左移可以用很短的表达式（如 9**9**9**9、1 << 10**10）构造极大的整数，阻塞事件循环或耗尽内存，不允许使用；
+# 乘法用于字符串、列表等序列时（如 'a' * 10**11）同样如此，运行时检查结果长度
+_ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load,
+    ast.Attribute, ast.Subscript, ast.Slice,
+    ast.List, ast.Tuple, ast.Set, ast.Dict,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd, ast.Invert,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.BitAnd, ast.BitOr, ast.BitXor, ast.RShift,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.Is, ast.IsNot, ast.In, ast.NotIn,
+    ast.IfExp,
+)
+
+_GLOBALS = {'__builtins__': {}}
+# 序列重复运算结果的长度上限
+MAX_SEQUENCE_LENGTH = 1000000
+_SEQUENCE_TYPES = (str, bytes, list, tuple)
+# 乘法改写为调用该名称的函数；用户表达式中不允许双下划线变量，求值时放在最内层作用域，上下文中的同名键无法覆盖
+_MULTIPLY = '__multiply__'
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    """乘法，序列重复的结果长度不能超过MAX_SEQUENCE_LENGTH"""
+    for sequence, count in ((left, right), (right, left)):
+        if isinstance(sequence, _SEQUENCE_TYPES) and isinstance(count, int) \
+                and len(sequence) * count > MAX_SEQUENCE_LENGTH:
+            raise ValueError(f"序列重复后的长度超过上限 {MAX_SEQUENCE_LENGTH}")
+    return left * right
+
+
+_HELPERS = {_MULTIPLY: _multiply}
+
+
+class _GuardMultiply(ast.NodeTransformer):
+    """把 a * b 改写为 __multiply__(a, b)"""
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult):
+            return node
+        call = ast.Call(func=ast.Name(id=_MULTIPLY, ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return ast.copy_location(call, node)
+
+
+def _validate(tree: ast.AST, source: str):
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"表达式中不允许使用 {type(node).__name__}: {source}")
+        if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            raise ValueError(f"表达式中不允许访问下划线属性 {node.attr}: {source}")
+        if isinstance(node, ast.Name) and node.id.startswith('__'):
+            raise ValueError(f"表达式中不允许使用变量 {node.id}: {source}")
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(source: str) -> CodeType:
+    """
+    解析并校验表达式，编译为代码对象，相同表达式只编译一次
+    :raises ValueError: 语法错误或使用了不允许的语法
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {source}") from e
+    _validate(tree, source)
+    tree = ast.fix_missing_locations(_GuardMultiply().visit(tree))
+    return compile(tree, '<expression>', 'eval')
+
+
+def evaluate(expression: Union[str, CodeType], *scopes: Mapping[str, Any]) -> Any:
+    """
+    求值表达式，变量按scopes的顺序逐层查找，不复制上下文
+    :param expression: 表达式原文或compile_expression的结果
+    :param scopes: 变量作用域，靠前的优先
+    """
+    code = expression if isinstance(expression, CodeType) else compile_expression(expression)
+    return eval(code, _GLOBALS, ChainMap(_HELPERS, *scopes, CONSTANTS))
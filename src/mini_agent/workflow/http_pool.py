@@ -0,0 +1,267 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_TYPES = ('text', 'json', 'jsonl', 'file')
+_CHUNK_SIZE = 64 * 1024
+# 无论响应是否声明Vary，这些请求头都会改变响应内容，计入缓存键
+_KEY_HEADERS = ('Authorization', 'Accept')
+
+
+def _header_values(headers: Dict[str, str], names) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """按名称（不区分大小写）取请求头的值"""
+    lowered = {str(k).lower(): str(v) for k, v in headers.items()}
+    return tuple((name.lower(), lowered.get(name.lower())) for name in names)
+
+
+class ResponseTooLarge(ValueError):
+    """响应体超过max_body_size"""
+
+
+class ResponseCache:
+    """条件请求缓存：按URL和影响响应的请求头保存ETag/Last-Modified和对应的结果，LRU淘汰"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (etag, last_modified, 结果, 大小, 响应Vary指定的请求头及其值)
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[str], Optional[str], Dict[str, Any], int, Tuple]]" = \
+            OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, etag: Optional[str], last_modified: Optional[str], result: Dict[str, Any], size: int,
+            vary: Tuple = ()):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._entries[key] = (etag, last_modified, result, size, vary)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class HttpClientPool:
+    """
+    进程内共享的HTTP连接池：每个事件循环一个ClientSession，连接保持长连接并按主机限制并发，
+    DNS结果缓存；支持响应体大小限制、流式写入文件、逐行解析JSON和条件请求缓存。
+    asyncio.run结束时会话随事件循环一起关闭；事件循环以其他方式关闭时，下次获取会话时清理
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8, keepalive_timeout: float = 60.0,
+                 dns_cache_ttl: int = 300, cache: Optional[ResponseCache] = None):
+        """
+        :param limit: 连接总数上限
+        :param limit_per_host: 每个主机的连接数上限
+        :param keepalive_timeout: 空闲连接保持时间（秒）
+        :param dns_cache_ttl: DNS缓存时间（秒）
+        :param cache: 条件请求缓存
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.cache = cache or ResponseCache()
+        # ClientSession绑定创建它的事件循环并强引用该循环，因此不能用弱引用字典按循环索引；
+        # id(loop) -> (loop, 会话, 守护任务)
+        self._sessions: Dict[int, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+
+    def session(self) -> aiohttp.ClientSession:
+        """当前事件循环的共享会话"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._prune_closed_loops()
+            entry = self._sessions.get(id(loop))
+            if entry is not None and entry[0] is loop and not entry[1].closed:
+                return entry[1]
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            guard = loop.create_task(self._close_on_shutdown(loop, session))
+            self._sessions[id(loop)] = (loop, session, guard)
+            return session
+
+    def _prune_closed_loops(self):
+        """丢弃事件循环已关闭的会话，调用方持有self._lock"""
+        for key, (loop, _, _) in list(self._sessions.items()):
+            if loop.is_closed():
+                del self._sessions[key]
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession):
+        """一直挂起，事件循环关闭前取消剩余任务时关闭会话"""
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            with self._lock:
+                entry = self._sessions.get(id(loop))
+                if entry is not None and entry[1] is session:
+                    del self._sessions[id(loop)]
+            await session.close()
+            raise
+
+    async def close(self):
+        """关闭当前事件循环的会话"""
+        with self._lock:
+            entry = self._sessions.pop(id(asyncio.get_running_loop()), None)
+        if entry is not None:
+            _, session, guard = entry
+            guard.cancel()
+            await session.close()
+
+    async def request(self, method: str, url: str, *, headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None, json_body: Any = None, timeout: float = 10,
+                      response_type: str = 'text', max_body_size: Optional[int] = None,
+                      download_path: Optional[str] = None, use_cache: bool = False) -> Dict[str, Any]:
+        """
+        发送请求
+        :param response_type: text 文本；json 解析为对象；jsonl 逐行解析为列表；file 流式写入文件
+        :param max_body_size: 响应体字节数上限，超过时抛出ResponseTooLarge
+        :param download_path: file模式的保存路径，默认写入临时文件
+        :param use_cache: GET请求使用ETag/Last-Modified条件请求，未修改时返回缓存的结果
+        """
+        if response_type not in RESPONSE_TYPES:
+            raise ValueError(f"无效的响应类型: {response_type}，可选 {', '.join(RESPONSE_TYPES)}")
+        method = method.upper()
+        headers = dict(headers or {})
+        cache_key = None
+        cached = None
+        if use_cache and method == 'GET' and response_type != 'file':
+            cache_key = (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())), response_type,
+                         _header_values(headers, _KEY_HEADERS))
+            cached = self.cache.get(cache_key)
+            # 缓存的响应按Vary区分请求头，这些请求头的值不同时不能复用
+            if cached is not None and _header_values(headers, [name for name, _ in cached[4]]) != cached[4]:
+                cached = None
+            if cached is not None:
+                etag, last_modified = cached[0], cached[1]
+                if etag:
+                    headers.setdefault('If-None-Match', etag)
+                if last_modified:
+                    headers.setdefault('If-Modified-Since', last_modified)
+
+        async with self.session().request(
+            method, url, headers=headers, json=json_body, params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            if resp.status == 304 and cached is not None:
+                # 返回副本，调用方修改结果不影响缓存
+                return {**copy.deepcopy(cached[2]), 'from_cache': True}
+            if max_body_size is not None and resp.content_length is not None and resp.content_length > max_body_size:
+                raise ResponseTooLarge(f"响应体 {resp.content_length} 字节，超过上限 {max_body_size}")
+            result: Dict[str, Any] = {"status": resp.status, "headers": dict(resp.headers)}
+            if response_type == 'file':
+                result["path"], result["size"] = await self._download(resp, max_body_size, download_path)
+                result["body"] = None
+                return result
+            if response_type == 'jsonl':
+                result["body"], size = await self._read_lines(resp, max_body_size)
+            else:
+                data = await self._read(resp, max_body_size)
+                size = len(data)
+                text = data.decode(resp.get_encoding())
+                result["body"] = json.loads(text) if response_type == 'json' else text
+        if cache_key is not None:
+            result["from_cache"] = False
+            etag, last_modified = resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+            vary = [name.strip() for name in resp.headers.get('Vary', '').split(',') if name.strip()]
+            if resp.status == 200 and (etag or last_modified) and '*' not in vary:
+                self.cache.put(cache_key, etag, last_modified, copy.deepcopy(result), size,
+                               _header_values(headers, vary))
+        return result
+
+    @staticmethod
+    def _check_size(size: int, max_body_size: Optional[int]):
+        if max_body_size is not None and size > max_body_size:
+            raise ResponseTooLarge(f"响应体超过上限 {max_body_size} 字节")
+
+    async def _read(self, resp: aiohttp.ClientResponse, max_body_size: Optional[int]) -> bytes:
+        if max_body_size is None:
+            return await resp.read()
+        data = bytearray()
+        async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+            data += chunk
+            self._check_size(len(data), max_body_size)
+        return bytes(data)
+
+    async def _read_lines(self, resp: aiohttp.ClientResponse, max_body_size: Optional[int]):
+        """边接收边解析JSON Lines，不缓存完整响应体"""
+        items = []
+        pending = b''
+        size = 0
+        async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+            size += len(chunk)
+            self._check_size(size, max_body_size)
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            items.extend(json.loads(line) for line in lines if line.strip())
+        if pending.strip():
+            items.append(json.loads(pending))
+        return items, size
+
+    async def _download(self, resp: aiohttp.ClientResponse, max_body_size: Optional[int],
+                        download_path: Optional[str]):
+        """流式写入文件，先写临时文件，完成后再改名"""
+        temporary = download_path is None
+        if temporary:
+            fd, download_path = tempfile.mkstemp(prefix='mini_agent_http_')
+            os.close(fd)
+        part_path = download_path + '.part'
+        size = 0
+        try:
+            with open(part_path, 'wb') as f:
+                async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+                    size += len(chunk)
+                    self._check_size(size, max_body_size)
+                    f.write(chunk)
+            os.replace(part_path, download_path)
+        except BaseException:
+            for path in (part_path, download_path if temporary else None):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            raise
+        return download_path, size
+
+
+_pool: Optional[HttpClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    """获取进程内共享的HTTP连接池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HttpClientPool()
+    return _pool
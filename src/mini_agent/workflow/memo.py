@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from mini_agent.workflow.context import BlobRef, ContextData
+
+logger = logging.getLogger(__name__)
+
+# 节点遍历了整个上下文时的依赖标记
+ALL_KEYS = '*'
+_MISSING = ('<missing>',)
+
+
+def _digest(value: Any) -> str:
+    """稳定的哈希：字典按键排序，无法序列化为JSON的对象按str处理"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class TrackedData(ContextData):
+    """记录节点读取了哪些上下文键及读取时的值，作为缓存键的输入"""
+
+    def __init__(self, *maps, blobs=None):
+        super().__init__(*maps, blobs=blobs)
+        # 键 -> 读取时的值（不存在时为_MISSING）
+        self.reads: Dict[str, Any] = {}
+
+    def _record(self, key):
+        if key in self.reads:
+            return
+        value = ContextData.raw(self, key, _MISSING)
+        if isinstance(value, BlobRef) and self.blobs is not None:
+            value = self.blobs.get(value)
+        self.reads[key] = value
+
+    def __getitem__(self, key):
+        self._record(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._record(key)
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self._record(key)
+        return super().get(key, default)
+
+    def raw(self, key, default=None):
+        self._record(key)
+        return super().raw(key, default)
+
+    def _record_all(self):
+        if ALL_KEYS in self.reads:
+            return
+        snapshot = self.to_dict()
+        if self.blobs is not None:
+            snapshot = {key: self.blobs.get(value) if isinstance(value, BlobRef) else value
+                        for key, value in snapshot.items()}
+        self.reads[ALL_KEYS] = snapshot
+
+    def __iter__(self):
+        self._record_all()
+        return super().__iter__()
+
+    def __len__(self):
+        self._record_all()
+        return super().__len__()
+
+
+class MemoryMemoBackend:
+    """进程内LRU缓存，按条目数和字节数淘汰"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (数据, 过期时间)
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, ttl: Optional[float] = None):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (data, time.time() + ttl if ttl else None)
+            self._bytes += len(data)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self):
+        pass
+
+
+class DiskMemoBackend:
+    """SQLite缓存，跨进程、跨次运行保留（如每天执行的工作流），按最近访问时间淘汰"""
+
+    def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = 1024 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, '
+            'expires_at REAL, accessed_at REAL NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS memo_accessed ON memo (accessed_at)')
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT data, expires_at FROM memo WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            data, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute('DELETE FROM memo WHERE key = ?', (key,))
+                return None
+            self._conn.execute('UPDATE memo SET accessed_at = ? WHERE key = ?', (now, key))
+            return data
+
+    def set(self, key: str, data: bytes, ttl: Optional[float] = None):
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO memo (key, data, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                    (key, data, len(data), now + ttl if ttl else None, now))
+                self._evict(now)
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def _evict(self, now: float):
+        """删除过期条目，超出上限时按最近访问时间淘汰"""
+        self._conn.execute('DELETE FROM memo WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memo').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed_count = removed_bytes = 0
+        victims = []
+        for key, size in self._conn.execute('SELECT key, size FROM memo ORDER BY accessed_at'):
+            if count - removed_count <= self.max_entries and total - removed_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            removed_count += 1
+            removed_bytes += size
+        self._conn.executemany('DELETE FROM memo WHERE key = ?', victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM memo')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class NodeMemo:
+    """
+    节点结果缓存：缓存键由节点类型、配置以及节点实际读取的上下文值计算。
+    首次执行时记录节点读取了哪些键（依赖），之后按这些键当前的值查找结果，
+    依赖没有变化的节点直接返回缓存的结果
+    """
+
+    def __init__(self, backend=None, default_ttl: Optional[float] = None):
+        """
+        :param backend: 存储后端，需提供 get(key)、set(key, data, ttl)，默认使用进程内LRU
+        :param default_ttl: 默认过期时间（秒），None表示不过期
+        """
+        self.backend = backend if backend is not None else MemoryMemoBackend()
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _node_digest(node: Dict[str, Any]) -> str:
+        return _digest([node.get('type'), node.get('config', {})])
+
+    def ttl(self, node: Dict[str, Any]) -> Optional[float]:
+        """节点的 memoize 配置可以是 true 或 {"ttl": 秒}"""
+        memoize = node.get('memoize')
+        if isinstance(memoize, dict):
+            return memoize.get('ttl', self.default_ttl)
+        return self.default_ttl
+
+    @staticmethod
+    def _key(node_digest: str, dependencies, values: Dict[str, Any]) -> str:
+        return 'result:' + _digest([node_digest, [[key, values.get(key, _MISSING)] for key in dependencies]])
+
+    def get(self, node: Dict[str, Any], data: ContextData) -> Optional[Dict[str, Any]]:
+        """按当前上下文查找缓存的结果，未命中时返回None"""
+        node_digest = self._node_digest(node)
+        try:
+            stored = self.backend.get('deps:' + node_digest)
+            if stored is not None:
+                dependencies = pickle.loads(stored)
+                probe = TrackedData(*data.maps, blobs=data.blobs)
+                for key in dependencies:
+                    if key == ALL_KEYS:
+                        probe._record_all()
+                    else:
+                        probe._record(key)
+                cached = self.backend.get(self._key(node_digest, dependencies, probe.reads))
+                if cached is not None:
+                    self.hits += 1
+                    return pickle.loads(cached)
+        except Exception as e:
+            logger.warning(f"节点 {node.get('id')} 读取缓存失败: {e}")
+        self.misses += 1
+        return None
+
+    def track(self, data: ContextData) -> TrackedData:
+        """包装上下文，记录节点执行时读取的键"""
+        return TrackedData(*data.maps, blobs=data.blobs)
+
+    def put(self, node: Dict[str, Any], tracked: TrackedData, result: Dict[str, Any]):
+        """保存结果；结果无法序列化或节点以 {'error': ...} 返回失败时不缓存"""
+        if not isinstance(result, dict) or 'error' in result:
+            return
+        node_digest = self._node_digest(node)
+        dependencies = sorted(tracked.reads, key=str)
+        ttl = self.ttl(node)
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            self.backend.set(self._key(node_digest, dependencies, tracked.reads), data, ttl)
+            self.backend.set('deps:' + node_digest, pickle.dumps(dependencies), ttl)
+        except Exception as e:
+            logger.warning(f"节点 {node.get('id')} 结果无法缓存: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+    def close(self):
+        self.backend.close()
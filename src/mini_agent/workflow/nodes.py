@@ -1,11 +1,11 @@
 import asyncio
-import aiohttp
-import json
 import re
+from collections import ChainMap
 from datetime import datetime
 from typing import Dict, Any, List
-from mini_agent.agent.agent import Agent
 from mini_agent.config.agent_config import AgentConfig
+from mini_agent.workflow.expressions import compile_expression, evaluate
+from mini_agent.workflow.template import render_template, render_value, resolve_value
 
 class BaseNode:
     @staticmethod
@@ -15,21 +15,7 @@ class BaseNode:
     @staticmethod
     def process_template(template: str, context: Dict[str, Any]) -> str:
         """处理模板变量替换"""
-        if not isinstance(template, str):
-            return template
-        
-        def replace_var(match):
-            var_path = match.group(1).strip()
-            keys = var_path.split('.')
-            value = context
-            try:
-                for key in keys:
-                    value = value[key]
-                return str(value)
-            except (KeyError, TypeError):
-                return match.group(0)
-        
-        return re.sub(r'\{\{([^}]+)\}\}', replace_var, template)
+        return render_template(template, context)
 
 # ==================== 触发器节点 ====================
 
@@ -81,26 +67,20 @@ class ActionHttpNode(BaseNode):
         
         # 处理模板变量
         if body:
-            body = BaseNode.process_template(json.dumps(body), context)
-            try:
-                body = json.loads(body)
-            except json.JSONDecodeError:
-                pass
+            body = render_value(body, context)
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.request(
-                    method, url, headers=headers, json=body, 
-                    params=params, timeout=timeout
-                ) as resp:
-                    resp_data = await resp.text()
-                    return {
-                        "status": resp.status, 
-                        "body": resp_data,
-                        "headers": dict(resp.headers)
-                    }
-            except Exception as e:
-                raise Exception(f"HTTP请求失败: {str(e)}")
+        # 共享连接池依赖aiohttp，只在执行HTTP节点时导入
+        from mini_agent.workflow.http_pool import get_http_pool
+        try:
+            return await get_http_pool().request(
+                method, url, headers=headers, json_body=body, params=params, timeout=timeout,
+                response_type=config.get('responseType', 'text'),
+                max_body_size=config.get('maxBodySize'),
+                download_path=BaseNode.process_template(config.get('downloadPath'), context),
+                use_cache=config.get('cache', False),
+            )
+        except Exception as e:
+            raise Exception(f"HTTP请求失败: {str(e)}")
 
 class ActionEmailNode(BaseNode):
     @staticmethod
@@ -136,11 +116,7 @@ class ActionDatabaseNode(BaseNode):
         
         # 处理模板变量
         if data:
-            data = BaseNode.process_template(json.dumps(data), context)
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                pass
+            data = render_value(data, context)
         
         # 模拟数据库操作
         print(f"执行数据库操作: {operation} on {table}")
@@ -171,6 +147,8 @@ class ActionAIAgentNode(BaseNode):
                 "system_prompt": config.get('system_prompt', '你是一个有用的助手。')
             }
             
+            # Agent依赖LLM和MCP客户端，只在执行AI节点时导入
+            from mini_agent.agent.agent import Agent
             agent = Agent(AgentConfig.from_dict(agent_config))
             # 将用户提示作为输入传递给Agent
             result = await agent.run(user_prompt)
@@ -193,6 +171,29 @@ class ActionAIAgentNode(BaseNode):
 
 # ==================== 转换节点 ====================
 
+# 记录数达到该值时转换节点自动按列执行，可通过节点配置 columnar 强制开启或关闭
+COLUMNAR_MIN_ROWS = 256
+
+
+def _use_columnar(config: Dict[str, Any], records: List[Any]) -> bool:
+    columnar = config.get('columnar', 'auto')
+    if columnar == 'auto':
+        return len(records) >= COLUMNAR_MIN_ROWS
+    return bool(columnar)
+
+def _resolve_input(config: Dict[str, Any], context: Dict[str, Any], default: Any = None) -> Any:
+    """
+    解析转换节点的input：{{路径}} 引用取上下文中的原始值（保留列表结构），
+    与上下文键同名的字符串取该键的值，字面量列表等原样使用
+    """
+    value = config.get('input', default)
+    if not isinstance(value, str):
+        return value
+    if '{{' not in value and value in context:
+        return context[value]
+    return resolve_value(value, context)
+
+
 class TransformMapNode(BaseNode):
     @staticmethod
     async def execute(node, context):
@@ -200,6 +201,20 @@ class TransformMapNode(BaseNode):
         config = node.get('config', {})
         mappings = config.get('mappings', {})
         
+        records = _resolve_input(config, context)
+        if isinstance(records, list):
+            # 逐条映射：模板中用 {{item.字段}} 引用当前记录
+            mapped_data = None
+            if _use_columnar(config, records):
+                from mini_agent.workflow.columnar import map_records
+                mapped_data = map_records(mappings, records, context)
+            if mapped_data is None:
+                mapped_data = []
+                for item in records:
+                    scope = ChainMap({'item': item}, context)
+                    mapped_data.append({key: render_template(template, scope) for key, template in mappings.items()})
+            return {"mapped_data": mapped_data}
+
         result = {}
         for output_key, template in mappings.items():
             result[output_key] = BaseNode.process_template(template, context)
@@ -212,23 +227,27 @@ class TransformFilterNode(BaseNode):
         print(f"数据过滤节点: {node['id']}")
         config = node.get('config', {})
         condition = config.get('condition', 'true')
-        input_data = config.get('input', context)
+        input_data = _resolve_input(config, context, context)
         
         # 简单条件过滤
         try:
-            # 安全起见，只支持简单的布尔表达式
+            # 安全起见，只支持简单的布尔表达式，条件只解析一次
+            code = compile_expression(condition)
             if isinstance(input_data, list):
+                if _use_columnar(config, input_data):
+                    from mini_agent.workflow.columnar import filter_records
+                    filtered_data = filter_records(condition, input_data, context)
+                    if filtered_data is not None:
+                        return {"filtered_data": filtered_data}
                 filtered_data = []
                 for item in input_data:
-                    # 将当前项添加到上下文中进行评估
-                    eval_context = context.copy()
-                    eval_context['item'] = item
-                    if eval(condition, {"__builtins__": {}}, eval_context):
+                    # 当前项作为最内层作用域，不复制上下文
+                    if evaluate(code, {'item': item}, context):
                         filtered_data.append(item)
                 return {"filtered_data": filtered_data}
             else:
                 # 单个数据项过滤
-                if eval(condition, {"__builtins__": {}}, context):
+                if evaluate(code, context):
                     return {"filtered_data": input_data}
                 else:
                     return {"filtered_data": None}
@@ -277,7 +296,8 @@ class LogicIfNode(BaseNode):
         condition = config.get('condition', 'true')
         
         try:
-            result = eval(condition, {"__builtins__": {}}, context)
+            # 条件原文直接在上下文上求值，不把上下文数据拼进表达式，同一条件只编译一次
+            result = evaluate(condition, context)
             return {"condition_result": bool(result)}
         except Exception as e:
             return {"error": f"条件执行失败: {str(e)}"}
@@ -293,7 +313,7 @@ class LogicSwitchNode(BaseNode):
         
         try:
             # 计算表达式值
-            expr_value = eval(expression, {"__builtins__": {}}, context)
+            expr_value = evaluate(expression, context)
             
             # 查找匹配的case
             if str(expr_value) in cases:
@@ -313,16 +333,14 @@ class LogicLoopNode(BaseNode):
         
         results = []
         for item in items:
-            # 创建循环上下文
-            loop_context = context.copy()
-            loop_context[loop_var] = item
-            loop_context['loop_index'] = len(results)
+            # 循环变量作为一层作用域叠加在上下文之上（ChainMap(loop_scope, context)），不复制上下文
+            loop_scope = {loop_var: item, 'loop_index': len(results)}
             
             # 这里可以执行循环体内的逻辑
             results.append({
                 'item': item,
                 'index': len(results),
-                'context': loop_context
+                'context': loop_scope
             })
         
         return {"loop_results": results, "total_items": len(results)}
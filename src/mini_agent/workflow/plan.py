@@ -0,0 +1,213 @@
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from mini_agent.workflow.expressions import compile_expression
+
+logger = logging.getLogger(__name__)
+
+JOIN_MODES = ('all', 'any', 'quorum')
+_TEMPLATE_VAR = re.compile(r'\{\{([^}]+)\}\}')
+
+
+@dataclass(frozen=True)
+class CompiledEdge:
+    """一条连接"""
+    index: int
+    source: str
+    target: str
+    # 条件表达式原文，None表示无条件
+    condition: Optional[str] = None
+    # 不含模板变量的条件预先编译为代码对象
+    code: Any = None
+
+
+@dataclass(frozen=True)
+class CompiledNode:
+    """一个节点及其调度信息"""
+    id: str
+    type: str
+    # 节点定义（编译时深拷贝，执行期间不应修改）
+    definition: Dict[str, Any]
+    join: str
+    quorum: int
+    in_degree: int
+    # 拓扑序中的位置
+    order: int
+
+
+class WorkflowPlan:
+    """
+    编译后的工作流执行计划（不可变）
+    包含出入边邻接表、拓扑序和预编译的条件，可在多次运行和多个实例之间共享
+    """
+
+    def __init__(self, name: str, nodes: Tuple[CompiledNode, ...], edges: Tuple[CompiledEdge, ...],
+                 outgoing: Dict[str, Tuple[CompiledEdge, ...]], incoming: Dict[str, Tuple[CompiledEdge, ...]],
+                 fingerprint: Optional[str] = None, connections: Optional[Tuple[Dict[str, Any], ...]] = None):
+        self.name = name
+        self.edges = edges
+        self.fingerprint = fingerprint
+        # 按拓扑序排列
+        self.topological_order: Tuple[str, ...] = tuple(node.id for node in nodes)
+        self.nodes: Mapping[str, CompiledNode] = MappingProxyType({node.id: node for node in nodes})
+        self.outgoing: Mapping[str, Tuple[CompiledEdge, ...]] = MappingProxyType(outgoing)
+        self.incoming: Mapping[str, Tuple[CompiledEdge, ...]] = MappingProxyType(incoming)
+        self.start_ids: Tuple[str, ...] = tuple(node.id for node in nodes if node.in_degree == 0)
+        # 节点ID -> 节点定义，兼容直接访问节点字典的代码
+        self.definitions: Mapping[str, Dict[str, Any]] = MappingProxyType(
+            {node.id: node.definition for node in nodes}
+        )
+        # 连接定义（含dataMapping等字段），未提供时由边还原
+        self.connections: Tuple[Dict[str, Any], ...] = connections if connections is not None else tuple(
+            {'from': edge.source, 'to': edge.target, **({'condition': edge.condition} if edge.condition else {})}
+            for edge in edges
+        )
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+def _compile_condition(condition: Optional[str], edge_desc: str):
+    """不含模板变量的条件直接编译；含模板变量的条件需在运行时替换后再编译"""
+    if not condition or _TEMPLATE_VAR.search(condition):
+        return None
+    try:
+        return compile_expression(condition)
+    except ValueError as e:
+        raise ValueError(f"连接条件无效 ({edge_desc}): {e}") from e
+
+
+def compile_workflow(workflow_def: Dict[str, Any], node_registry: Optional[Dict[str, Any]] = None,
+                     fingerprint: Optional[str] = None) -> WorkflowPlan:
+    """
+    校验并编译工作流定义
+    :param node_registry: 提供时检查节点类型是否已注册
+    :raises ValueError: 定义无效或存在环
+    """
+    raw_nodes = workflow_def.get('nodes', [])
+    if not raw_nodes:
+        raise ValueError("工作流必须包含至少一个节点")
+    definitions: Dict[str, Dict[str, Any]] = {}
+    for node in raw_nodes:
+        node_id = node.get('id')
+        if node_id in definitions:
+            raise ValueError(f"节点ID重复: {node_id}")
+        node_type = node.get('type')
+        if node_registry is not None and node_type not in node_registry:
+            raise ValueError(f"未注册的节点类型: {node_type} (节点: {node_id})")
+        join = node.get('join', 'all')
+        if join not in JOIN_MODES:
+            raise ValueError(f"无效的汇合策略: {join} (节点: {node_id})，可选 all、any、quorum")
+        definitions[node_id] = copy.deepcopy(node)
+
+    edges = []
+    outgoing: Dict[str, List[CompiledEdge]] = {node_id: [] for node_id in definitions}
+    incoming: Dict[str, List[CompiledEdge]] = {node_id: [] for node_id in definitions}
+    for index, conn in enumerate(workflow_def.get('connections', [])):
+        source, target = conn.get('from'), conn.get('to')
+        if source not in definitions:
+            raise ValueError(f"连接中的源节点不存在: {source}")
+        if target not in definitions:
+            raise ValueError(f"连接中的目标节点不存在: {target}")
+        condition = conn.get('condition') or None
+        edge = CompiledEdge(index, source, target, condition,
+                            _compile_condition(condition, f"{source} -> {target}"))
+        edges.append(edge)
+        outgoing[source].append(edge)
+        incoming[target].append(edge)
+
+    # Kahn算法求拓扑序，同时检测环
+    in_degree = {node_id: len(incoming[node_id]) for node_id in definitions}
+    remaining = dict(in_degree)
+    queue = deque(node_id for node_id in definitions if remaining[node_id] == 0)
+    order: List[str] = []
+    while queue:
+        node_id = queue.popleft()
+        order.append(node_id)
+        for edge in outgoing[node_id]:
+            remaining[edge.target] -= 1
+            if remaining[edge.target] == 0:
+                queue.append(edge.target)
+    if len(order) < len(definitions):
+        cyclic = [node_id for node_id in definitions if remaining[node_id] > 0]
+        if not any(in_degree[node_id] == 0 for node_id in definitions):
+            raise ValueError('未找到起始节点')
+        raise ValueError(f"工作流存在环，涉及节点: {', '.join(map(str, cyclic[:20]))}")
+
+    for node_id, node in definitions.items():
+        if node.get('join') == 'quorum' and int(node.get('quorum', 1)) > in_degree[node_id]:
+            raise ValueError(f"汇合数 {node.get('quorum')} 超过入边数 {in_degree[node_id]} (节点: {node_id})，"
+                             f"该节点永远不会执行")
+
+    nodes = tuple(
+        CompiledNode(
+            id=node_id,
+            type=definitions[node_id].get('type'),
+            definition=definitions[node_id],
+            join=definitions[node_id].get('join', 'all'),
+            quorum=max(1, int(definitions[node_id].get('quorum', 1))),
+            in_degree=in_degree[node_id],
+            order=position,
+        )
+        for position, node_id in enumerate(order)
+    )
+    return WorkflowPlan(
+        name=workflow_def.get('name', '未命名工作流'),
+        nodes=nodes,
+        edges=tuple(edges),
+        outgoing={node_id: tuple(items) for node_id, items in outgoing.items()},
+        incoming={node_id: tuple(items) for node_id, items in incoming.items()},
+        fingerprint=fingerprint,
+        connections=tuple(copy.deepcopy(conn) for conn in workflow_def.get('connections', [])),
+    )
+
+
+def workflow_fingerprint(workflow_def: Dict[str, Any]) -> str:
+    """工作流定义的内容指纹"""
+    data = json.dumps(workflow_def, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """按内容指纹缓存编译结果（LRU）"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[Tuple[str, Tuple[str, ...]], WorkflowPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, workflow_def: Dict[str, Any], node_registry: Optional[Dict[str, Any]] = None) -> WorkflowPlan:
+        fingerprint = workflow_fingerprint(workflow_def)
+        # 注册表不同可能导致校验结果不同
+        key = (fingerprint, tuple(sorted(node_registry)) if node_registry is not None else ())
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        plan = compile_workflow(workflow_def, node_registry, fingerprint)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+
+_default_cache = PlanCache()
+
+
+def get_plan(workflow_def: Dict[str, Any], node_registry: Optional[Dict[str, Any]] = None) -> WorkflowPlan:
+    """获取工作流的执行计划，相同定义只编译一次"""
+    return _default_cache.get(workflow_def, node_registry)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from mini_agent.workflow.durable import RUNNING
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.plan import WorkflowPlan
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowRuntime:
+    """
+    工作流运行时：编译后的工作流只构建一次，每个实例使用独立的上下文，
+    由固定数量的worker从有界队列中取出实例并发执行，队列满时提交方等待（背压）
+    """
+
+    def __init__(self, workflow_def: Union[Dict[str, Any], WorkflowPlan], node_registry: Dict[str, Any],
+                 workers: int = 8, queue_size: int = 100, **engine_options):
+        """
+        :param workflow_def: 工作流定义或已编译的执行计划
+        :param node_registry: 节点类型 -> 节点执行器
+        :param workers: 同时执行的实例数
+        :param queue_size: 等待执行的实例数上限，队列满时submit等待
+        :param engine_options: 传给WorkflowEngine的其他参数，如max_parallelism、spill_threshold
+        """
+        self.engine = WorkflowEngine(workflow_def, node_registry, **engine_options)
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def pending(self) -> int:
+        """排队中的实例数"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """启动worker，需在事件循环中调用"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._started_at = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            initial_context, instance_id, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    self.cancelled += 1
+                    continue
+                try:
+                    result = await self.engine.execute_workflow(initial_context, instance_id=instance_id)
+                except Exception as e:
+                    self.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if result.get('success'):
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, initial_context: Optional[Dict[str, Any]] = None,
+                     instance_id: Optional[str] = None) -> asyncio.Future:
+        """
+        提交一个实例，队列满时等待；返回的Future在实例执行结束后得到结果
+        :param instance_id: 实例ID，引擎设置了检查点存储时用于继续执行中断的实例
+        """
+        if not self._tasks:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((initial_context, instance_id, future))
+        self.submitted += 1
+        return future
+
+    def submit_nowait(self, initial_context: Optional[Dict[str, Any]] = None,
+                      instance_id: Optional[str] = None) -> asyncio.Future:
+        """
+        提交一个实例，队列满时不等待
+        :raises RuntimeError: 运行时未启动或队列已满
+        """
+        if not self._tasks:
+            raise RuntimeError('运行时未启动，请先调用 start()')
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((initial_context, instance_id, future))
+        except asyncio.QueueFull:
+            raise RuntimeError(f"等待执行的实例已达上限 {self.queue_size}")
+        self.submitted += 1
+        return future
+
+    async def run(self, initial_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """提交一个实例并等待结果"""
+        return await (await self.submit(initial_context))
+
+    async def run_many(self, contexts: Iterable[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """依次提交多个实例（受队列背压控制）并按提交顺序返回结果"""
+        futures = [await self.submit(context) for context in contexts]
+        return list(await asyncio.gather(*futures))
+
+    async def resume_incomplete(self) -> List[asyncio.Future]:
+        """
+        重新提交检查点存储中未执行完的实例（如进程中断时正在执行的实例），已完成的节点不再执行
+        :raises RuntimeError: 引擎未设置检查点存储
+        """
+        if self.engine.store is None:
+            raise RuntimeError('引擎未设置检查点存储')
+        return [await self.submit(instance_id=instance_id)
+                for instance_id in self.engine.store.list_instances(RUNNING)]
+
+    async def join(self):
+        """等待已提交的实例全部执行完"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """等待队列中的实例执行完后停止worker"""
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self) -> 'WorkflowRuntime':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """吞吐统计"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        finished = self.completed + self.failed + self.cancelled
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'pending': self.pending,
+            'in_flight': self.submitted - finished - self.pending,
+            'elapsed': elapsed,
+            'instances_per_sec': finished / elapsed if elapsed > 0 else 0.0,
+        }
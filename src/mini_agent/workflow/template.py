@@ -0,0 +1,101 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+_TEMPLATE_VAR = re.compile(r'\{\{([^}]+)\}\}')
+
+
+class Template:
+    """
+    解析后的模板：字面量片段和变量路径片段交替排列
+    变量路径无法解析时保留原始的 {{...}} 文本
+    """
+
+    __slots__ = ('source', 'segments', 'is_static')
+
+    def __init__(self, source: str, segments: Tuple[Tuple[str, Optional[Tuple[str, ...]]], ...]):
+        self.source = source
+        # (文本, 路径)：路径为None时文本是字面量，否则文本是变量的原始写法
+        self.segments = segments
+        self.is_static = all(path is None for _, path in segments)
+
+    @property
+    def reference(self) -> Optional[Tuple[str, ...]]:
+        """整个模板只是一个 {{路径}} 时返回该路径"""
+        if len(self.segments) == 1:
+            return self.segments[0][1]
+        return None
+
+    def render(self, context: Dict[str, Any]) -> str:
+        if self.is_static:
+            return self.source
+        parts = []
+        for text, path in self.segments:
+            if path is None:
+                parts.append(text)
+                continue
+            value = context
+            try:
+                for key in path:
+                    value = value[key]
+            except (KeyError, TypeError):
+                parts.append(text)
+                continue
+            parts.append(str(value))
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(source: str) -> Template:
+    """解析模板，相同文本只解析一次"""
+    segments = []
+    position = 0
+    for match in _TEMPLATE_VAR.finditer(source):
+        if match.start() > position:
+            segments.append((source[position:match.start()], None))
+        segments.append((match.group(0), tuple(match.group(1).strip().split('.'))))
+        position = match.end()
+    if position < len(source):
+        segments.append((source[position:], None))
+    return Template(source, tuple(segments))
+
+
+def render_template(template: Any, context: Dict[str, Any]) -> Any:
+    """替换字符串中的模板变量，非字符串原样返回"""
+    if not isinstance(template, str) or '{{' not in template:
+        return template
+    return compile_template(template).render(context)
+
+
+def render_value(value: Any, context: Dict[str, Any]) -> Any:
+    """递归替换字典（含键）和列表中所有字符串的模板变量，不经过JSON序列化"""
+    if isinstance(value, str):
+        return render_template(value, context)
+    if isinstance(value, dict):
+        return {render_template(key, context): render_value(item, context) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [render_value(item, context) for item in value]
+    return value
+
+
+def resolve_value(value: Any, context: Dict[str, Any]) -> Any:
+    """
+    与render_value相同，但整个字符串只是一个 {{路径}} 时返回上下文中的原始值（保留列表、字典等结构），
+    路径不存在时保留原文
+    """
+    if isinstance(value, str) and '{{' in value:
+        path = compile_template(value).reference
+        if path is None:
+            return render_template(value, context)
+        resolved = context
+        try:
+            for key in path:
+                resolved = resolved[key]
+        except (KeyError, TypeError):
+            return value
+        return resolved
+    if isinstance(value, dict):
+        return {render_template(key, context): resolve_value(item, context) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [resolve_value(item, context) for item in value]
+    return value
@@ -1,7 +1,7 @@
-from graphviz import Digraph
 import os
 
 def visualize_workflow(workflow, output_path='workflow.png'):
+    from graphviz import Digraph
     dot = Digraph(comment=workflow.get('name', 'Workflow'))
     for node in workflow['nodes']:
         dot.node(node['id'], f"{node['id']}\n{node['type']}")
@@ -0,0 +1,59 @@
+import asyncio
+
+from mini_agent.agent.pool import AgentPool, AgentPoolFullError
+from mini_agent.config.agent_config import AgentConfig
+from mini_agent.llm.utils import Message
+
+
+class FakeLLM:
+    """不访问网络的LLM，记录最大并发数"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def agenerate(self, messages, tools=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return Message(role='assistant', content=f"messages={len(messages)}")
+
+
+def test_sessions_are_isolated_and_bounded():
+    async def main():
+        llm = FakeLLM()
+        pool = AgentPool(AgentConfig(openai_api_key='test'), max_concurrent_runs=5, llm=llm)
+        results = await asyncio.gather(*[
+            pool.run('hi', session_id=f"s{i % 10}") for i in range(40)
+        ])
+        assert llm.peak == 5
+        assert pool.stats == {'sessions': 10, 'active_runs': 0, 'pending_runs': 0}
+        assert all(len(r) == 2 for r in results)
+        # 每个会话跑了4轮，每轮新增用户和助手两条消息
+        assert len(pool.session('s1').messages) == 1 + 4 * 2
+
+    asyncio.run(main())
+
+
+def test_admission_control_rejects_overflow():
+    async def main():
+        pool = AgentPool(AgentConfig(openai_api_key='test'), max_concurrent_runs=1,
+                         max_pending=1, llm=FakeLLM())
+        results = await asyncio.gather(*[pool.run('hi') for _ in range(4)], return_exceptions=True)
+        assert sum(isinstance(r, AgentPoolFullError) for r in results) == 2
+
+    asyncio.run(main())
+
+
+def test_agent_exposes_last_run_state():
+    from mini_agent.agent.agent import Agent
+
+    async def main():
+        agent = Agent(AgentConfig(openai_api_key='test'), llm=FakeLLM())
+        assert agent.round == 0
+        await agent.run('hi')
+        # 旧接口：运行结束后仍可读取本次运行的轮次
+        assert agent.round == 1 and agent.should_stop and agent.error_count == 0
+
+    asyncio.run(main())
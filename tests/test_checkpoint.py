@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+from mini_agent.agent.checkpoint import CheckpointStore
+from mini_agent.llm.utils import Message, ToolCall
+
+
+def _round(i):
+    return [
+        Message(role='assistant', tool_calls=[ToolCall(f"call_{i}", 'function', 'read_file', '{"path": "a"}')]),
+        Message(role='tool', content=f"结果{i}", tool_call_id=f"call_{i}", name='read_file'),
+    ]
+
+
+def test_append_reopen_and_lazy_read(tmp_path):
+    store = CheckpointStore(str(tmp_path), snapshot_interval=3)
+    checkpoint = store.open('s1')
+    checkpoint.append([Message(role='system', content='sys'), Message(role='user', content='hi')], round=0)
+    for i in range(1, 8):
+        checkpoint.append(_round(i), round=i)
+    store.close()
+
+    checkpoint = CheckpointStore(str(tmp_path)).open('s1')
+    assert checkpoint.message_count == 2 + 7 * 2
+    assert checkpoint.resumable and checkpoint.commit.round == 7
+    # 只读取最后一轮
+    last = checkpoint.read_messages(-2)
+    assert last[0].tool_calls[0].id == 'call_7'
+    assert last[1].content == '结果7' and last[1].tool_call_id == 'call_7'
+    assert [m.to_dict() for m in checkpoint.load()[2:4]] == [m.to_dict() for m in _round(1)]
+
+
+def test_uncommitted_tail_is_discarded(tmp_path):
+    store = CheckpointStore(str(tmp_path), snapshot_interval=100)
+    checkpoint = store.open('s1')
+    checkpoint.append([Message(role='user', content='hi')], round=0)
+    checkpoint.append(_round(1), round=1)
+    # 模拟崩溃：索引快照未写入，日志末尾有写了一半的内容
+    with open(checkpoint.log_path, 'ab') as f:
+        f.write(b'{"m":{"role":"assistant","content":"half')
+    assert not os.path.exists(checkpoint.index_path)
+    size = os.path.getsize(checkpoint.log_path)
+
+    reopened = CheckpointStore(str(tmp_path)).open('s1')
+    assert reopened.message_count == 3
+    assert reopened.commit.round == 1
+    assert os.path.getsize(reopened.log_path) < size
+    reopened.append(_round(2), round=2, done=True)
+    assert not reopened.resumable
+    assert reopened.load()[-1].content == '结果2'
+
+
+def test_agent_resumes_from_last_round(tmp_path):
+    from mini_agent.agent.agent import Agent
+    from mini_agent.config.agent_config import AgentConfig
+
+    class FakeTools:
+        async def list_tools(self):
+            return []
+
+    class ScriptedLLM:
+        """依次返回两次工具调用和最终回答，超过crash_after次调用时模拟进程中断"""
+
+        def __init__(self, start=0, crash_after=None):
+            self.calls = start
+            self.crash_after = crash_after
+
+        async def agenerate(self, messages, tools=None):
+            self.calls += 1
+            if self.crash_after is not None and self.calls > self.crash_after:
+                raise KeyboardInterrupt
+            if self.calls <= 2:
+                return Message(role='assistant', tool_calls=[ToolCall(f"c{self.calls}", 'function', 'noop', '{}')])
+            return Message(role='assistant', content='完成')
+
+    class NoopExecutor:
+        async def execute(self, tool_calls):
+            return ['ok' for _ in tool_calls]
+
+    config = AgentConfig(openai_api_key='test', checkpoint_dir=str(tmp_path))
+
+    async def main():
+        agent = Agent(config, llm=ScriptedLLM(crash_after=2), tool_manager=FakeTools(), tool_executor=NoopExecutor())
+        try:
+            await agent.run('hi', session_id='job')
+        except KeyboardInterrupt:
+            pass
+        agent.checkpoint_store.close()
+
+        llm = ScriptedLLM(start=2)
+        agent = Agent(config, llm=llm, tool_manager=FakeTools(), tool_executor=NoopExecutor())
+        messages = await agent.run('hi', session_id='job')
+        # 已完成的两轮不再重复调用LLM
+        assert llm.calls == 3
+        assert [m.role for m in messages] == ['system', 'user', 'assistant', 'tool', 'assistant', 'tool', 'assistant']
+        assert not agent.checkpoint_store.open('job').resumable
+
+    asyncio.run(main())
+
+
+def test_agent_releases_checkpoint_handles(tmp_path):
+    from mini_agent.agent.agent import Agent
+    from mini_agent.config.agent_config import AgentConfig
+
+    class EchoLLM:
+        async def agenerate(self, messages, tools=None):
+            return Message(role='assistant', content='ok')
+
+    class FakeTools:
+        async def list_tools(self):
+            return []
+
+    def open_files():
+        return sum(1 for name in os.listdir('/proc/self/fd')
+                   if os.path.realpath(f'/proc/self/fd/{name}').startswith(str(tmp_path)))
+
+    config = AgentConfig(openai_api_key='test', checkpoint_dir=str(tmp_path))
+    agent = Agent(config, llm=EchoLLM(), tool_manager=FakeTools())
+
+    async def main():
+        await asyncio.gather(*[agent.run('hi', session_id=f"s{i}") for i in range(50)])
+
+    asyncio.run(main())
+    # 运行结束后检查点文件句柄全部关闭，会话仍可从磁盘恢复
+    assert agent.checkpoint_store.open_count == 0
+    assert open_files() == 0
+    assert len(agent.checkpoint_store.list_sessions()) == 50
+    checkpoint = agent.checkpoint_store.open('s7')
+    assert [m.role for m in checkpoint.load()][-1] == 'assistant'
+    agent.checkpoint_store.release(checkpoint)
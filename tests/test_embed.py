@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from mini_agent.rag.embed import VectorDB, check_parity, get_embedding_model
+
+
+class FixedModel:
+    """按文本长度生成向量的测试模型"""
+
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        vectors = np.array([[len(text), 1.0, len(text) % 3] for text in texts], dtype='float32')
+        vectors[:, 2] += self.noise
+        return vectors
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_embedding_model(backend='tensorrt')
+
+
+def test_check_parity():
+    texts = ['a', 'bb', 'ccc']
+    result = check_parity(FixedModel(), FixedModel(), texts)
+    assert result['min_cosine'] == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        check_parity(FixedModel(), FixedModel(noise=5.0), texts)
+
+
+def test_vector_db_incremental_add():
+    db = VectorDB(model=FixedModel())
+    db.add(['a', 'bbbb'])
+    db.add(['bbbbbbbb'])
+    assert db.query('bbbbbbb', top_k=1) == ['bbbbbbbb']
+    # 文档数少于top_k时不返回无效结果
+    assert len(db.query('a', top_k=10)) == 3
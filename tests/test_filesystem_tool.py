@@ -0,0 +1,139 @@
+import json
+
+from mini_agent.tools import filesystem_tool
+from mini_agent.tools.filesystem_tool import FileSystemTool
+
+
+def write_lines(path, count):
+    path.write_text(''.join(f"line {i}\n" for i in range(count)), encoding='utf-8')
+
+
+def test_read_file_by_lines_and_bytes(tmp_path):
+    path = tmp_path / 'a.txt'
+    write_lines(path, 10)
+    tool = FileSystemTool()
+    assert tool.read_file(str(path), offset=2, limit=2) == 'line 2\nline 3\n'
+    assert tool.read_file(str(path), offset=9) == 'line 9\n'
+    assert tool.read_file(str(path), offset=20) == ''
+    assert tool.read_file(str(path), offset=5, limit=4, unit='byte') == '0\nli'
+
+
+def test_read_file_is_capped(tmp_path):
+    path = tmp_path / 'big.txt'
+    write_lines(path, 1000)
+    tool = FileSystemTool(max_output_bytes=20)
+    content = tool.read_file(str(path))
+    assert content.startswith('line 0\nline 1\nline')
+    assert '内容已截断' in content
+
+
+def test_read_file_uses_mmap_for_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(filesystem_tool, 'MMAP_THRESHOLD', 10)
+    path = tmp_path / 'big.txt'
+    write_lines(path, 100)
+    tool = FileSystemTool()
+    assert tool.read_file(str(path), offset=50, limit=1) == 'line 50\n'
+
+
+def test_file_info(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('a\nb\nc', encoding='utf-8')
+    info = json.loads(FileSystemTool().file_info(str(path)))
+    assert info['size'] == 5
+    assert info['lines'] == 3
+
+
+def make_workspace(root):
+    (root / 'src' / 'pkg').mkdir(parents=True)
+    (root / 'src' / 'pkg' / 'core.py').write_text('def handler():\n    return "needle"\n', encoding='utf-8')
+    (root / 'src' / 'pkg' / 'util.py').write_text('VALUE = 1\n', encoding='utf-8')
+    (root / 'README.md').write_text('Needle in the docs\n', encoding='utf-8')
+    (root / '.git').mkdir()
+    (root / '.git' / 'config.py').write_text('needle\n', encoding='utf-8')
+
+
+def test_find_files(tmp_path):
+    make_workspace(tmp_path)
+    tool = FileSystemTool(root=str(tmp_path))
+    assert tool.find_files('*.py').split('\n') == ['src/pkg/core.py', 'src/pkg/util.py']
+    assert tool.find_files('src/*/core.py') == 'src/pkg/core.py'
+    assert '结果已截断' in tool.find_files('*', limit=1)
+
+
+def test_search_content(tmp_path):
+    make_workspace(tmp_path)
+    tool = FileSystemTool(root=str(tmp_path))
+    assert tool.search_content('needle') == 'src/pkg/core.py:2:     return "needle"'
+    assert len(tool.search_content('needle', ignore_case=True).split('\n')) == 2
+    assert tool.search_content(r'def \w+\(', regex=True) == 'src/pkg/core.py:1: def handler():'
+    assert tool.search_content('needle', ignore_case=True, file_pattern='*.md') == 'README.md:1: Needle in the docs'
+
+
+def test_search_content_with_index(tmp_path):
+    make_workspace(tmp_path)
+    tool = FileSystemTool(root=str(tmp_path), use_index=True)
+    assert tool.index.candidates('needle') == {str(tmp_path / 'src' / 'pkg' / 'core.py'), str(tmp_path / 'README.md')}
+    assert tool.search_content('needle') == 'src/pkg/core.py:2:     return "needle"'
+    assert (tmp_path / '.mini_agent' / 'trigram_index.json').exists()
+    # 刚写入的文件在下一次搜索时就能找到，重新加载的索引与原索引一致
+    (tmp_path / 'new.txt').write_text('another needle\n', encoding='utf-8')
+    assert 'new.txt:1: another needle' in tool.search_content('needle')
+    reloaded = FileSystemTool(root=str(tmp_path), use_index=True)
+    assert str(tmp_path / 'new.txt') in reloaded.index.candidates('needle')
+
+
+def test_index_bypassed_for_non_ascii_ignore_case(tmp_path):
+    (tmp_path / 'greek.txt').write_text('ΑΛΦΑ beta\n', encoding='utf-8')
+    tool = FileSystemTool(root=str(tmp_path), use_index=True)
+    assert tool.search_content('αλφα', ignore_case=True) == 'greek.txt:1: ΑΛΦΑ beta'
+
+
+def test_index_is_thread_safe(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    make_workspace(tmp_path)
+    tool = FileSystemTool(root=str(tmp_path), use_index=True)
+
+    def search(i):
+        (tmp_path / f"f{i}.txt").write_text(f"needle {i}\n", encoding='utf-8')
+        if i % 3 == 0:
+            (tmp_path / f"f{i}.txt").unlink()
+            return True
+        return f"f{i}.txt:1: needle {i}" in tool.search_content('needle')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(search, range(60)))
+    reloaded = FileSystemTool(root=str(tmp_path), use_index=True)
+    assert reloaded.index.candidates('needle') == tool.index.candidates('needle')
+
+
+def test_index_query_stats_only_directories_and_candidates(tmp_path, monkeypatch):
+    import os
+    import time
+
+    index_path = str(tmp_path / 'index.json')
+    tmp_path = tmp_path / 'workspace'
+    tmp_path.mkdir()
+    make_workspace(tmp_path)
+    past = time.time() - 60
+    for directory in [tmp_path, tmp_path / 'src', tmp_path / 'src' / 'pkg']:
+        os.utime(directory, (past, past))
+    tool = FileSystemTool(root=str(tmp_path), use_index=True, index_path=index_path)
+    core = str(tmp_path / 'src' / 'pkg' / 'core.py')
+    assert core in tool.index.candidates('needle')
+
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path, *a, **kw: stats.append(str(path)) or real_stat(path, *a, **kw))
+    monkeypatch.setattr(os, 'scandir', lambda *a: (_ for _ in ()).throw(AssertionError('不应遍历目录')))
+    # 没有变化时不列目录，只stat目录和候选文件
+    assert tool.index.candidates('needle') == {core, str(tmp_path / 'README.md')}
+    assert str(tmp_path / 'src' / 'pkg' / 'util.py') not in stats
+    monkeypatch.undo()
+
+    # 新建的文件改变所在目录的mtime，下一次查询就能找到
+    (tmp_path / 'src' / 'pkg' / 'new.py').write_text('needle\n', encoding='utf-8')
+    assert str(tmp_path / 'src' / 'pkg' / 'new.py') in tool.index.candidates('needle')
+    # 删除的候选文件通过mtime校验去掉
+    os.remove(core)
+    assert core not in tool.index.candidates('needle')
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+
+import pytest
+from aiohttp import web
+
+from mini_agent.workflow.http_pool import HttpClientPool, ResponseTooLarge
+from mini_agent.workflow.nodes import ActionHttpNode
+
+
+async def _serve(handler_state):
+    async def data(request):
+        handler_state['requests'] += 1
+        handler_state['conditional'].append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'value': 1}, headers={'ETag': '"v1"'})
+
+    async def lines(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for i in range(3):
+            await response.write(json.dumps({'i': i}).encode() + b'\n')
+        return response
+
+    async def big(request):
+        return web.Response(body=b'x' * 100000)
+
+    async def user(request):
+        # 响应随Authorization和Accept-Language变化，按各自的ETag条件请求
+        handler_state['requests'] += 1
+        etag = f'"{request.headers.get("Authorization")}-{request.headers.get("Accept-Language")}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        body = {'user': request.headers.get('Authorization'), 'lang': request.headers.get('Accept-Language')}
+        return web.json_response(body, headers={'ETag': etag, 'Vary': 'Accept-Language'})
+
+    app = web.Application()
+    app.add_routes([web.get('/data', data), web.get('/lines', lines), web.get('/big', big), web.get('/user', user)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_pooled_requests_and_conditional_cache():
+    state = {'requests': 0, 'conditional': []}
+
+    async def main():
+        runner, base = await _serve(state)
+        pool = HttpClientPool()
+        try:
+            first = await pool.request('GET', f"{base}/data", response_type='json', use_cache=True)
+            second = await pool.request('GET', f"{base}/data", response_type='json', use_cache=True)
+            # 同一事件循环内复用同一个会话和连接
+            assert pool.session() is pool.session()
+            return first, second
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    first, second = asyncio.run(main())
+    assert first['body'] == {'value': 1} and first['from_cache'] is False
+    assert second['body'] == {'value': 1} and second['from_cache'] is True
+    assert state['conditional'] == [None, '"v1"']
+
+
+def test_streaming_modes_and_size_limit(tmp_path):
+    async def main():
+        runner, base = await _serve({'requests': 0, 'conditional': []})
+        pool = HttpClientPool()
+        try:
+            lines = await pool.request('GET', f"{base}/lines", response_type='jsonl')
+            target = str(tmp_path / 'big.bin')
+            download = await pool.request('GET', f"{base}/big", response_type='file', download_path=target)
+            with pytest.raises(ResponseTooLarge):
+                await pool.request('GET', f"{base}/big", max_body_size=1000)
+            with pytest.raises(ResponseTooLarge):
+                await pool.request('GET', f"{base}/lines", response_type='jsonl', max_body_size=10)
+            with pytest.raises(ResponseTooLarge):
+                await pool.request('GET', f"{base}/big", response_type='file',
+                                   download_path=str(tmp_path / 'partial.bin'), max_body_size=1000)
+            return lines, download
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    lines, download = asyncio.run(main())
+    assert lines['body'] == [{'i': 0}, {'i': 1}, {'i': 2}]
+    assert download['size'] == 100000 and os.path.getsize(download['path']) == 100000
+    assert sorted(os.listdir(tmp_path)) == ['big.bin']
+
+
+def test_http_node_uses_shared_pool():
+    async def main():
+        runner, base = await _serve({'requests': 0, 'conditional': []})
+        try:
+            node = {'id': 'http', 'config': {'url': '{{base}}/data', 'responseType': 'json'}}
+            return await ActionHttpNode.execute(node, {'base': base})
+        finally:
+            from mini_agent.workflow.http_pool import get_http_pool
+            await get_http_pool().close()
+            await runner.cleanup()
+
+    result = asyncio.run(main())
+    assert result['status'] == 200 and result['body'] == {'value': 1}
+
+
+def test_cache_key_respects_headers_and_returns_copies():
+    state = {'requests': 0, 'conditional': []}
+
+    async def main():
+        runner, base = await _serve(state)
+        pool = HttpClientPool()
+
+        async def get(auth, lang='en'):
+            headers = {'Authorization': auth, 'Accept-Language': lang}
+            return await pool.request('GET', f"{base}/user", headers=headers, response_type='json', use_cache=True)
+
+        try:
+            alice = await get('alice')
+            # 其他用户的请求不能命中alice的缓存
+            bob = await get('bob')
+            assert bob['body'] == {'user': 'bob', 'lang': 'en'} and bob['from_cache'] is False
+            # Vary声明的请求头不同，同样不复用
+            german = await get('alice', 'de')
+            assert german['body']['lang'] == 'de' and german['from_cache'] is False
+            hit = await get('alice', 'de')
+            assert hit['from_cache'] is True
+            # 修改返回的结果不影响缓存
+            hit['body']['user'] = 'mallory'
+            again = await get('alice', 'de')
+            assert again['body'] == {'user': 'alice', 'lang': 'de'}
+            return alice
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    alice = asyncio.run(main())
+    assert alice['body'] == {'user': 'alice', 'lang': 'en'}
+    assert state['requests'] == 5
+
+
+def test_sessions_closed_with_their_event_loop():
+    pool = HttpClientPool()
+    sessions = []
+
+    async def main():
+        sessions.append(pool.session())
+
+    for _ in range(5):
+        asyncio.run(main())
+    # asyncio.run结束时会话随事件循环关闭，不会随调用次数累积
+    assert pool._sessions == {}
+    assert all(session.closed for session in sessions)
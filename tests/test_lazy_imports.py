@@ -0,0 +1,20 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['torch', 'sentence_transformers', 'faiss', 'graphviz', 'fastmcp', 'openai', 'aiohttp']
+
+
+def _loaded_heavy_modules(module):
+    code = (
+        f"import sys, json, {module}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    for module in ['mini_agent.agent.agent', 'mini_agent.agent.pool', 'mini_agent.workflow.engine',
+                   'mini_agent.workflow.nodes', 'mini_agent.workflow.visualizer', 'mini_agent.tools.tool_manager']:
+        assert _loaded_heavy_modules(module) == [], module
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from mini_agent.llm.llm import OpenAILLM
+
+
+def chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(role=None, content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index, id=id, type='function' if id else None,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+class FakeStream:
+    def __init__(self, chunks, seen):
+        self.chunks = chunks
+        self.seen = seen
+
+    async def __aiter__(self):
+        for i, c in enumerate(self.chunks):
+            self.seen.append(i)
+            yield c
+
+
+def test_tool_calls_dispatched_when_arguments_complete():
+    chunks = [
+        chunk(tool_calls=[tool_delta(0, 'call_a', 'read_file', '{"path"')]),
+        chunk(tool_calls=[tool_delta(0, arguments=': "a.txt"}')]),
+        chunk(tool_calls=[tool_delta(1, 'call_b', 'read_file', '{"path": ')]),
+        chunk(tool_calls=[tool_delta(1, arguments='"b.txt"}')]),
+        chunk(content='ok'),
+        # 请求了include_usage时，最后一个片段没有choices，只带token用量
+        SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=3, completion_tokens=5, total_tokens=8)),
+    ]
+    seen = []
+    dispatched = []
+
+    async def create(**params):
+        assert params['stream'] is True
+        assert params['stream_options'] == {'include_usage': True}
+        return FakeStream(chunks, seen)
+
+    llm = OpenAILLM('test-key', 'test-model')
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    llm._get_async_client = lambda: fake_client
+
+    def on_tool_call(index, tool_call):
+        dispatched.append((index, tool_call.tool_name, tool_call.arguments, len(seen)))
+
+    message = asyncio.run(llm.astream_generate([], None, on_tool_call))
+    # 参数JSON完整的那个片段到达时就已分发
+    assert dispatched == [
+        (0, 'read_file', '{"path": "a.txt"}', 2),
+        (1, 'read_file', '{"path": "b.txt"}', 4),
+    ]
+    assert message.content == 'ok'
+    assert [tc.id for tc in message.tool_calls] == ['call_a', 'call_b']
+    assert message.usage == {'prompt_tokens': 3, 'completion_tokens': 5, 'total_tokens': 8}
@@ -0,0 +1,88 @@
+import asyncio
+
+from fastmcp import FastMCP
+
+from mini_agent.tools.mcp_client import McpClient
+
+server = FastMCP("test-server")
+
+
+@server.tool
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def test_sessions_are_reused_and_closed():
+    async def main():
+        client = McpClient(server, pool_size=2, max_inflight_per_session=2)
+        tools = await client.get_tools()
+        assert [t['tool_name'] for t in tools] == ['add']
+        results = await asyncio.gather(*[
+            client.call_tool('add', {'a': i, 'b': 1}) for i in range(6)
+        ])
+        assert len(results) == 6
+        # 并发请求不超过会话池上限
+        assert 1 <= len(client._sessions) <= 2
+        sessions = list(client._sessions)
+        await client.call_tool('add', {'a': 1, 'b': 1})
+        assert client._sessions == sessions
+        await client.cleanup()
+        assert client._sessions == []
+        assert not any(s.is_connected() for s in sessions)
+
+    asyncio.run(main())
+
+
+class DroppingClient:
+    """第一次请求时断开连接的假客户端"""
+
+    def __init__(self):
+        self.connected = True
+        self.calls = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def __aenter__(self):
+        self.connected = True
+
+    async def __aexit__(self, *exc):
+        self.connected = False
+
+    async def list_tools(self):
+        return await self.call_tool('list_tools', {})
+
+    async def call_tool(self, tool_name, tool_args):
+        self.calls.append(tool_name)
+        if len(self.calls) == 1:
+            self.connected = False
+            raise ConnectionError('dropped')
+        return 'ok'
+
+
+def test_only_idempotent_requests_are_resent_after_reconnect():
+    async def call(tool_name):
+        client = McpClient(server, idempotent_tools=['lookup'])
+        session = await client._acquire()
+        client._release(session)
+        session.client = fake = DroppingClient()
+        try:
+            return await client.call_tool(tool_name, {}), fake.calls
+        except ConnectionError:
+            return None, fake.calls
+
+    # 工具可能已在服务器执行只是响应丢失，不重发
+    assert asyncio.run(call('charge')) == (None, ['charge'])
+    assert asyncio.run(call('lookup')) == ('ok', ['lookup', 'lookup'])
+
+
+def test_shared_client_works_across_event_loops():
+    client = McpClient(server)
+
+    async def main():
+        return await client.call_tool('add', {'a': 1, 'b': 2})
+
+    # 进程内共享的客户端被多次asyncio.run使用，会话随各自的事件循环关闭
+    for _ in range(3):
+        assert '3' in asyncio.run(main())
+    assert client._pools == {}
@@ -0,0 +1,89 @@
+import asyncio
+import re
+import zlib
+
+import numpy as np
+
+from mini_agent.agent.memory import MemoryItem, MemoryStore, estimate_tokens
+from mini_agent.llm.utils import Message
+
+
+class HashingModel:
+    """词袋哈希向量，不依赖sentence_transformers"""
+
+    dim = 64
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        vectors = np.zeros((len(texts), self.dim), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in re.findall(r'\w+', text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
+
+
+def _item(text):
+    return MemoryItem(text=text, role='user', created_at=0.0)
+
+
+def test_search_respects_namespace_and_budget(tmp_path):
+    store = MemoryStore(str(tmp_path), model=HashingModel(), top_k=3, token_budget=12)
+    store.add('alice', [_item('my cat is called tom'), _item('the deploy key lives in vault'),
+                        _item('lunch was noodles')])
+    store.add('bob', [_item('my cat is called felix')])
+
+    results = store.search('alice', 'what is my cat called')
+    assert results[0].text == 'my cat is called tom'
+    assert sum(estimate_tokens(item.text) for item in results) <= 12
+    assert [item.text for item in store.search('bob', 'cat')] == ['my cat is called felix']
+
+    # 重新打开时从磁盘加载向量，不重新编码
+    reopened = MemoryStore(str(tmp_path), model=HashingModel(), top_k=1)
+    assert reopened.count('alice') == 3
+    assert reopened.search('alice', 'where is the deploy key')[0].text == 'the deploy key lives in vault'
+
+
+def test_partial_write_is_truncated_on_load(tmp_path):
+    store = MemoryStore(str(tmp_path), model=HashingModel())
+    store.add('alice', [_item('first memory'), _item('second memory')])
+    # 模拟向量写入后、元数据写入前中断
+    with open(tmp_path / 'alice.vec', 'ab') as f:
+        f.write(np.ones(HashingModel.dim, dtype='float32').tobytes())
+    reopened = MemoryStore(str(tmp_path), model=HashingModel())
+    assert reopened.count('alice') == 2
+    reopened.add('alice', [_item('third memory')])
+    assert MemoryStore(str(tmp_path), model=HashingModel()).count('alice') == 3
+
+
+def test_agent_recalls_memories_across_sessions():
+    from mini_agent.agent.agent import Agent
+    from mini_agent.config.agent_config import AgentConfig
+
+    class FakeTools:
+        async def list_tools(self):
+            return []
+
+    class RecordingLLM:
+        def __init__(self):
+            self.prompts = []
+
+        async def agenerate(self, messages, tools=None):
+            self.prompts.append(list(messages))
+            return Message(role='assistant', content='好的')
+
+    async def main():
+        llm = RecordingLLM()
+        agent = Agent(AgentConfig(openai_api_key='test'), llm=llm, tool_manager=FakeTools(),
+                      memory=MemoryStore(model=HashingModel()))
+        await agent.run('my favourite colour is green', user_id='u1')
+        messages = await agent.run('what is my favourite colour', user_id='u1')
+        memory = llm.prompts[-1][1]
+        assert memory.role == 'system' and 'favourite colour is green' in memory.content
+        # 记忆只注入请求，不写入返回的对话历史
+        assert [m.role for m in messages] == ['system', 'user', 'assistant']
+        await agent.run('what is my favourite colour', user_id='u2')
+        assert len(llm.prompts[-1]) == 2
+
+    asyncio.run(main())
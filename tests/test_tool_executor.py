@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from typing import List
+
+import pytest
+
+from mini_agent.llm.utils import Tool, ToolCall
+from mini_agent.tools.base import ToolBase
+from mini_agent.tools.executor import ToolExecutor
+from mini_agent.tools.tool_manager import ToolManager
+
+
+class SlowTool(ToolBase):
+    """异步测试工具，记录最大并发数"""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def cleanup(self):
+        pass
+
+    async def get_tools(self) -> List[Tool]:
+        return [
+            Tool(tool_name='sleep', description='sleep', parameters={}),
+            Tool(tool_name='hang', description='hang', parameters={}),
+            Tool(tool_name='fail', description='fail', parameters={}),
+        ]
+
+    async def call_tool(self, tool_name: str, tool_args: dict) -> str:
+        if tool_name == 'hang':
+            await asyncio.sleep(3600)
+        if tool_name == 'fail':
+            raise RuntimeError('boom')
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        return str(tool_args.get('n'))
+
+
+class BlockingTool(ToolBase):
+    """同步测试工具"""
+
+    blocking = True
+
+    async def cleanup(self):
+        pass
+
+    async def get_tools(self) -> List[Tool]:
+        return [Tool(tool_name='whoami', description='thread name', parameters={})]
+
+    async def call_tool(self, tool_name: str, tool_args: dict) -> str:
+        return self.call_tool_sync(tool_name, tool_args)
+
+    def call_tool_sync(self, tool_name: str, tool_args: dict) -> str:
+        time.sleep(0.01)
+        return threading.current_thread().name
+
+
+def make_call(name, arguments='{}', id=None):
+    return ToolCall(id=id or name, type='function', tool_name=name, arguments=arguments)
+
+
+def test_concurrency_limits_and_order():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        tool = SlowTool()
+        manager.register_tool(tool)
+        executor = ToolExecutor(manager, max_concurrency=4, per_tool_concurrency={'sleep': 2})
+        calls = [make_call('sleep', f'{{"n": {i}}}') for i in range(8)]
+        results = await executor.execute(calls)
+        assert results == [str(i) for i in range(8)]
+        assert tool.max_running == 2
+
+    asyncio.run(main())
+
+
+def test_timeout_and_errors_become_messages():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        manager.register_tool(SlowTool())
+        executor = ToolExecutor(manager, timeout=0.1)
+        results = await executor.execute([
+            make_call('hang'),
+            make_call('fail'),
+            make_call('sleep', '{"n": 1}'),
+            make_call('missing'),
+            make_call('sleep', '{bad json'),
+        ])
+        assert '超时' in results[0]
+        assert 'boom' in results[1]
+        assert results[2] == '1'
+        assert 'not found' in results[3]
+        assert '执行失败' in results[4]
+
+    asyncio.run(main())
+
+
+def test_blocking_tools_run_in_thread_pool():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        manager.register_tool(BlockingTool())
+        executor = ToolExecutor(manager)
+        results = await executor.execute([make_call('whoami')])
+        assert results[0].startswith('mini-agent-tool')
+        executor.close()
+
+    asyncio.run(main())
+
+
+def test_blocking_cache_hint_runs_in_thread_pool():
+    from mini_agent.tools.cache import CacheHint, ToolResultCache
+
+    class StatTool(BlockingTool):
+        hint_threads = []
+
+        def cache_hint(self, tool_name, tool_args):
+            # 新鲜度检查可能访问慢速文件系统，不能在事件循环线程中执行
+            self.hint_threads.append(threading.current_thread().name)
+            return CacheHint()
+
+    async def main():
+        manager = ToolManager(use_registry=False)
+        manager.register_tool(StatTool())
+        executor = ToolExecutor(manager, cache=ToolResultCache(max_entries=8))
+        await executor.execute([make_call('whoami')])
+        assert StatTool.hint_threads and StatTool.hint_threads[0].startswith('mini-agent-tool')
+        executor.close()
+
+    asyncio.run(main())
+
+
+def test_tool_resolved_once_per_call():
+    async def main():
+        from mini_agent.tools.cache import ToolResultCache
+
+        manager = ToolManager(use_registry=False)
+        manager.register_tool(BlockingTool())
+        resolved = []
+        resolve_tool = manager.resolve_tool
+
+        async def counting_resolve(tool_name):
+            resolved.append(tool_name)
+            return await resolve_tool(tool_name)
+
+        manager.resolve_tool = counting_resolve
+        executor = ToolExecutor(manager, cache=ToolResultCache())
+        await executor.run_tool_call(make_call('whoami'))
+        # 查缓存提示和实际调用使用同一次解析的结果
+        assert resolved == ['whoami']
+        executor.close()
+
+    asyncio.run(main())
+
+
+def test_blocking_tool_without_sync_call_rejected_on_register():
+    class AsyncOnlyTool(SlowTool):
+        blocking = True
+
+    with pytest.raises(ValueError, match='call_tool_sync'):
+        ToolManager(use_registry=False).register_tool(AsyncOnlyTool())
+
+
+def test_idempotent_results_are_cached_until_file_changes(tmp_path):
+    async def main():
+        from mini_agent.tools.cache import ToolResultCache
+        from mini_agent.tools.filesystem_tool import FileSystemTool
+
+        path = tmp_path / 'a.txt'
+        path.write_text('v1', encoding='utf-8')
+        manager = ToolManager(use_registry=False)
+        tool = FileSystemTool()
+        manager.register_tool(tool)
+        cache = ToolResultCache(max_entries=8)
+        executor = ToolExecutor(manager, cache=cache)
+        call = make_call('read_file', f'{{"path": "{path}"}}')
+        assert await executor.run_tool_call(call) == 'v1'
+        assert await executor.run_tool_call(call) == 'v1'
+        assert cache.stats['hits'] == 1
+        path.write_text('version 2', encoding='utf-8')
+        assert await executor.run_tool_call(call) == 'version 2'
+        assert cache.stats['misses'] == 2
+        executor.close()
+
+    asyncio.run(main())
+
+
+def test_cache_is_size_bounded():
+    from mini_agent.tools.cache import ToolResultCache
+
+    cache = ToolResultCache(max_entries=2, max_bytes=10)
+    cache.put('a', '1234')
+    cache.put('b', '1234')
+    cache.put('c', '1234')
+    assert cache.get('a') is None
+    assert cache.get('c') == '1234'
+    cache.put('d', '12345678')
+    assert cache.stats['bytes'] <= 10
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from typing import List
+
+from mini_agent.llm.utils import Tool
+from mini_agent.tools.base import ToolBase
+from mini_agent.tools.registry import ToolRegistry
+from mini_agent.tools.tool_manager import ToolManager
+
+
+class CountingTool(ToolBase):
+    """记录get_tools调用次数的测试工具"""
+
+    def __init__(self, names: List[str], label: str):
+        self.names = names
+        self.label = label
+        self.get_tools_calls = 0
+
+    async def cleanup(self):
+        pass
+
+    async def get_tools(self) -> List[Tool]:
+        self.get_tools_calls += 1
+        return [Tool(tool_name=name, description=name, parameters={}) for name in self.names]
+
+    async def call_tool(self, tool_name: str, tool_args: dict) -> str:
+        return f"{self.label}:{tool_name}"
+
+
+def test_call_tool_uses_index():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        tool_a = CountingTool(['echo'], 'a')
+        tool_b = CountingTool(['ping'], 'b')
+        manager.register_tool(tool_a)
+        manager.register_tool(tool_b)
+        await manager.list_tools()
+        for _ in range(10):
+            assert await manager.call_tool('ping', {}) == 'b:ping'
+        # 分发只查索引，不再逐个拉取工具列表
+        assert tool_a.get_tools_calls == 1
+        assert tool_b.get_tools_calls == 1
+
+    asyncio.run(main())
+
+
+def test_duplicate_tool_names_keep_first():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        manager.register_tool(CountingTool(['search'], 'first'), namespace='s1')
+        manager.register_tool(CountingTool(['search'], 'second'), namespace='s2')
+        tools = await manager.list_tools()
+        assert [t['function']['name'] for t in tools] == ['search']
+        assert await manager.call_tool('search', {}) == 'first:search'
+
+    asyncio.run(main())
+
+
+def test_namespaced_tools():
+    async def main():
+        manager = ToolManager(namespace_tools=True, use_registry=False)
+        manager.register_tool(CountingTool(['search'], 'first'), namespace='s1')
+        manager.register_tool(CountingTool(['search'], 'second'), namespace='s2')
+        names = [t['function']['name'] for t in await manager.list_tools()]
+        assert names == ['s1__search', 's2__search']
+        assert await manager.call_tool('s2__search', {}) == 'second:search'
+
+    asyncio.run(main())
+
+
+def test_registry_applies_config_diffs(tmp_path):
+    config_path = tmp_path / 'mcp_config.json'
+
+    def write(servers):
+        config_path.write_text(json.dumps({'mcpServers': servers}), encoding='utf-8')
+
+    write({'a': {'command': 'server-a'}, 'b': {'command': 'server-b'}})
+    registry = ToolRegistry(str(config_path), poll_interval=0)
+    # 构造ToolManager时不读取配置
+    ToolManager(registry=registry)
+    assert registry.version == 0
+    before = dict(registry.servers())
+    assert list(before) == ['a', 'b']
+
+    write({'a': {'command': 'server-a'}, 'b': {'command': 'server-b2'}, 'c': {'command': 'server-c'}})
+    after = dict(registry.servers())
+    assert list(after) == ['a', 'b', 'c']
+    # 未变化的服务器复用原客户端，变化的服务器重建
+    assert after['a'] is before['a']
+    assert after['b'] is not before['b']
+    assert registry._retired == [before['b']]
+
+    write({'c': {'command': 'server-c'}})
+    assert [name for name, _ in registry.servers()] == ['c']
+    version = registry.version
+    assert not registry.reload()
+    assert registry.version == version
+    asyncio.run(registry.close_retired())
+    assert registry._retired == []
+
+
+def test_unknown_tool_refresh_is_rate_limited():
+    async def main():
+        manager = ToolManager(use_registry=False)
+        tool = CountingTool(['echo'], 'a')
+        manager.register_tool(tool)
+        await manager.list_tools()
+        for _ in range(5):
+            try:
+                await manager.resolve_tool('missing')
+            except ValueError:
+                pass
+        # 第一次找不到时重建一次索引，之后在间隔内不再拉取
+        assert tool.get_tools_calls == 2
+
+    asyncio.run(main())
+
+
+def test_retired_client_closed_after_in_flight_calls(tmp_path):
+    config_path = tmp_path / 'mcp_config.json'
+    config_path.write_text(json.dumps({'mcpServers': {'a': {'command': 'server-a'}}}), encoding='utf-8')
+    registry = ToolRegistry(str(config_path), poll_interval=0)
+    client = dict(registry.servers())['a']
+    closed = []
+
+    async def cleanup():
+        closed.append(client)
+
+    client.cleanup = cleanup
+
+    async def main():
+        async with registry.lease(client):
+            config_path.write_text(json.dumps({'mcpServers': {'a': {'command': 'server-a2'}}}), encoding='utf-8')
+            assert dict(registry.servers())['a'] is not client
+            # 调用尚未结束，被替换的客户端不关闭
+            await registry.close_retired()
+            assert closed == []
+        assert closed == [client]
+        await registry.close_retired()
+        assert closed == [client]
+
+    asyncio.run(main())
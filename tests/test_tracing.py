@@ -0,0 +1,68 @@
+import asyncio
+
+from mini_agent.tracing import NULL_TRACER, Tracer, current_tracer, use_tracer
+
+
+def test_spans_nest_and_export():
+    async def child(tracer, name):
+        with tracer.span(name, 'tool') as span:
+            await asyncio.sleep(0.01)
+            span.set(result_bytes=3)
+
+    async def main():
+        tracer = Tracer()
+        with use_tracer(tracer), tracer.span('agent.run') as root:
+            assert current_tracer() is tracer
+            await asyncio.gather(child(tracer, 'tool.a'), child(tracer, 'tool.b'))
+        assert current_tracer() is NULL_TRACER
+        spans = {span.name: span for span in tracer.spans}
+        assert spans['tool.a'].parent_id == root.span_id
+        assert spans['tool.a'].attrs == {'result_bytes': 3}
+        # 并发的Span位于不同的时间线
+        assert spans['tool.a'].lane != spans['tool.b'].lane
+        events = tracer.to_chrome_trace()['traceEvents']
+        assert {e['name'] for e in events} == {'agent.run', 'tool.a', 'tool.b'}
+        assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+        assert tracer.summary()['tool.a']['count'] == 1
+
+    asyncio.run(main())
+
+
+def test_hooks_and_errors():
+    finished = []
+    tracer = Tracer(hooks=[finished.append])
+    try:
+        with tracer.span('llm.generate', 'llm'):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    assert finished[0].name == 'llm.generate'
+    assert 'boom' in finished[0].attrs['error']
+
+
+def test_null_tracer_records_nothing():
+    with NULL_TRACER.span('anything') as span:
+        span.set(x=1)
+    assert not span.recording
+
+
+def test_lanes_do_not_outlive_tasks():
+    import gc
+
+    tracer = Tracer()
+
+    async def work():
+        with tracer.span('tool.call', 'tool'):
+            await asyncio.sleep(0)
+
+    async def main():
+        for _ in range(50):
+            await asyncio.gather(*[asyncio.create_task(work()) for _ in range(4)])
+
+    asyncio.run(main())
+    gc.collect()
+    # 结束的任务不再占用时间线，每个任务的Span各自一条时间线
+    assert len(tracer._lanes) == 0
+    assert len({span.lane for span in tracer.spans}) == 200
+    tracer.clear()
+    assert tracer.spans == []
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from mini_agent.workflow.columnar import compile_mask, filter_records, map_records
+from mini_agent.workflow.nodes import TransformFilterNode, TransformMapNode
+
+RECORDS = [
+    {'id': i, 'amount': i * 1.5, 'status': 'paid' if i % 3 else 'open', 'vip': i % 4 == 0, 'note': None}
+    for i in range(40)
+]
+CONTEXT = {'threshold': 20, 'statuses': ['paid', 'refunded'], 'limits': {'max': 50}}
+
+
+def _filter(condition, records, columnar):
+    node = {'id': 'f', 'config': {'condition': condition, 'input': records, 'columnar': columnar}}
+    return asyncio.run(TransformFilterNode.execute(node, CONTEXT))
+
+
+@pytest.mark.parametrize('condition', [
+    'item["amount"] > threshold and item["status"] == "paid"',
+    'not item["vip"] or item["id"] % 5 == 0',
+    '10 < item["id"] * 2 <= limits["max"]',
+    'item["status"] in statuses and item["id"] not in [3, 6]',
+    'item["id"] * 100000000000000000000 > 1000000000000000000000',
+    'item["amount"] / 1.5 == item["id"]',
+    'item["note"] == null',
+    'true',
+])
+def test_columnar_filter_matches_per_record(condition):
+    expected = _filter(condition, RECORDS, False)
+    assert compile_mask(condition) is not None
+    assert filter_records(condition, RECORDS, CONTEXT) == expected['filtered_data']
+    assert _filter(condition, RECORDS, True) == expected
+
+
+def test_columnar_filter_falls_back():
+    # 不支持的语法、嵌套字段、非字典记录都交给逐条处理
+    assert compile_mask('item["status"] is not null') is None
+    assert filter_records('item["tags"][0] == 1', [{'tags': [1]}], {}) is None
+    assert filter_records('item > 1', [1, 2, 3], {}) is None
+    assert _filter('item["status"] is not null', RECORDS, True)['filtered_data'] == RECORDS
+    # 除零等错误与逐条处理的结果一致
+    records = [{'n': 0}, {'n': 1}]
+    assert filter_records('1 / item["n"] > 0', records, {}) is None
+    assert 'error' in _filter('1 / item["n"] > 0', records, True)
+    # 缺少字段时同样交给逐条处理
+    assert 'error' in _filter('item["missing"] > 0', RECORDS, True)
+    # 字符串重复交给逐条处理，逐条求值检查重复后的长度
+    assert filter_records('item["status"] * 2 == "paidpaid"', RECORDS, CONTEXT) is None
+    assert 'error' in _filter('item["status"] * 99999999999 == ""', RECORDS, True)
+
+
+def test_columnar_map_matches_per_record():
+    mappings = {'label': '#{{item.id}} {{item.status}} > {{threshold}}', 'amount': '{{item.amount}}',
+                'vip': '{{item.vip}}', 'fixed': 'x', 'raw': 1, 'missing': '{{unknown}}'}
+    expected = asyncio.run(TransformMapNode.execute(
+        {'id': 'm', 'config': {'mappings': mappings, 'input': RECORDS, 'columnar': False}}, CONTEXT))
+    assert expected['mapped_data'][1] == {'label': '#1 paid > 20', 'amount': '1.5', 'vip': 'False',
+                                          'fixed': 'x', 'raw': 1, 'missing': '{{unknown}}'}
+    assert map_records(mappings, RECORDS, CONTEXT) == expected['mapped_data']
+    assert map_records({'a': '{{item.x.y}}'}, [{'x': {'y': 1}}], {}) is None
+
+
+def test_columnar_map_handles_list_fields_and_long_values():
+    records = [{'tags': ['a', 'b'], 'note': 'n'} for _ in range(300)]
+    node = {'id': 'm', 'config': {'mappings': {'tags': '{{item.tags}}'}, 'input': records}}
+    result = asyncio.run(TransformMapNode.execute(node, {}))
+    assert result['mapped_data'][0] == {'tags': "['a', 'b']"}
+    assert map_records({'tags': '{{item.tags}}'}, records, {}) == result['mapped_data']
+    # 单个超长值会放大整列的定长字符串数组，改为逐条处理
+    records[0] = {'tags': [], 'note': 'x' * 5000}
+    assert map_records({'note': '{{item.note}}'}, records, {}) is None
+
+
+def test_upstream_records_reach_columnar_path(monkeypatch):
+    from mini_agent.workflow import columnar
+    from mini_agent.workflow.engine import WorkflowEngine
+
+    class FetchNode:
+        @staticmethod
+        async def execute(node, context):
+            return {'rows': RECORDS * 10}
+
+    calls = []
+    for name in ('filter_records', 'map_records'):
+        original = getattr(columnar, name)
+        monkeypatch.setattr(columnar, name, lambda *a, _f=original, _n=name: calls.append(_n) or _f(*a))
+
+    workflow = {
+        'name': 'columnar',
+        'nodes': [
+            {'id': 'fetch', 'type': 'test/fetch'},
+            {'id': 'paid', 'type': 'transform/filter',
+             'config': {'condition': 'item["status"] == "paid"', 'input': '{{fetch.rows}}'}},
+            {'id': 'labels', 'type': 'transform/map',
+             'config': {'mappings': {'label': '#{{item.id}}'}, 'input': '{{paid.filtered_data}}'}},
+        ],
+        'connections': [{'from': 'fetch', 'to': 'paid'}, {'from': 'paid', 'to': 'labels'}],
+    }
+    registry = {'test/fetch': FetchNode, 'transform/filter': TransformFilterNode, 'transform/map': TransformMapNode}
+    result = asyncio.run(WorkflowEngine(workflow, registry).execute_workflow())
+    paid = [r for r in RECORDS * 10 if r['status'] == 'paid']
+    # 上游节点的输出通过 {{路径}} 引用原样传入，记录数足够时按列执行
+    assert result['context']['paid'] == {'filtered_data': paid}
+    assert result['context']['labels']['mapped_data'] == [{'label': f"#{r['id']}"} for r in paid]
+    assert calls == ['filter_records', 'map_records']
+    # 也可以直接写上下文键名
+    node = {'id': 'f', 'config': {'condition': 'item > 1', 'input': 'nums'}}
+    assert asyncio.run(TransformFilterNode.execute(node, {'nums': [1, 2, 3]})) == {'filtered_data': [2, 3]}
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+from mini_agent.workflow.context import BlobRef, ContextData, WorkflowContext, estimate_size
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.nodes import LogicLoopNode
+
+
+class BigNode:
+    @staticmethod
+    async def execute(node, context):
+        return {'rows': [{'id': i, 'text': 'x' * 100} for i in range(200)]}
+
+
+class ReadNode:
+    @staticmethod
+    async def execute(node, context):
+        return {'count': len(context['big']['rows']), 'first': context.get('big')['rows'][0]['id']}
+
+
+REGISTRY = {'test/big': BigNode, 'test/read': ReadNode}
+WORKFLOW = {
+    'nodes': [{'id': 'big', 'type': 'test/big'}, {'id': 'read', 'type': 'test/read'}],
+    'connections': [{'from': 'big', 'to': 'read'}],
+}
+
+
+def test_large_outputs_spill_to_blob_store():
+    engine = WorkflowEngine(WORKFLOW, REGISTRY, spill_threshold=4096)
+    result = asyncio.run(engine.execute_workflow())
+    assert result['success']
+    # 大输出在上下文中只保留句柄，读取时透明加载
+    assert isinstance(result['context']['big'], BlobRef)
+    assert result['context']['read'] == {'count': 200, 'first': 0}
+    assert engine.context.data['big']['rows'][199]['id'] == 199
+    directory = engine.context.blobs.directory
+    assert os.listdir(directory)
+    engine.context.close()
+    assert not os.path.exists(directory)
+
+
+def test_spilled_results_outlive_the_next_run():
+    engine = WorkflowEngine(WORKFLOW, REGISTRY, spill_threshold=4096)
+    first = asyncio.run(engine.execute_workflow())
+    directory = first['blobs'].directory
+    # 下一次执行替换了engine.context，上一次结果中的句柄仍然可以读取
+    second = asyncio.run(engine.execute_workflow())
+    assert os.path.exists(directory)
+    assert first['blobs'].resolve(first['context']['big'])['rows'][0]['id'] == 0
+    assert first['blobs'].resolve(first['context']['read']) == {'count': 200, 'first': 0}
+    first['blobs'].close()
+    second['blobs'].close()
+    assert not os.path.exists(directory)
+
+
+def test_bounded_history_and_shared_layers():
+    initial = {'config': {'threshold': 1}}
+    context = WorkflowContext(initial, history_limit=2)
+    for i in range(5):
+        context.update({f"n{i}": {'value': i}})
+    assert len(context.execution_history) == 2
+    assert context.get_execution_summary()['total_updates'] == 5
+    # 初始数据作为共享的底层，不被写入
+    assert initial == {'config': {'threshold': 1}}
+    assert context.get('config') == {'threshold': 1} and context.get('n4') == {'value': 4}
+
+    child = context.data.new_child({'item': 7})
+    assert isinstance(child, ContextData) and child['item'] == 7 and child['n0'] == {'value': 0}
+    assert 'item' not in context.data
+
+
+def test_loop_node_does_not_copy_context():
+    context = {f"node{i}": {'payload': 'x' * 1000} for i in range(50)}
+    node = {'id': 'loop', 'config': {'items': [1, 2, 3], 'loop_var': 'row'}}
+    result = asyncio.run(LogicLoopNode.execute(node, context))
+    assert result['total_items'] == 3
+    assert result['loop_results'][1]['context'] == {'row': 2, 'loop_index': 1}
+
+
+def test_estimate_size_stops_at_limit():
+    assert estimate_size('x' * 1000) >= 1000
+    rows = [{'text': 'x' * 100} for _ in range(100000)]
+    assert 1000 < estimate_size(rows, limit=1000) < estimate_size(rows)
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+from mini_agent.workflow.durable import COMPLETED, RUNNING, WorkflowStore
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.runtime import WorkflowRuntime
+
+WORKFLOW = {
+    'name': 'durable',
+    'nodes': [
+        {'id': 'fetch', 'type': 'action/count'},
+        {'id': 'crash', 'type': 'test/crash'},
+        {'id': 'skipped', 'type': 'test/crash'},
+        {'id': 'report', 'type': 'action/count'},
+    ],
+    'connections': [
+        {'from': 'fetch', 'to': 'crash'},
+        {'from': 'fetch', 'to': 'skipped', 'condition': 'value < 0'},
+        {'from': 'crash', 'to': 'report'},
+    ],
+}
+
+# 子进程在crash节点直接退出，模拟进程中途被杀
+CRASH_SCRIPT = textwrap.dedent("""
+    import asyncio, os, sys
+    sys.path.insert(0, sys.argv[2])
+    from test_workflow_durable import WORKFLOW, make_registry
+    from mini_agent.workflow.durable import WorkflowStore
+    from mini_agent.workflow.engine import WorkflowEngine
+
+    store = WorkflowStore(sys.argv[1])
+    engine = WorkflowEngine(WORKFLOW, make_registry([], crash=True), store=store)
+    asyncio.run(engine.execute_workflow({'input': {'value': 3}}, instance_id='job-1'))
+""")
+
+
+def make_registry(calls, crash=False):
+    class CountNode:
+        @staticmethod
+        async def execute(node, context):
+            calls.append(node['id'])
+            return {'value': context['input']['value'] * 2}
+
+    class CrashNode:
+        @staticmethod
+        async def execute(node, context):
+            if crash:
+                import os
+                os._exit(1)
+            calls.append(node['id'])
+            return {'total': context['fetch']['value'] + 1}
+
+    return {'action/count': CountNode, 'test/crash': CrashNode}
+
+
+def test_resume_after_process_crash_skips_completed_nodes(tmp_path):
+    path = str(tmp_path / 'workflow.db')
+    proc = subprocess.run([sys.executable, '-c', CRASH_SCRIPT, path, os.path.dirname(__file__)], capture_output=True)
+    assert proc.returncode == 1
+
+    store = WorkflowStore(path)
+    assert store.list_instances(RUNNING) == ['job-1']
+    record = store.load('job-1')
+    # action节点完成后立即写入；跳过记录还在批量缓存中，随进程丢失，恢复时重新推导
+    assert [(node.node_id, node.status) for node in record.nodes] == [('fetch', 'done')]
+
+    calls = []
+    engine = WorkflowEngine(WORKFLOW, make_registry(calls), store=store)
+    result = asyncio.run(engine.execute_workflow(instance_id='job-1'))
+    assert result['success']
+    # fetch的输出从检查点恢复，不再执行
+    assert calls == ['crash', 'report']
+    assert result['restored_nodes'] == ['fetch']
+    assert result['context']['crash'] == {'total': 7}
+    assert result['skipped_nodes'] == ['skipped']
+    assert store.list_instances(COMPLETED) == ['job-1']
+
+    # 已完成的实例再次执行时不会重复任何节点
+    calls.clear()
+    asyncio.run(engine.execute_workflow(instance_id='job-1'))
+    assert calls == []
+    store.close()
+
+
+def test_records_are_batched_until_flush(tmp_path):
+    store = WorkflowStore(str(tmp_path / 'workflow.db'), batch_size=100, flush_interval=0.05)
+    reader = WorkflowStore(str(tmp_path / 'workflow.db'))
+
+    async def main():
+        store.begin('job', 'w', None, None)
+        store.record('job', 'a', 'done', {'x': 1}, 'transform/map')
+        store.record('job', 'b', 'done', {'x': 2}, 'transform/map')
+        assert store.stats()['pending_records'] == 2
+        assert reader.load('job').nodes == []
+        # 有副作用的节点完成后立即写入
+        store.record('job', 'c', 'done', {'x': 3}, 'action/http')
+        assert [node.output for node in reader.load('job').nodes] == [{'x': 1}, {'x': 2}, {'x': 3}]
+        # 其余记录最多缓存flush_interval
+        store.record('job', 'd', 'skipped')
+        await asyncio.sleep(0.1)
+        assert store.stats()['pending_records'] == 0
+        assert len(reader.load('job').nodes) == 4
+
+    asyncio.run(main())
+    store.close()
+    reader.close()
+
+
+def test_runtime_resumes_incomplete_instances(tmp_path):
+    store = WorkflowStore(str(tmp_path / 'workflow.db'))
+    store.begin('job-2', 'durable', None, {'input': {'value': 1}})
+    store.record('job-2', 'fetch', 'done', {'value': 2})
+    store.record('job-2', 'skipped', 'skipped')
+    calls = []
+
+    async def main():
+        async with WorkflowRuntime(WORKFLOW, make_registry(calls), workers=2, store=store) as runtime:
+            return await asyncio.gather(*await runtime.resume_incomplete())
+
+    results = asyncio.run(main())
+    assert [result['instance_id'] for result in results] == ['job-2']
+    assert calls == ['crash', 'report']
+    assert results[0]['context']['report'] == {'value': 2}
+    store.close()
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from mini_agent.workflow.expressions import compile_expression, evaluate
+from mini_agent.workflow.nodes import LogicIfNode, LogicSwitchNode, TransformFilterNode
+from mini_agent.workflow.plan import compile_workflow
+
+
+def test_evaluate_layered_scopes():
+    context = {'x': 1, 'user': {'age': 30}}
+    assert evaluate('x + 1 == 2 and user["age"] >= 18', context)
+    # 靠前的作用域优先
+    assert evaluate('x', {'x': 5}, context) == 5
+    assert evaluate('flag == true and value is null', {'flag': True, 'value': None})
+    assert evaluate('"a" if x in [1, 2] else "b"', context) == 'a'
+    assert compile_expression('x > 1') is compile_expression('x > 1')
+
+
+@pytest.mark.parametrize('source', [
+    '__import__("os")',
+    'len(x)',
+    'x.__class__',
+    '().__class__.__bases__',
+    '[y for y in x]',
+    'lambda: 1',
+    '__builtins__',
+    '9**9**9**9',
+    '1 << 10**10',
+])
+def test_rejects_unsafe_expressions(source):
+    with pytest.raises(ValueError):
+        compile_expression(source)
+
+
+@pytest.mark.parametrize('source', [
+    "'a' * 99999999999",
+    '[0] * 9999999999 * 9999',
+    '99999999999 * (1, 2)',
+    'name * 10000000',
+])
+def test_sequence_repetition_is_bounded(source):
+    # 序列重复在求值时检查结果长度，不会先构造巨大的对象；上下文中的同名键不能绕过检查
+    with pytest.raises(ValueError, match='上限'):
+        evaluate(source, {'name': 'abc', '__multiply__': lambda a, b: a * b})
+
+
+def test_multiplication_still_works():
+    assert evaluate('price * 3', {'price': 2.5}) == 7.5
+    assert evaluate("'ab' * n + '!'", {'n': 3}) == 'ababab!'
+    assert evaluate('[0] * 3 == zeros', {'zeros': [0, 0, 0]}) is True
+
+
+def test_invalid_edge_condition_fails_at_compile_time():
+    workflow = {
+        'nodes': [{'id': 'a', 'type': 't'}, {'id': 'b', 'type': 't'}],
+        'connections': [{'from': 'a', 'to': 'b', 'condition': 'value.__class__'}],
+    }
+    with pytest.raises(ValueError, match='a -> b'):
+        compile_workflow(workflow)
+
+
+def test_logic_nodes():
+    context = {'score': 80, 'items': list(range(10)), 'level': 2}
+    node = {'id': 'f', 'config': {'condition': 'item % 2 == 0 and item < score / 10', 'input': context['items']}}
+    assert asyncio.run(TransformFilterNode.execute(node, context)) == {'filtered_data': [0, 2, 4, 6]}
+    node = {'id': 'f', 'config': {'condition': 'item.__class__', 'input': [1]}}
+    assert 'error' in asyncio.run(TransformFilterNode.execute(node, context))
+
+    node = {'id': 'if', 'config': {'condition': 'score > 60'}}
+    assert asyncio.run(LogicIfNode.execute(node, context)) == {'condition_result': True}
+    # 上下文中的字符串只作为值参与比较，不会改变表达式
+    node = {'id': 'if', 'config': {'condition': 'role == "admin"'}}
+    assert asyncio.run(LogicIfNode.execute(node, {'role': 'x" or True or "'})) == {'condition_result': False}
+    assert asyncio.run(LogicIfNode.execute({'id': 'if'}, context)) == {'condition_result': True}
+
+    node = {'id': 's', 'config': {'expression': 'level * 2', 'cases': {'4': 'high'}, 'default': 'low'}}
+    assert asyncio.run(LogicSwitchNode.execute(node, context)) == {'switch_result': 'high'}
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.memo import DiskMemoBackend, MemoryMemoBackend, NodeMemo
+
+
+def make_registry(calls):
+    class SummarizeNode:
+        @staticmethod
+        async def execute(node, context):
+            calls.append(node['id'])
+            return {'summary': f"{node['config']['prefix']}:{context['input']['text']}"}
+
+    return {'action/summarize': SummarizeNode}
+
+
+def workflow(memoize=True, prefix='s'):
+    node = {'id': 'summarize', 'type': 'action/summarize', 'config': {'prefix': prefix}}
+    if memoize:
+        node['memoize'] = memoize
+    return {'name': 'memo', 'nodes': [node], 'connections': []}
+
+
+def run(engine, text, **extra):
+    return asyncio.run(engine.execute_workflow({'input': {'text': text}, **extra}))
+
+
+def test_unchanged_inputs_hit_the_cache():
+    calls = []
+    memo = NodeMemo()
+    engine = WorkflowEngine(workflow(), make_registry(calls), memo=memo)
+
+    first = run(engine, 'hello')
+    # 节点没有读取的上下文键变化不影响缓存
+    second = run(engine, 'hello', unrelated=1)
+    assert calls == ['summarize']
+    assert first['cached_nodes'] == [] and second['cached_nodes'] == ['summarize']
+    assert second['context']['summarize'] == {'summary': 's:hello'}
+
+    # 节点读取的输入或配置变化时重新执行
+    run(engine, 'world')
+    run(WorkflowEngine(workflow(prefix='t'), make_registry(calls), memo=memo), 'hello')
+    assert calls == ['summarize'] * 3
+    assert memo.stats()['hits'] == 1
+
+
+def test_nodes_without_memoize_always_run():
+    calls = []
+    engine = WorkflowEngine(workflow(memoize=False), make_registry(calls), memo=NodeMemo())
+    run(engine, 'hello')
+    run(engine, 'hello')
+    assert calls == ['summarize', 'summarize']
+
+
+def test_disk_backend_persists_across_runs_and_expires(tmp_path):
+    path = str(tmp_path / 'memo.db')
+    calls = []
+    memo = NodeMemo(DiskMemoBackend(path))
+    run(WorkflowEngine(workflow(), make_registry(calls), memo=memo), 'hello')
+    memo.close()
+
+    # 新进程中的新缓存实例也能命中
+    memo = NodeMemo(DiskMemoBackend(path))
+    result = run(WorkflowEngine(workflow(), make_registry(calls), memo=memo), 'hello')
+    assert result['cached_nodes'] == ['summarize'] and calls == ['summarize']
+
+    engine = WorkflowEngine(workflow(memoize={'ttl': 0.05}), make_registry(calls), memo=memo)
+    run(engine, 'ttl')
+    time.sleep(0.1)
+    run(engine, 'ttl')
+    assert calls == ['summarize'] * 3
+    memo.close()
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryMemoBackend(max_entries=2)
+    backend.set('a', b'1')
+    backend.set('b', b'2')
+    assert backend.get('a') == b'1'
+    backend.set('c', b'3')
+    assert backend.get('b') is None
+    assert backend.get('a') == b'1' and backend.get('c') == b'3'
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.plan import PlanCache, compile_workflow, get_plan
+
+
+class EchoNode:
+    @staticmethod
+    async def execute(node, context):
+        return {'value': node.get('config', {}).get('value')}
+
+
+REGISTRY = {'test/echo': EchoNode}
+
+
+def diamond():
+    return {
+        'name': 'diamond',
+        'nodes': [
+            {'id': 'a', 'type': 'test/echo', 'config': {'value': 1}},
+            {'id': 'b', 'type': 'test/echo'},
+            {'id': 'c', 'type': 'test/echo'},
+            {'id': 'd', 'type': 'test/echo', 'join': 'any'},
+        ],
+        'connections': [
+            {'from': 'a', 'to': 'b', 'condition': 'value == 1'},
+            {'from': 'a', 'to': 'c', 'condition': '{{value}} == 2'},
+            {'from': 'b', 'to': 'd'},
+            {'from': 'c', 'to': 'd'},
+        ],
+    }
+
+
+def test_compile_builds_indexes():
+    plan = compile_workflow(diamond(), REGISTRY)
+    assert plan.start_ids == ('a',)
+    assert plan.topological_order[0] == 'a' and plan.topological_order[-1] == 'd'
+    assert [edge.target for edge in plan.outgoing['a']] == ['b', 'c']
+    assert [edge.source for edge in plan.incoming['d']] == ['b', 'c']
+    assert plan.nodes['d'].join == 'any' and plan.nodes['d'].in_degree == 2
+    # 静态条件预编译，含模板变量的条件留到运行时
+    assert plan.outgoing['a'][0].code is not None
+    assert plan.outgoing['a'][1].code is None
+    with pytest.raises(TypeError):
+        plan.outgoing['x'] = ()
+
+
+def test_compile_rejects_invalid_workflows():
+    workflow = diamond()
+    workflow['connections'].append({'from': 'd', 'to': 'b'})
+    with pytest.raises(ValueError, match='环'):
+        compile_workflow(workflow)
+
+    workflow = diamond()
+    workflow['connections'].append({'from': 'a', 'to': 'missing'})
+    with pytest.raises(ValueError, match='目标节点不存在'):
+        compile_workflow(workflow)
+
+    workflow = diamond()
+    workflow['nodes'][3].update(join='quorum', quorum=3)
+    with pytest.raises(ValueError, match='超过入边数'):
+        compile_workflow(workflow)
+
+    workflow = diamond()
+    workflow['nodes'][0]['type'] = 'test/unknown'
+    with pytest.raises(ValueError, match='未注册'):
+        compile_workflow(workflow, REGISTRY)
+
+
+def test_plan_is_cached_and_reused():
+    cache = PlanCache(max_entries=2)
+    plan = cache.get(diamond(), REGISTRY)
+    assert cache.get(diamond(), REGISTRY) is plan
+    changed = diamond()
+    changed['nodes'][0]['config']['value'] = 2
+    assert cache.get(changed, REGISTRY) is not plan
+    # 编译时深拷贝，修改原定义不影响计划
+    workflow = diamond()
+    plan = get_plan(workflow, REGISTRY)
+    workflow['nodes'][0]['config']['value'] = 3
+    assert plan.definitions['a']['config']['value'] == 1
+
+
+def test_engine_runs_shared_plan():
+    plan = compile_workflow(diamond(), REGISTRY)
+    for _ in range(2):
+        result = asyncio.run(WorkflowEngine(plan, REGISTRY).execute_workflow())
+        assert result['success']
+        assert set(result['context']) >= {'a', 'b', 'd'} and 'c' not in result['context']
+        assert result['skipped_nodes'] == ['c']
+
+
+def test_engine_from_plan_exposes_connections():
+    definition = diamond()
+    engine = WorkflowEngine(compile_workflow(definition, REGISTRY), REGISTRY)
+    assert engine.connections == definition['connections']
+    assert [node['id'] for node in engine.workflow['nodes']] == ['a', 'b', 'c', 'd']
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from mini_agent.workflow.engine import WorkflowEngine
+from mini_agent.workflow.runtime import WorkflowRuntime
+
+
+class EchoNode:
+    @staticmethod
+    async def execute(node, context):
+        await asyncio.sleep(0.05)
+        return {'value': context['input']['value'], 'seen': sorted(context)}
+
+
+REGISTRY = {'test/echo': EchoNode}
+WORKFLOW = {
+    'name': 'echo',
+    'nodes': [{'id': 'a', 'type': 'test/echo'}, {'id': 'b', 'type': 'test/echo'}],
+    'connections': [{'from': 'a', 'to': 'b'}],
+}
+
+
+def test_concurrent_executions_do_not_share_state():
+    engine = WorkflowEngine(WORKFLOW, REGISTRY)
+
+    async def main():
+        return await asyncio.gather(*(engine.execute_workflow({'input': {'value': i}}) for i in range(5)))
+
+    results = asyncio.run(main())
+    assert [result['context']['b']['value'] for result in results] == list(range(5))
+    assert all(result['context']['b']['seen'] == ['a', 'input'] for result in results)
+    assert len({result['instance_id'] for result in results}) == 5
+
+
+def test_runtime_runs_instances_concurrently_with_backpressure():
+    async def main():
+        async with WorkflowRuntime(WORKFLOW, REGISTRY, workers=10, queue_size=2) as runtime:
+            results = await runtime.run_many({'input': {'value': i}} for i in range(20))
+            # 队列满时不等待的提交直接失败
+            futures = [runtime.submit_nowait({'input': {'value': 0}}) for _ in range(2)]
+            with pytest.raises(RuntimeError):
+                runtime.submit_nowait({'input': {'value': 0}})
+            await asyncio.gather(*futures)
+            return results, runtime.stats()
+
+    results, stats = asyncio.run(main())
+    assert [result['context']['b']['value'] for result in results] == list(range(20))
+    assert stats['completed'] == stats['submitted'] and stats['failed'] == 0
+    # 20个实例、每个约0.1秒，10个worker并发约0.2秒
+    assert stats['elapsed'] < 1.0
+    assert stats['instances_per_sec'] > 20
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+from mini_agent.workflow.engine import WorkflowEngine
+
+
+class SleepNode:
+    """按配置休眠的测试节点，记录最大并发数"""
+    active = 0
+    peak = 0
+
+    @staticmethod
+    async def execute(node, context):
+        SleepNode.active += 1
+        SleepNode.peak = max(SleepNode.peak, SleepNode.active)
+        try:
+            await asyncio.sleep(node.get('config', {}).get('seconds', 0.2))
+        finally:
+            SleepNode.active -= 1
+        return {'done': True}
+
+
+class FailNode:
+    @staticmethod
+    async def execute(node, context):
+        raise RuntimeError('boom')
+
+
+REGISTRY = {'test/sleep': SleepNode, 'test/slow': SleepNode, 'test/fail': FailNode}
+
+
+def fan_out(width, node_type='test/sleep'):
+    nodes = [{'id': 'start', 'type': 'test/sleep', 'config': {'seconds': 0}}]
+    nodes += [{'id': f"n{i}", 'type': node_type} for i in range(width)]
+    connections = [{'from': 'start', 'to': f"n{i}"} for i in range(width)]
+    return {'name': 'fan-out', 'nodes': nodes, 'connections': connections}
+
+
+def _run(engine):
+    SleepNode.peak = 0
+    start = time.perf_counter()
+    result = asyncio.run(engine.execute_workflow())
+    return result, time.perf_counter() - start
+
+
+def test_independent_branches_run_concurrently():
+    result, elapsed = _run(WorkflowEngine(fan_out(10), REGISTRY))
+    assert result['success']
+    assert all(result['context'][f"n{i}"] == {'done': True} for i in range(10))
+    assert SleepNode.peak == 10
+    assert elapsed < 0.6
+
+
+def test_parallelism_limits():
+    _, elapsed = _run(WorkflowEngine(fan_out(6), REGISTRY, max_parallelism=2))
+    assert SleepNode.peak == 2
+    assert elapsed >= 0.55
+
+    _run(WorkflowEngine(fan_out(6, 'test/slow'), REGISTRY, node_type_limits={'test/slow': 3}))
+    assert SleepNode.peak == 3
+
+
+def test_stop_on_error_cancels_running_nodes():
+    workflow = fan_out(3)
+    workflow['nodes'].append({'id': 'bad', 'type': 'test/fail'})
+    workflow['connections'].append({'from': 'start', 'to': 'bad'})
+    engine = WorkflowEngine(workflow, REGISTRY)
+    engine.retry_delay = 0
+    result, elapsed = _run(engine)
+    assert not result['success']
+    assert 'n0' not in result['context']
+    assert elapsed < 0.15
+
+
+class CountNode:
+    """记录执行次数的测试节点"""
+    calls = {}
+    finished = []
+
+    @staticmethod
+    async def execute(node, context):
+        CountNode.calls[node['id']] = CountNode.calls.get(node['id'], 0) + 1
+        await asyncio.sleep(node.get('config', {}).get('seconds', 0))
+        CountNode.finished.append(node['id'])
+        return {'value': node.get('config', {}).get('value', 1)}
+
+
+def _count_run(workflow):
+    CountNode.calls = {}
+    CountNode.finished = []
+    result = asyncio.run(WorkflowEngine(workflow, {'test/count': CountNode}).execute_workflow())
+    assert result['success']
+    return result
+
+
+def test_stacked_diamonds_run_each_node_once():
+    nodes = [{'id': 'start', 'type': 'test/count'}]
+    connections = []
+    previous = 'start'
+    for level in range(5):
+        nodes += [{'id': f"l{level}_{i}", 'type': 'test/count'} for i in range(4)]
+        nodes.append({'id': f"merge{level}", 'type': 'test/count'})
+        connections += [{'from': previous, 'to': f"l{level}_{i}"} for i in range(4)]
+        connections += [{'from': f"l{level}_{i}", 'to': f"merge{level}"} for i in range(4)]
+        previous = f"merge{level}"
+    _count_run({'nodes': nodes, 'connections': connections})
+    assert set(CountNode.calls.values()) == {1}
+    assert len(CountNode.calls) == len(nodes)
+
+
+def test_false_conditions_prune_branches():
+    workflow = {
+        'nodes': [{'id': i, 'type': 'test/count'} for i in ['start', 'yes', 'no', 'after_no', 'merge']],
+        'connections': [
+            {'from': 'start', 'to': 'yes', 'condition': 'value == 1'},
+            {'from': 'start', 'to': 'no', 'condition': 'value == 2'},
+            {'from': 'no', 'to': 'after_no'},
+            {'from': 'yes', 'to': 'merge'},
+            {'from': 'after_no', 'to': 'merge'},
+        ],
+    }
+    result = _count_run(workflow)
+    assert CountNode.calls == {'start': 1, 'yes': 1, 'merge': 1}
+    assert sorted(result['skipped_nodes']) == ['after_no', 'no']
+
+
+def test_any_and_quorum_joins():
+    nodes = [{'id': 'start', 'type': 'test/count'}]
+    nodes += [{'id': f"b{i}", 'type': 'test/count', 'config': {'seconds': 0.05 * i}} for i in range(4)]
+    nodes += [
+        {'id': 'first', 'type': 'test/count', 'join': 'any'},
+        {'id': 'two', 'type': 'test/count', 'join': 'quorum', 'quorum': 2},
+    ]
+    connections = [{'from': 'start', 'to': f"b{i}"} for i in range(4)]
+    connections += [{'from': f"b{i}", 'to': target} for i in range(4) for target in ('first', 'two')]
+    _count_run({'nodes': nodes, 'connections': connections})
+    assert CountNode.calls['first'] == 1 and CountNode.calls['two'] == 1
+    # 不必等待最慢的分支
+    order = CountNode.finished
+    assert order.index('first') < order.index('b3')
+    assert order.index('b1') < order.index('two') < order.index('b3')
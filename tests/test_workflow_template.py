@@ -0,0 +1,36 @@
+import asyncio
+
+from mini_agent.workflow.nodes import ActionDatabaseNode, BaseNode
+from mini_agent.workflow.template import compile_template, render_template, render_value
+
+
+CONTEXT = {'user': {'name': 'Alice', 'tags': ['a', 'b']}, 'count': 3, 'quote': 'say "hi"'}
+
+
+def test_render_template():
+    assert render_template('Hello {{ user.name }}, {{count}} items', CONTEXT) == 'Hello Alice, 3 items'
+    # 无法解析的变量保留原样
+    assert render_template('{{user.missing}} / {{count.x}}', CONTEXT) == '{{user.missing}} / {{count.x}}'
+    assert render_template('{{user.tags}}', CONTEXT) == "['a', 'b']"
+    assert render_template('no variables', CONTEXT) == 'no variables'
+    assert render_template(42, CONTEXT) == 42
+    assert BaseNode.process_template('{{user.name}}', CONTEXT) == 'Alice'
+
+
+def test_templates_are_parsed_once():
+    assert compile_template('Hi {{user.name}}') is compile_template('Hi {{user.name}}')
+    template = compile_template('Hi {{user.name}}!')
+    assert template.segments == (('Hi ', None), ('{{user.name}}', ('user', 'name')), ('!', None))
+    assert compile_template('static').is_static
+
+
+def test_render_value_structured():
+    value = {'{{user.name}}': ['{{count}}', {'q': '{{quote}}'}], 'n': 1, 'flag': None}
+    assert render_value(value, CONTEXT) == {'Alice': ['3', {'q': 'say "hi"'}], 'n': 1, 'flag': None}
+
+
+def test_database_node_renders_data_with_quotes():
+    node = {'id': 'db', 'config': {'operation': 'insert', 'data': {'text': '{{quote}}', 'n': 2}}}
+    result = asyncio.run(ActionDatabaseNode.execute(node, CONTEXT))
+    # 以前经JSON往返，值中含引号时解析失败，data会退化为字符串
+    assert result['data'] == {'text': 'say "hi"', 'n': 2}